@@ -1,10 +1,18 @@
 """
 Authentication API routes
 """
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, Request, status, Depends
+from fastapi.security import HTTPAuthorizationCredentials
 from app.models.schemas import UserSignup, UserLogin, Token, UserProfile
-from app.core.security import get_password_hash, verify_password, create_access_token, create_refresh_token, get_current_user
+from app.core.security import (
+    get_password_hash_async, verify_password_async, create_access_token, create_refresh_token,
+    get_current_user, security
+)
 from app.db.database import get_db
+from app.db.executor import execute, DatabaseTimeoutError, DatabaseUnavailableError
+from app.services.profile_cache import get_user_profile, remember_profile
+from app.services.revocations import revoke
+from app.core.rate_limit import client_ip, limit_login_by_ip, login_user_limiter
 from datetime import timedelta
 
 router = APIRouter()
@@ -17,7 +25,7 @@ async def signup(user: UserSignup):
     
     try:
         # Check if user already exists
-        existing = db.table("users").select("id").eq("email", user.email).execute()
+        existing = await execute(db.table("users").select("id").eq("email", user.email), op="users.by_email")
         if existing.data:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -25,15 +33,15 @@ async def signup(user: UserSignup):
             )
         
         # Hash the password
-        hashed_password = get_password_hash(user.password)
+        hashed_password = await get_password_hash_async(user.password)
         
         # Create user directly in database
-        result = db.table("users").insert({
+        result = await execute(db.table("users").insert({
             "email": user.email,
             "full_name": user.full_name,
             "phone": user.phone,
             "password_hash": hashed_password
-        }).execute()
+        }), op="users.create", idempotent=False)
         
         if not result.data:
             raise HTTPException(
@@ -43,6 +51,7 @@ async def signup(user: UserSignup):
         
         user_data = result.data[0]
         user_id = user_data["id"]
+        remember_profile(user_data)
         
         # Generate tokens
         access_token = create_access_token(data={"sub": user_id, "email": user.email})
@@ -50,7 +59,7 @@ async def signup(user: UserSignup):
         
         return Token(access_token=access_token, refresh_token=refresh_token)
         
-    except HTTPException:
+    except (HTTPException, DatabaseTimeoutError, DatabaseUnavailableError):
         raise
     except Exception as e:
         raise HTTPException(
@@ -59,16 +68,19 @@ async def signup(user: UserSignup):
         )
 
 
-@router.post("/login", response_model=Token)
-async def login(credentials: UserLogin):
+@router.post("/login", response_model=Token, dependencies=[Depends(limit_login_by_ip)])
+async def login(credentials: UserLogin, request: Request):
     """Login user"""
+    attempt_key = f"{credentials.email.lower()}|{client_ip(request)}"
+    login_user_limiter.check(attempt_key, consume=False)
     db = get_db()
     
     try:
         # Get user from database
-        result = db.table("users").select("*").eq("email", credentials.email).execute()
+        result = await execute(db.table("users").select("*").eq("email", credentials.email), op="users.by_email")
         
         if not result.data:
+            login_user_limiter.hit(attempt_key)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password"
@@ -77,13 +89,15 @@ async def login(credentials: UserLogin):
         user_data = result.data[0]
         
         # Verify password
-        if not verify_password(credentials.password, user_data.get("password_hash", "")):
+        if not await verify_password_async(credentials.password, user_data.get("password_hash", "")):
+            login_user_limiter.hit(attempt_key)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password"
             )
         
         user_id = user_data["id"]
+        remember_profile(user_data)
         
         # Generate tokens
         access_token = create_access_token(data={"sub": user_id, "email": credentials.email})
@@ -91,7 +105,7 @@ async def login(credentials: UserLogin):
         
         return Token(access_token=access_token, refresh_token=refresh_token)
         
-    except HTTPException:
+    except (HTTPException, DatabaseTimeoutError, DatabaseUnavailableError):
         raise
     except Exception as e:
         raise HTTPException(
@@ -113,14 +127,22 @@ async def refresh_token(current_user: dict = Depends(get_current_user)):
     return Token(access_token=access_token, refresh_token=refresh_token)
 
 
+@router.post("/logout")
+async def logout(
+    current_user: dict = Depends(get_current_user),
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    """Revoke the current access token in every worker"""
+    await revoke(credentials.credentials)
+    return {"message": "Logged out"}
+
+
 @router.get("/me", response_model=UserProfile)
 async def get_current_user_profile(current_user: dict = Depends(get_current_user)):
     """Get current user profile"""
-    db = get_db()
-    
-    result = db.table("users").select("*").eq("id", current_user["user_id"]).execute()
+    user_profile = await get_user_profile(current_user["user_id"])
     
-    if not result.data:
+    if not user_profile:
         raise HTTPException(status_code=404, detail="User not found")
     
-    return result.data[0]
+    return user_profile
@@ -1,13 +1,20 @@
 """
 Banner API endpoints
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from typing import List
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from app.db.database import supabase
+from app.db.executor import execute, DatabaseTimeoutError, DatabaseUnavailableError
+from app.core.config import settings
+from app.core.singleflight import SingleFlight, make_key
+from app.core.response_cache import ResponseCache
 
 router = APIRouter()
 
+banner_flight = SingleFlight("banners.get_banners", ttl=settings.CATALOG_MICROCACHE_SECONDS)
+listing_cache = ResponseCache("banners.list", max_entries=1)
+
 
 class BannerResponse(BaseModel):
     """Banner response model"""
@@ -20,16 +27,33 @@ class BannerResponse(BaseModel):
     display_order: int
 
 
+banner_list = TypeAdapter(List[BannerResponse])
+
+
 @router.get("/", response_model=List[BannerResponse])
-async def get_banners():
+async def get_banners(request: Request):
     """Get all active banners ordered by display_order"""
-    try:
-        response = supabase.table("banners")\
-            .select("*")\
-            .eq("is_active", True)\
-            .order("display_order")\
-            .execute()
-        
+    async def build():
+        return banner_list.dump_json(banner_list.validate_python(await list_banners()))
+    
+    return await listing_cache.respond(request, make_key("banners"), build)
+
+
+async def list_banners():
+    """Active banner rows ordered by display_order"""
+    async def fetch():
+        response = await execute(
+            supabase.table("banners")
+            .select("*")
+            .eq("is_active", True)
+            .order("display_order"),
+            op="banners.list"
+        )
         return response.data
+    
+    try:
+        return await banner_flight.do(make_key("banners"), fetch)
+    except (DatabaseTimeoutError, DatabaseUnavailableError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,58 +1,64 @@
 """
 Shopping Cart API routes
 """
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from typing import Optional
 from app.models.schemas import CartItemAdd, CartItemUpdate, CartResponse, CartItemResponse
 from app.db.database import get_db
+from app.db.executor import execute
 from app.core.security import get_current_user
+from app.core.responses import trusted
+from app.services.pricing import price_cart, to_rupees
+from app.services.promotions import CouponError
 
 router = APIRouter()
 
 
 @router.get("/", response_model=CartResponse)
-async def get_cart(current_user: dict = Depends(get_current_user)):
-    """Get user's shopping cart"""
+async def get_cart(
+    coupon: Optional[str] = Query(None, max_length=40),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get user's shopping cart, with a coupon applied if one is given"""
+    # Built from validated CartItemResponses, so skip the response_model pass
+    return trusted(await build_cart(current_user["user_id"], coupon))
+
+
+async def build_cart(user_id: str, coupon_code: Optional[str] = None) -> CartResponse:
+    """The user's cart with per-item and total prices"""
     db = get_db()
-    user_id = current_user["user_id"]
     
     # Get cart items with product details
-    result = db.table("cart").select(
-        "*, products(id, name, price, discount_price, image_url)"
-    ).eq("user_id", user_id).execute()
-    
-    items = []
-    subtotal = 0.0
-    total_savings = 0.0
-    
-    for item in result.data:
-        product = item["products"]
-        original_price = product["price"]
-        discounted_price = product["discount_price"] if product["discount_price"] else product["price"]
-        item_subtotal = discounted_price * item["quantity"]
-        
-        # Calculate savings
-        if product["discount_price"]:
-            item_savings = (original_price - discounted_price) * item["quantity"]
-            total_savings += item_savings
-        
-        items.append(CartItemResponse(
-            id=item["id"],
-            product_id=product["id"],
-            product_name=product["name"],
-            product_image=product["image_url"],
-            price=discounted_price,
-            quantity=item["quantity"],
-            subtotal=item_subtotal
-        ))
-        
-        subtotal += item_subtotal
+    result = await execute(db.table("cart").select(
+        "*, products(id, name, category, price, discount_price, image_url)"
+    ).eq("user_id", user_id), op="cart.get")
+    
+    try:
+        cart = price_cart(result.data, coupon_code)
+    except CouponError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    items = [
+        CartItemResponse(
+            id=line.row["id"],
+            product_id=line.product["id"],
+            product_name=line.product["name"],
+            product_image=line.product["image_url"],
+            price=to_rupees(line.unit_price),
+            quantity=line.quantity,
+            subtotal=to_rupees(line.subtotal),
+            promotion=line.promotion.name if line.promotion else None
+        )
+        for line in cart.lines
+    ]
     
     return CartResponse(
         items=items,
         total_items=len(items),
-        total_price=subtotal,
-        total_savings=total_savings,
-        final_total=subtotal
+        total_price=to_rupees(cart.subtotal),
+        total_savings=to_rupees(cart.savings),
+        coupon_code=coupon_code.strip().upper() if cart.coupon else None,
+        coupon_discount=to_rupees(cart.coupon_discount),
+        final_total=to_rupees(cart.total)
     )
 
 
@@ -63,7 +69,7 @@ async def add_to_cart(item: CartItemAdd, current_user: dict = Depends(get_curren
     user_id = current_user["user_id"]
     
     # Check if product exists
-    product = db.table("products").select("id, stock").eq("id", item.product_id).execute()
+    product = await execute(db.table("products").select("id, stock").eq("id", item.product_id), op="products.stock")
     
     if not product.data:
         raise HTTPException(status_code=404, detail="Product not found")
@@ -72,19 +78,19 @@ async def add_to_cart(item: CartItemAdd, current_user: dict = Depends(get_curren
         raise HTTPException(status_code=400, detail="Insufficient stock")
     
     # Check if item already in cart
-    existing = db.table("cart").select("*").eq("user_id", user_id).eq("product_id", item.product_id).execute()
+    existing = await execute(db.table("cart").select("*").eq("user_id", user_id).eq("product_id", item.product_id), op="cart.find_item")
     
     if existing.data:
         # Update quantity
         new_quantity = existing.data[0]["quantity"] + item.quantity
-        db.table("cart").update({"quantity": new_quantity}).eq("id", existing.data[0]["id"]).execute()
+        await execute(db.table("cart").update({"quantity": new_quantity}).eq("id", existing.data[0]["id"]), op="cart.update_quantity")
     else:
         # Add new item
-        db.table("cart").insert({
+        await execute(db.table("cart").insert({
             "user_id": user_id,
             "product_id": item.product_id,
             "quantity": item.quantity
-        }).execute()
+        }), op="cart.insert", idempotent=False)
     
     return {"message": "Item added to cart"}
 
@@ -100,19 +106,19 @@ async def update_cart_item(
     user_id = current_user["user_id"]
     
     # Verify cart item belongs to user
-    cart_item = db.table("cart").select("*").eq("id", cart_item_id).eq("user_id", user_id).execute()
+    cart_item = await execute(db.table("cart").select("*").eq("id", cart_item_id).eq("user_id", user_id), op="cart.get_item")
     
     if not cart_item.data:
         raise HTTPException(status_code=404, detail="Cart item not found")
     
     # Check product stock
-    product = db.table("products").select("stock").eq("id", cart_item.data[0]["product_id"]).execute()
+    product = await execute(db.table("products").select("stock").eq("id", cart_item.data[0]["product_id"]), op="products.stock")
     
     if product.data[0]["stock"] < update.quantity:
         raise HTTPException(status_code=400, detail="Insufficient stock")
     
     # Update quantity
-    db.table("cart").update({"quantity": update.quantity}).eq("id", cart_item_id).execute()
+    await execute(db.table("cart").update({"quantity": update.quantity}).eq("id", cart_item_id), op="cart.update_quantity")
     
     return {"message": "Cart updated"}
 
@@ -124,7 +130,7 @@ async def remove_from_cart(cart_item_id: str, current_user: dict = Depends(get_c
     user_id = current_user["user_id"]
     
     # Verify and delete
-    result = db.table("cart").delete().eq("id", cart_item_id).eq("user_id", user_id).execute()
+    result = await execute(db.table("cart").delete().eq("id", cart_item_id).eq("user_id", user_id), op="cart.remove")
     
     if not result.data:
         raise HTTPException(status_code=404, detail="Cart item not found")
@@ -138,6 +144,6 @@ async def clear_cart(current_user: dict = Depends(get_current_user)):
     db = get_db()
     user_id = current_user["user_id"]
     
-    db.table("cart").delete().eq("user_id", user_id).execute()
+    await execute(db.table("cart").delete().eq("user_id", user_id), op="cart.clear")
     
     return {"message": "Cart cleared"}
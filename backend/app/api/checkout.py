@@ -3,23 +3,28 @@ Checkout API endpoints
 """
 from fastapi import APIRouter, HTTPException, Depends, status
 from pydantic import BaseModel
+from typing import Dict, List, Optional
 from app.db.database import get_db
+from app.db.executor import execute, DatabaseTimeoutError, DatabaseUnavailableError
 from app.core.security import get_current_user
 from app.core.config import settings
+from app.services.pricing import price_cart, to_rupees
+from app.services.promotions import CouponError
+from app.api.orders import shipping_address_snapshot
+import logging
 import uuid
 from datetime import datetime
 import razorpay
-import asyncio
-from httpx import ReadTimeout
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 # Initialize Razorpay client
 razorpay_client = razorpay.Client(auth=(settings.RAZORPAY_KEY, settings.RAZORPAY_SECRET))
 
 
 class CheckoutRequest(BaseModel):
-    """Checkout request model"""
+    """Checkout request model; the coupon is the one priced into the Razorpay order"""
     address_id: str
     payment_method: str
     payment_details: dict = {}
@@ -28,6 +33,7 @@ class CheckoutRequest(BaseModel):
 class RazorpayOrderRequest(BaseModel):
     """Razorpay order creation request"""
     address_id: str
+    coupon_code: Optional[str] = None
 
 
 def generate_order_number() -> str:
@@ -63,22 +69,19 @@ async def create_razorpay_order(
     user_id = current_user["user_id"]
     
     # Get cart items and calculate total
-    cart_items = db.table("cart").select(
-        "*, products(id, name, price, discount_price, stock)"
-    ).eq("user_id", user_id).execute()
+    cart_items = await execute(db.table("cart").select(
+        "*, products(id, name, category, price, discount_price, stock)"
+    ).eq("user_id", user_id), op="cart.get")
     
     if not cart_items.data:
         raise HTTPException(status_code=400, detail="Cart is empty")
     
-    # Calculate total amount
-    total_amount = 0.0
-    for item in cart_items.data:
-        product = item["products"]
-        price = product["discount_price"] if product["discount_price"] else product["price"]
-        total_amount += price * item["quantity"]
-    
-    # Convert to paise (Razorpay uses smallest currency unit)
-    amount_paise = int(total_amount * 100)
+    # Razorpay takes the amount in paise, the smallest currency unit
+    try:
+        cart = price_cart(cart_items.data, request.coupon_code)
+    except CouponError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    amount_paise = cart.total
     
     try:
         # Create Razorpay order using the official SDK
@@ -87,21 +90,40 @@ async def create_razorpay_order(
             "currency": "INR",
             "payment_capture": 1  # Auto capture payment
         })
-        
-        return {
-            "success": True,
-            "razorpay_key": settings.RAZORPAY_KEY,
-            "amount": amount_paise,
-            "currency": "INR",
-            "razorpay_order_id": razorpay_order['id'],
-            "total_amount": total_amount
-        }
     except Exception as e:
-        print(f"Razorpay order creation error: {e}")
+        logger.exception("Razorpay order creation failed")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to create Razorpay order: {str(e)}"
         )
+    
+    # The order is later created from this quote, so it records exactly what
+    # was charged even if the coupon or promotions change before payment
+    await execute(db.table("checkout_quotes").insert({
+        "razorpay_order_id": razorpay_order['id'],
+        "user_id": user_id,
+        "coupon_code": request.coupon_code if cart.coupon else None,
+        "amount_paise": amount_paise,
+        "items": cart.order_items()
+    }), op="checkout_quotes.insert", idempotent=False)
+    
+    return {
+        "success": True,
+        "razorpay_key": settings.RAZORPAY_KEY,
+        "amount": amount_paise,
+        "currency": "INR",
+        "razorpay_order_id": razorpay_order['id'],
+        "total_amount": to_rupees(amount_paise)
+    }
+
+
+def _quantities(items: List[dict]) -> Dict[str, int]:
+    """Quantity per product id, for comparing a cart with a quote"""
+    quantities: Dict[str, int] = {}
+    for item in items:
+        product_id = str(item["product_id"])
+        quantities[product_id] = quantities.get(product_id, 0) + item["quantity"]
+    return quantities
 
 
 @router.post("/create-order")
@@ -114,15 +136,15 @@ async def create_order(
     user_id = current_user["user_id"]
     
     # Get cart items
-    cart_items = db.table("cart").select(
-        "*, products(id, name, price, discount_price, stock, image_url)"
-    ).eq("user_id", user_id).execute()
+    cart_items = await execute(db.table("cart").select(
+        "*, products(id, name, category, price, discount_price, stock, image_url)"
+    ).eq("user_id", user_id), op="cart.get")
     
     if not cart_items.data:
         raise HTTPException(status_code=400, detail="Cart is empty")
     
     # Verify address
-    address = db.table("addresses").select("*").eq("id", checkout.address_id).eq("user_id", user_id).execute()
+    address = await execute(db.table("addresses").select("*").eq("id", checkout.address_id).eq("user_id", user_id), op="addresses.get")
     
     if not address.data:
         raise HTTPException(status_code=404, detail="Address not found")
@@ -139,33 +161,38 @@ async def create_order(
     )
     if not is_valid:
         raise HTTPException(status_code=400, detail="Invalid payment signature")
-    payment_status = "paid"
     
-    # Calculate total and prepare order items
-    total_amount = 0.0
-    order_items = []
+    # Price the order as it was charged, not against the current promotions
+    quote = await execute(
+        db.table("checkout_quotes").select("*")
+        .eq("razorpay_order_id", checkout.payment_details["razorpay_order_id"])
+        .eq("user_id", user_id),
+        op="checkout_quotes.get"
+    )
+    if not quote.data:
+        raise HTTPException(status_code=400, detail="Unknown payment order")
+    quote = quote.data[0]
+    if _quantities(cart_items.data) != _quantities(quote["items"]):
+        logger.warning(
+            "Cart changed after Razorpay order %s was paid (user %s)",
+            quote["razorpay_order_id"], user_id
+        )
+        raise HTTPException(
+            status_code=409,
+            detail="Your cart changed after payment was started. Please contact support with your payment ID."
+        )
+    payment_status = "paid"
     
+    # Check stock
     for item in cart_items.data:
         product = item["products"]
-        
-        # Check stock
         if product["stock"] < item["quantity"]:
             raise HTTPException(
                 status_code=400,
                 detail=f"Insufficient stock for {product['name']}"
             )
-        
-        price = product["discount_price"] if product["discount_price"] else product["price"]
-        subtotal = price * item["quantity"]
-        total_amount += subtotal
-        
-        order_items.append({
-            "product_id": product["id"],
-            "product_name": product["name"],
-            "quantity": item["quantity"],
-            "price": price,
-            "subtotal": subtotal
-        })
+    
+    order_items = quote["items"]
     
     # Create order
     order_number = generate_order_number()
@@ -176,53 +203,41 @@ async def create_order(
         "status": "confirmed" if payment_status == "paid" else "pending",
         "payment_method": checkout.payment_method,
         "payment_status": payment_status,
-        "total_amount": total_amount,
-        "shipping_address": address.data[0]
+        "total_amount": to_rupees(quote["amount_paise"]),
+        "shipping_address": await shipping_address_snapshot(address.data[0], user_id)
     }
     
-    # Retry logic for database operations
-    max_retries = 3
-    retry_delay = 1  # seconds
-    
-    for attempt in range(max_retries):
-        try:
-            created_order = db.table("orders").insert(order_data).execute()
-            order_id = created_order.data[0]["id"]
-            break
-        except ReadTimeout as e:
-            print(f"Database timeout on attempt {attempt + 1}/{max_retries}: {str(e)}")
-            if attempt < max_retries - 1:
-                await asyncio.sleep(retry_delay)
-                retry_delay *= 2  # Exponential backoff
-            else:
-                raise HTTPException(
-                    status_code=504,
-                    detail="Database operation timed out. Please try again."
-                )
-        except Exception as e:
-            print(f"Error creating order: {str(e)}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to create order: {str(e)}"
-            )
+    # Not retried: a timed-out insert may have committed, and a replay would
+    # create a second order for the same payment
+    try:
+        created_order = await execute(db.table("orders").insert(order_data), op="orders.insert", idempotent=False)
+        order_id = created_order.data[0]["id"]
+    except (DatabaseTimeoutError, DatabaseUnavailableError):
+        raise
+    except Exception as e:
+        logger.exception("Error creating order %s", order_number)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to create order: {str(e)}"
+        )
     
     # Insert order items
     for item in order_items:
         item["order_id"] = order_id
-        db.table("order_items").insert(item).execute()
+        await execute(db.table("order_items").insert(item), op="order_items.insert", idempotent=False)
         
         # Update product stock directly
         product_id = item["product_id"]
         quantity = item["quantity"]
         
         # Get current stock
-        product = db.table("products").select("stock").eq("id", product_id).execute()
+        product = await execute(db.table("products").select("stock").eq("id", product_id), op="products.stock")
         if product.data:
             new_stock = product.data[0]["stock"] - quantity
-            db.table("products").update({"stock": new_stock}).eq("id", product_id).execute()
+            await execute(db.table("products").update({"stock": new_stock}).eq("id", product_id), op="products.update_stock")
     
     # Clear cart
-    db.table("cart").delete().eq("user_id", user_id).execute()
+    await execute(db.table("cart").delete().eq("user_id", user_id), op="cart.clear")
     
     return {
         "success": True,
@@ -1,15 +1,43 @@
 """
 Orders API routes
 """
-from fastapi import APIRouter, HTTPException, Depends, status
-from typing import List
-from app.models.schemas import OrderCreate, OrderResponse, OrderItemResponse
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from typing import Optional, Tuple
+from app.models.schemas import OrderCreate, OrderResponse, OrderSummary, OrderHistory
 from app.db.database import get_db
+from app.db.query import order_desc
+from app.db.executor import execute, DatabaseTimeoutError, DatabaseUnavailableError
 from app.core.security import get_current_user
+from app.core.responses import trusted
+from app.services.profile_cache import get_user_profile
+from app.services.pricing import price_cart, to_rupees
+from app.services.promotions import CouponError
+import base64
+import binascii
+import logging
 import uuid
 from datetime import datetime
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Columns per order history projection; items are embedded, not queried per order
+ORDER_HISTORY_FIELDS = {
+    "full": "*, order_items(*)",
+    "summary": "id, order_number, status, total_amount, created_at, order_items(quantity)",
+}
+
+
+async def shipping_address_snapshot(address: dict, user_id: str) -> dict:
+    """
+    The address as stored on the order; the account phone is filled in
+    when the address has none, so order pages never look it up later
+    """
+    snapshot = dict(address)
+    if not snapshot.get("phone"):
+        user_profile = await get_user_profile(user_id)
+        snapshot["phone"] = user_profile.get("phone") if user_profile else None
+    return snapshot
 
 
 def generate_order_number() -> str:
@@ -26,44 +54,34 @@ async def create_order(order: OrderCreate, current_user: dict = Depends(get_curr
     user_id = current_user["user_id"]
     
     # Get cart items
-    cart_items = db.table("cart").select(
-        "*, products(id, name, price, discount_price, stock)"
-    ).eq("user_id", user_id).execute()
+    cart_items = await execute(db.table("cart").select(
+        "*, products(id, name, category, price, discount_price, stock)"
+    ).eq("user_id", user_id), op="cart.get")
     
     if not cart_items.data:
         raise HTTPException(status_code=400, detail="Cart is empty")
     
     # Verify address
-    address = db.table("addresses").select("*").eq("id", order.address_id).eq("user_id", user_id).execute()
+    address = await execute(db.table("addresses").select("*").eq("id", order.address_id).eq("user_id", user_id), op="addresses.get")
     
     if not address.data:
         raise HTTPException(status_code=404, detail="Address not found")
     
-    # Calculate total and prepare order items
-    total_amount = 0.0
-    order_items = []
-    
+    # Check stock
     for item in cart_items.data:
         product = item["products"]
-        
-        # Check stock
         if product["stock"] < item["quantity"]:
             raise HTTPException(
                 status_code=400,
                 detail=f"Insufficient stock for {product['name']}"
             )
-        
-        price = product["discount_price"] if product["discount_price"] else product["price"]
-        subtotal = price * item["quantity"]
-        total_amount += subtotal
-        
-        order_items.append({
-            "product_id": product["id"],
-            "product_name": product["name"],
-            "quantity": item["quantity"],
-            "price": price,
-            "subtotal": subtotal
-        })
+    
+    # Calculate total and prepare order items
+    try:
+        cart = price_cart(cart_items.data, order.coupon_code)
+    except CouponError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    order_items = cart.order_items()
     
     # Create order
     order_number = generate_order_number()
@@ -74,48 +92,96 @@ async def create_order(order: OrderCreate, current_user: dict = Depends(get_curr
         "status": "pending",
         "payment_method": order.payment_method,
         "payment_status": "pending" if order.payment_method == "online" else "cod",
-        "total_amount": total_amount,
-        "shipping_address": address.data[0]
+        "total_amount": to_rupees(cart.total),
+        "shipping_address": await shipping_address_snapshot(address.data[0], user_id)
     }
     
-    created_order = db.table("orders").insert(order_data).execute()
+    created_order = await execute(db.table("orders").insert(order_data), op="orders.insert", idempotent=False)
     order_id = created_order.data[0]["id"]
     
     # Insert order items
     for item in order_items:
         item["order_id"] = order_id
-        db.table("order_items").insert(item).execute()
+        await execute(db.table("order_items").insert(item), op="order_items.insert", idempotent=False)
         
         # Update product stock
-        db.rpc("decrement_stock", {
+        await execute(db.rpc("decrement_stock", {
             "product_id": item["product_id"],
             "quantity": item["quantity"]
-        }).execute()
+        }), op="products.decrement_stock", idempotent=False)
     
     # Clear cart
-    db.table("cart").delete().eq("user_id", user_id).execute()
+    await execute(db.table("cart").delete().eq("user_id", user_id), op="cart.clear")
     
     # Return created order
     return await get_order(order_id, current_user)
 
 
-@router.get("/", response_model=List[OrderResponse])
-async def get_user_orders(current_user: dict = Depends(get_current_user)):
-    """Get all orders for current user"""
+def encode_order_cursor(order: dict) -> str:
+    return base64.urlsafe_b64encode(f"{order['created_at']}|{order['id']}".encode()).decode()
+
+
+def decode_order_cursor(cursor: str) -> Tuple[str, str]:
+    """(created_at, id) of the last order on the previous page"""
+    try:
+        created_at, order_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at).isoformat(), str(uuid.UUID(order_id))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def orders_before(query, cursor: str):
+    """
+    Keyset filter (created_at, id) < cursor. Orders can share a created_at
+    (same transaction or clock tick), so id breaks ties. This postgrest
+    client has no or_(), so the logic tree is added as a raw parameter;
+    the timestamp is quoted because it contains reserved characters.
+    """
+    created_at, order_id = decode_order_cursor(cursor)
+    query.params = query.params.add(
+        "or", f'(created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{order_id}))'
+    )
+    return query
+
+
+@router.get("/", response_model=OrderHistory)
+async def get_user_orders(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    fields: str = Query("full", pattern="^(full|summary)$"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get the current user's orders, newest first, one page at a time"""
+    return trusted(await list_user_orders(current_user["user_id"], limit, cursor, fields))
+
+
+async def list_user_orders(
+    user_id: str, limit: int = 20, cursor: Optional[str] = None, fields: str = "full"
+) -> OrderHistory:
+    """
+    One page of the user's orders with their items embedded; fields="summary"
+    returns OrderSummary rows (item count instead of items)
+    """
     db = get_db()
-    user_id = current_user["user_id"]
     
-    orders = db.table("orders").select("*").eq("user_id", user_id).order("created_at", desc=True).execute()
+    query = db.table("orders").select(ORDER_HISTORY_FIELDS[fields]).eq("user_id", user_id)
+    if cursor:
+        query = orders_before(query, cursor)
+    query = order_desc(query, "created_at", "id").limit(limit + 1)
+    rows = await execute(query, op=f"orders.history_{fields}")
     
-    result = []
-    for order in orders.data:
-        # Get order items
-        items = db.table("order_items").select("*").eq("order_id", order["id"]).execute()
-        
-        order["items"] = [OrderItemResponse(**item) for item in items.data]
-        result.append(OrderResponse(**order))
+    page = rows.data[:limit]
+    next_cursor = encode_order_cursor(page[-1]) if len(rows.data) > limit else None
     
-    return result
+    orders = []
+    for order in page:
+        items = order.pop("order_items")
+        if fields == "summary":
+            orders.append(OrderSummary(**order, item_count=sum(item["quantity"] for item in items)))
+        else:
+            orders.append(OrderResponse(**order, items=items))
+    
+    return OrderHistory(orders=orders, next_cursor=next_cursor)
 
 
 @router.get("/{order_id}", response_model=OrderResponse)
@@ -125,72 +191,27 @@ async def get_order(order_id: str, current_user: dict = Depends(get_current_user
     user_id = current_user["user_id"]
     
     try:
-        order = db.table("orders").select("*").eq("id", order_id).eq("user_id", user_id).execute()
+        # Order, items and their product images in one round trip
+        order = await execute(
+            db.table("orders").select("*, order_items(*, products(image_url))").eq("id", order_id).eq("user_id", user_id),
+            op="orders.get_with_items"
+        )
         
         if not order.data:
             raise HTTPException(status_code=404, detail="Order not found")
         
         order_data = order.data[0]
+        items = order_data.pop("order_items")
+        for item in items:
+            product = item.pop("products", None)
+            item["product_image"] = product.get("image_url") if product else None
+        logger.debug("Order %s loaded with %d items", order_id, len(items))
         
-        # Get user phone as fallback if address doesn't have phone
-        user_data = db.table("users").select("phone").eq("id", user_id).execute()
-        user_phone = user_data.data[0].get('phone') if user_data.data else None
-        
-        # Add phone to shipping_address if not present
-        if order_data.get('shipping_address') and not order_data['shipping_address'].get('phone'):
-            order_data['shipping_address']['phone'] = user_phone
-        
-        # Get order items with product images
-        try:
-            # Try with join first - get image from products table
-            items = db.table("order_items").select("*, products(image_url)").eq("order_id", order_id).execute()
-            print(f"[DEBUG] Fetched {len(items.data)} order items with join")
-        except Exception as join_error:
-            print(f"Join query failed: {join_error}, falling back to basic query")
-            # Fallback to basic query without join
-            items = db.table("order_items").select("*").eq("order_id", order_id).execute()
-        
-        # Process items to include product image
-        processed_items = []
-        for item in items.data:
-            item_dict = dict(item)
-            print(f"[DEBUG] Processing item: {item_dict.get('product_name', 'Unknown')}")
-            
-            # Extract image from nested products object if available
-            if 'products' in item_dict and item_dict['products']:
-                product_image = item_dict['products'].get('image_url')
-                item_dict['product_image'] = product_image
-                print(f"[DEBUG] Product image from join: {product_image}")
-            else:
-                # If join failed, try to fetch product image separately
-                try:
-                    product_id = item_dict.get('product_id')
-                    if product_id:
-                        product_data = db.table("products").select("image_url").eq("id", product_id).execute()
-                        if product_data.data and product_data.data[0].get('image_url'):
-                            item_dict['product_image'] = product_data.data[0]['image_url']
-                            print(f"[DEBUG] Product image from separate query: {product_data.data[0]['image']}")
-                        else:
-                            print(f"[DEBUG] No product image found for product_id: {product_id}")
-                except Exception as img_error:
-                    print(f"[DEBUG] Error fetching product image: {img_error}")
-            
-            # Remove nested products object
-            if 'products' in item_dict:
-                del item_dict['products']
-            
-            processed_items.append(OrderItemResponse(**item_dict))
-        
-        order_data["items"] = processed_items
-        print(f"[DEBUG] Returning order with {len(processed_items)} items")
-        
-        return OrderResponse(**order_data)
-    except HTTPException:
+        return OrderResponse(**order_data, items=items)
+    except (HTTPException, DatabaseTimeoutError, DatabaseUnavailableError):
         raise
     except Exception as e:
-        print(f"Error getting order {order_id}: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error getting order %s", order_id)
         raise HTTPException(status_code=500, detail=f"Error retrieving order: {str(e)}")
 
 
@@ -200,24 +221,18 @@ async def cancel_order(order_id: str, current_user: dict = Depends(get_current_u
     db = get_db()
     user_id = current_user["user_id"]
     
-    order = db.table("orders").select("*").eq("id", order_id).eq("user_id", user_id).execute()
+    # Status change and stock restore happen in one transaction; a repeated
+    # call finds the order already cancelled, so retrying is safe
+    outcome = await execute(db.rpc("cancel_order", {
+        "p_order_id": order_id,
+        "p_user_id": user_id
+    }), op="orders.cancel")
     
-    if not order.data:
+    result = outcome.data["result"]
+    if result == "not_found":
         raise HTTPException(status_code=404, detail="Order not found")
-    
-    if order.data[0]["status"] in ["shipped", "delivered", "cancelled"]:
+    if result == "not_cancellable":
         raise HTTPException(status_code=400, detail="Cannot cancel this order")
     
-    # Update order status
-    db.table("orders").update({"status": "cancelled"}).eq("id", order_id).execute()
-    
-    # Restore product stock
-    items = db.table("order_items").select("*").eq("order_id", order_id).execute()
-    
-    for item in items.data:
-        db.rpc("increment_stock", {
-            "product_id": item["product_id"],
-            "quantity": item["quantity"]
-        }).execute()
-    
+    logger.debug("Order %s %s, restocked %s", order_id, result, outcome.data["restocked"])
     return {"message": "Order cancelled successfully"}
@@ -0,0 +1,164 @@
+"""
+Page composition API routes
+
+Each endpoint returns everything one frontend page needs, gathering the
+parts concurrently from the existing handlers so a page render costs the
+frontend a single round trip. Secondary parts (categories, banners,
+similar products, reviews, addresses, orders) degrade to empty values on
+failure, as the frontend already did when calling them one by one.
+"""
+import asyncio
+import logging
+from fastapi import APIRouter, Depends, Query
+from typing import List, Optional
+from pydantic import BaseModel
+from app.models.schemas import (
+    ProductResponse, ProductList, ReviewList, UserProfile, AddressResponse, OrderSummary, OrderHistory
+)
+from app.core.security import get_current_user
+from app.core.singleflight import SingleFlight, make_key
+from app.db.database import get_db
+from app.db.executor import execute
+from app.api import products, banners, reviews, profile, orders
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Polled by every frontend worker; one query pair per second is plenty
+version_flight = SingleFlight("pages.catalog_version", ttl=1.0)
+
+
+class CatalogVersion(BaseModel):
+    version: str
+
+
+class HomePage(BaseModel):
+    products: ProductList
+    categories: List[str]
+    banners: List[banners.BannerResponse]
+
+
+class ProductPage(BaseModel):
+    product: ProductResponse
+    similar_products: List[ProductResponse]
+    reviews: ReviewList
+
+
+class ProfilePage(BaseModel):
+    user: UserProfile
+    addresses: List[AddressResponse]
+    orders: List[OrderSummary]
+    orders_next_cursor: Optional[str] = None
+
+
+def _part(result, default, name: str):
+    """A gathered part, or default if it failed"""
+    if isinstance(result, BaseException):
+        if isinstance(result, asyncio.CancelledError):
+            raise result
+        logger.warning("Page part %s failed: %r", name, result)
+        return default
+    return result
+
+
+@router.get("/home", response_model=HomePage)
+async def get_home_page(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    category: Optional[str] = None,
+    search: Optional[str] = None,
+    sort_by: Optional[str] = Query("created_at", regex="^(price|price_desc|rating|created_at|name)$")
+):
+    """Product listing, categories and banners for the home page"""
+    product_list, categories, banner_list = await asyncio.gather(
+        products.list_products(page, page_size, category, search, sort_by, "desc"),
+        products.get_categories(),
+        banners.list_banners(),
+        return_exceptions=True
+    )
+
+    return HomePage(
+        products=_part(product_list, ProductList(products=[], total=0, page=page, page_size=page_size), "products"),
+        categories=_part(categories, {"categories": []}, "categories")["categories"],
+        banners=_part(banner_list, [], "banners")
+    )
+
+
+@router.get("/product/{product_id}", response_model=ProductPage)
+async def get_product_page(
+    product_id: str,
+    review_sort: str = Query("newest", pattern="^(newest|helpful)$")
+):
+    """Product, similar products and the first page of reviews"""
+    product, similar, review_list = await asyncio.gather(
+        products.get_product(product_id),
+        products.get_similar_products(product_id, limit=4),
+        reviews.get_product_reviews(product_id, page=1, page_size=10, sort=review_sort),
+        return_exceptions=True
+    )
+
+    if isinstance(product, BaseException):
+        raise product
+
+    return ProductPage(
+        product=product,
+        similar_products=_part(similar, {"products": []}, "similar_products")["products"],
+        reviews=_part(review_list, ReviewList(reviews=[], total=0, average_rating=0.0), "reviews")
+    )
+
+
+@router.get("/profile", response_model=ProfilePage)
+async def get_profile_page(
+    orders_cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Profile, saved addresses and a page of order summaries"""
+    # A bad cursor is the caller's error, not a failed page part
+    if orders_cursor:
+        orders.decode_order_cursor(orders_cursor)
+
+    user, addresses, order_history = await asyncio.gather(
+        profile.get_profile(current_user),
+        profile.get_addresses(current_user),
+        orders.list_user_orders(current_user["user_id"], cursor=orders_cursor, fields="summary"),
+        return_exceptions=True
+    )
+
+    if isinstance(user, BaseException):
+        raise user
+
+    order_history = _part(order_history, OrderHistory(orders=[]), "orders")
+    return ProfilePage(
+        user=user,
+        addresses=_part(addresses, [], "addresses"),
+        orders=order_history.orders,
+        orders_next_cursor=order_history.next_cursor
+    )
+
+
+@router.get("/version", response_model=CatalogVersion)
+async def get_catalog_version():
+    """
+    Changes whenever a product or banner is added, changed or removed
+    (review aggregates touch products.updated_at too); used as a cache key
+    by the frontend's page cache
+    """
+    async def fetch():
+        db = get_db()
+        latest_product, latest_banner = await asyncio.gather(
+            execute(
+                db.table("products").select("updated_at", count="exact").order("updated_at", desc=True).limit(1),
+                op="products.latest_update"
+            ),
+            execute(
+                db.table("banners").select("updated_at", count="exact").order("updated_at", desc=True).limit(1),
+                op="banners.latest_update"
+            )
+        )
+        stamps = [
+            f"{rows.count}:{rows.data[0]['updated_at'] if rows.data else ''}"
+            for rows in (latest_product, latest_banner)
+        ]
+        return CatalogVersion(version="|".join(stamps))
+    
+    return await version_flight.do(make_key("catalog_version"), fetch)
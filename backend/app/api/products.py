@@ -1,17 +1,27 @@
 """
 Products API routes
 """
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Request
 from typing import Optional, List
 from app.models.schemas import ProductResponse, ProductList
 from app.db.database import get_db
+from app.db.executor import execute
 from app.core.security import get_current_user
+from app.core.config import settings
+from app.core.singleflight import SingleFlight, make_key
+from app.core.catalog_snapshot import get_catalog_snapshot
+from app.core.response_cache import ResponseCache
 
 router = APIRouter()
 
+product_flight = SingleFlight("products.get_product", ttl=settings.CATALOG_MICROCACHE_SECONDS)
+similar_flight = SingleFlight("products.get_similar_products", ttl=settings.CATALOG_MICROCACHE_SECONDS)
+listing_cache = ResponseCache("products.list")
+
 
 @router.get("/", response_model=ProductList)
 async def get_products(
+    request: Request,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     category: Optional[str] = None,
@@ -20,6 +30,39 @@ async def get_products(
     order: Optional[str] = Query("desc", regex="^(asc|desc)$")
 ):
     """Get all products with pagination and filters"""
+    snapshot = get_catalog_snapshot()
+    key = make_key(
+        "products", page=page, page_size=page_size, category=category, search=search,
+        sort_by=sort_by, order=order, generation=snapshot.generation if snapshot else None
+    )
+    
+    async def build():
+        product_list = await list_products(page, page_size, category, search, sort_by, order)
+        return product_list.model_dump_json().encode("utf-8")
+    
+    return await listing_cache.respond(request, key, build)
+
+
+async def list_products(
+    page: int,
+    page_size: int,
+    category: Optional[str],
+    search: Optional[str],
+    sort_by: Optional[str],
+    order: Optional[str]
+) -> ProductList:
+    """Product listing page, from the catalog snapshot when available"""
+    snapshot = get_catalog_snapshot()
+    if snapshot:
+        products, total = snapshot.query(
+            category=category or None,
+            search=search,
+            sort_by=sort_by,
+            offset=(page - 1) * page_size,
+            limit=page_size
+        )
+        return ProductList(products=products, total=total, page=page, page_size=page_size)
+    
     db = get_db()
     
     # Build query
@@ -50,7 +93,7 @@ async def get_products(
     offset = (page - 1) * page_size
     query = query.range(offset, offset + page_size - 1)
     
-    result = query.execute()
+    result = await execute(query, op="products.list")
     
     # Sort by price in Python if needed
     if needs_python_sort:
@@ -74,9 +117,13 @@ async def get_products(
 @router.get("/categories")
 async def get_categories():
     """Get all unique product categories"""
+    snapshot = get_catalog_snapshot()
+    if snapshot:
+        return {"categories": snapshot.categories()}
+    
     db = get_db()
     
-    result = db.table("products").select("category").execute()
+    result = await execute(db.table("products").select("category"), op="products.categories")
     
     categories = list(set([item["category"] for item in result.data]))
     
@@ -86,30 +133,48 @@ async def get_categories():
 @router.get("/{product_id}", response_model=ProductResponse)
 async def get_product(product_id: str):
     """Get product by ID"""
-    db = get_db()
-    
-    result = db.table("products").select("*").eq("id", product_id).execute()
-    
-    if not result.data:
-        raise HTTPException(status_code=404, detail="Product not found")
+    snapshot = get_catalog_snapshot()
+    if snapshot:
+        product = snapshot.get(product_id)
+        if product:
+            return product
+        # Fall through for products added since the snapshot was built
+    
+    async def fetch():
+        db = get_db()
+        result = await execute(db.table("products").select("*").eq("id", product_id), op="products.get")
+        
+        if not result.data:
+            raise HTTPException(status_code=404, detail="Product not found")
+        
+        return result.data[0]
     
-    return result.data[0]
+    return await product_flight.do(make_key("product", id=product_id), fetch)
 
 
 @router.get("/similar/{product_id}")
 async def get_similar_products(product_id: str, limit: int = Query(4, ge=1, le=10)):
     """Get similar products based on category"""
-    db = get_db()
-    
-    # Get current product category
-    product = db.table("products").select("category").eq("id", product_id).execute()
-    
-    if not product.data:
-        raise HTTPException(status_code=404, detail="Product not found")
-    
-    category = product.data[0]["category"]
-    
-    # Get similar products
-    result = db.table("products").select("*").eq("category", category).neq("id", product_id).limit(limit).execute()
+    async def fetch():
+        db = get_db()
+        
+        # Get current product category
+        product = await execute(
+            db.table("products").select("category").eq("id", product_id),
+            op="products.similar_category"
+        )
+        
+        if not product.data:
+            raise HTTPException(status_code=404, detail="Product not found")
+        
+        category = product.data[0]["category"]
+        
+        # Get similar products
+        result = await execute(
+            db.table("products").select("*").eq("category", category).neq("id", product_id).limit(limit),
+            op="products.similar"
+        )
+        
+        return {"products": result.data}
     
-    return {"products": result.data}
+    return await similar_flight.do(make_key("similar", id=product_id, limit=limit), fetch)
@@ -5,6 +5,8 @@ from fastapi import APIRouter, HTTPException, Depends, status
 from typing import List
 from app.models.schemas import UserProfile, UserProfileUpdate, AddressCreate, AddressResponse
 from app.db.database import get_db
+from app.db.executor import execute
+from app.services.profile_cache import get_user_profile, remember_profile
 from app.core.security import get_current_user
 
 router = APIRouter()
@@ -13,14 +15,12 @@ router = APIRouter()
 @router.get("/", response_model=UserProfile)
 async def get_profile(current_user: dict = Depends(get_current_user)):
     """Get user profile"""
-    db = get_db()
-    
-    result = db.table("users").select("*").eq("id", current_user["user_id"]).execute()
+    user_profile = await get_user_profile(current_user["user_id"])
     
-    if not result.data:
+    if not user_profile:
         raise HTTPException(status_code=404, detail="User not found")
     
-    return result.data[0]
+    return user_profile
 
 
 @router.put("/", response_model=UserProfile)
@@ -36,11 +36,14 @@ async def update_profile(profile_update: UserProfileUpdate, current_user: dict =
         raise HTTPException(status_code=400, detail="No data to update")
     
     # Update profile
-    result = db.table("users").update(update_data).eq("id", user_id).execute()
+    result = await execute(db.table("users").update(update_data).eq("id", user_id), op="profile.update")
     
     if not result.data:
         raise HTTPException(status_code=404, detail="User not found")
     
+    # Write through so cached readers see the update immediately
+    remember_profile(result.data[0])
+    
     return result.data[0]
 
 
@@ -50,7 +53,7 @@ async def get_addresses(current_user: dict = Depends(get_current_user)):
     """Get all user addresses"""
     db = get_db()
     
-    result = db.table("addresses").select("*").eq("user_id", current_user["user_id"]).execute()
+    result = await execute(db.table("addresses").select("*").eq("user_id", current_user["user_id"]), op="addresses.list")
     
     return result.data
 
@@ -63,12 +66,12 @@ async def create_address(address: AddressCreate, current_user: dict = Depends(ge
     
     # If this is set as default, unset other defaults
     if address.is_default:
-        db.table("addresses").update({"is_default": False}).eq("user_id", user_id).execute()
+        await execute(db.table("addresses").update({"is_default": False}).eq("user_id", user_id), op="addresses.clear_default")
     
     address_data = address.model_dump()
     address_data["user_id"] = user_id
     
-    result = db.table("addresses").insert(address_data).execute()
+    result = await execute(db.table("addresses").insert(address_data), op="addresses.create", idempotent=False)
     
     return result.data[0]
 
@@ -84,16 +87,16 @@ async def update_address(
     user_id = current_user["user_id"]
     
     # Verify address belongs to user
-    existing = db.table("addresses").select("*").eq("id", address_id).eq("user_id", user_id).execute()
+    existing = await execute(db.table("addresses").select("*").eq("id", address_id).eq("user_id", user_id), op="addresses.get")
     
     if not existing.data:
         raise HTTPException(status_code=404, detail="Address not found")
     
     # If setting as default, unset other defaults
     if address.is_default:
-        db.table("addresses").update({"is_default": False}).eq("user_id", user_id).execute()
+        await execute(db.table("addresses").update({"is_default": False}).eq("user_id", user_id), op="addresses.clear_default")
     
-    result = db.table("addresses").update(address.model_dump()).eq("id", address_id).execute()
+    result = await execute(db.table("addresses").update(address.model_dump()).eq("id", address_id), op="addresses.update")
     
     return result.data[0]
 
@@ -104,7 +107,7 @@ async def delete_address(address_id: str, current_user: dict = Depends(get_curre
     db = get_db()
     user_id = current_user["user_id"]
     
-    result = db.table("addresses").delete().eq("id", address_id).eq("user_id", user_id).execute()
+    result = await execute(db.table("addresses").delete().eq("id", address_id).eq("user_id", user_id), op="addresses.delete")
     
     if not result.data:
         raise HTTPException(status_code=404, detail="Address not found")
@@ -1,10 +1,16 @@
 """
 Product Reviews API routes
 """
+import uuid
 from fastapi import APIRouter, HTTPException, Depends, status, Query
 from app.models.schemas import ReviewCreate, ReviewResponse, ReviewList
 from app.db.database import get_db
+from app.db.executor import execute
 from app.core.security import get_current_user
+from app.services.profile_cache import get_user_profile
+from app.services.counters import HelpfulVoteBufferFull, helpful_votes
+from app.services.review_cache import get_review_summary, invalidate_product_reviews, order_reviews, review_exists
+from app.core.config import settings
 
 router = APIRouter()
 
@@ -16,92 +22,84 @@ async def create_review(review: ReviewCreate, current_user: dict = Depends(get_c
     user_id = current_user["user_id"]
     
     # Verify product exists
-    product = db.table("products").select("id").eq("id", review.product_id).execute()
+    product = await execute(db.table("products").select("id").eq("id", review.product_id), op="products.exists")
     
     if not product.data:
         raise HTTPException(status_code=404, detail="Product not found")
     
     # Check if user already reviewed this product
-    existing = db.table("reviews").select("id").eq("product_id", review.product_id).eq("user_id", user_id).execute()
+    existing = await execute(db.table("reviews").select("id").eq("product_id", review.product_id).eq("user_id", user_id), op="reviews.find_existing")
     
     if existing.data:
         raise HTTPException(status_code=400, detail="You have already reviewed this product")
     
     # Get user info
-    user = db.table("users").select("full_name").eq("id", user_id).execute()
+    user = await get_user_profile(user_id)
     
     # Create review
     review_data = review.model_dump()
     review_data["user_id"] = user_id
+    # Denormalized so review pages never join users
+    review_data["user_name"] = (user or {}).get("full_name") or ""
     
-    result = db.table("reviews").insert(review_data).execute()
+    # The reviews_aggregate trigger updates the product's rating in the same statement
+    result = await execute(db.table("reviews").insert(review_data), op="reviews.insert", idempotent=False)
+    invalidate_product_reviews(review.product_id)
     
-    # Update product rating
-    await update_product_rating(review.product_id)
-    
-    # Prepare response
-    review_response = result.data[0]
-    review_response["user_name"] = user.data[0]["full_name"]
-    
-    return ReviewResponse(**review_response)
+    return ReviewResponse(**result.data[0])
 
 
 @router.get("/{product_id}", response_model=ReviewList)
 async def get_product_reviews(
     product_id: str,
     page: int = Query(1, ge=1),
-    page_size: int = Query(10, ge=1, le=50)
+    page_size: int = Query(10, ge=1, le=50),
+    sort: str = Query("newest", pattern="^(newest|helpful)$")
 ):
     """Get reviews for a product"""
-    db = get_db()
+    summary = await get_review_summary(product_id)
+    if summary is None:
+        return ReviewList(reviews=[], total=0, average_rating=0.0)
     
-    # Get reviews with user info
     offset = (page - 1) * page_size
-    
-    reviews = db.table("reviews").select(
-        "*, users(full_name)"
-    ).eq("product_id", product_id).order("created_at", desc=True).range(
-        offset, offset + page_size - 1
-    ).execute()
-    
-    # Get total count
-    count = db.table("reviews").select("id", count="exact").eq("product_id", product_id).execute()
-    
-    # Calculate average rating
-    all_reviews = db.table("reviews").select("rating").eq("product_id", product_id).execute()
-    
-    if all_reviews.data:
-        avg_rating = sum([r["rating"] for r in all_reviews.data]) / len(all_reviews.data)
+    if offset + page_size <= settings.REVIEW_CACHE_DEPTH:
+        reviews = summary[sort][offset:offset + page_size]
     else:
-        avg_rating = 0.0
-    
-    # Format response
-    review_list = []
-    for review in reviews.data:
-        review["user_name"] = review["users"]["full_name"]
-        del review["users"]
-        review_list.append(ReviewResponse(**review))
+        # Deeper pages are read directly
+        db = get_db()
+        result = await execute(
+            order_reviews(
+                db.table("reviews").select("*").eq("product_id", product_id), sort
+            ).range(offset, offset + page_size - 1),
+            op="reviews.page"
+        )
+        reviews = result.data
     
     return ReviewList(
-        reviews=review_list,
-        total=count.count or 0,
-        average_rating=round(avg_rating, 2)
+        reviews=[ReviewResponse(**review) for review in reviews],
+        total=summary["total"],
+        average_rating=summary["average_rating"],
+        rating_histogram=summary["rating_histogram"]
     )
 
 
 @router.put("/{review_id}/helpful")
 async def mark_review_helpful(review_id: str, current_user: dict = Depends(get_current_user)):
     """Mark a review as helpful"""
-    db = get_db()
-    
-    review = db.table("reviews").select("helpful_count").eq("id", review_id).execute()
+    try:
+        review_id = str(uuid.UUID(review_id))
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Review not found")
     
-    if not review.data:
+    if not await review_exists(review_id):
         raise HTTPException(status_code=404, detail="Review not found")
     
-    # Increment helpful count
-    new_count = review.data[0]["helpful_count"] + 1
-    db.table("reviews").update({"helpful_count": new_count}).eq("id", review_id).execute()
+    # Buffered and applied in batches; repeat votes by the same user, and
+    # votes for a review deleted before the flush, are dropped then
+    try:
+        helpful_votes.add(review_id, current_user["user_id"])
+    except HelpfulVoteBufferFull:
+        raise HTTPException(status_code=503, detail="Too many votes waiting to be saved, try again shortly")
     
     return {"message": "Review marked as helpful"}
 
@@ -112,38 +110,16 @@ async def delete_review(review_id: str, current_user: dict = Depends(get_current
     db = get_db()
     user_id = current_user["user_id"]
     
-    review = db.table("reviews").select("product_id").eq("id", review_id).eq("user_id", user_id).execute()
+    review = await execute(db.table("reviews").select("product_id").eq("id", review_id).eq("user_id", user_id), op="reviews.get_own")
     
     if not review.data:
         raise HTTPException(status_code=404, detail="Review not found")
     
     product_id = review.data[0]["product_id"]
     
-    # Delete review
-    db.table("reviews").delete().eq("id", review_id).execute()
-    
-    # Update product rating
-    await update_product_rating(product_id)
+    # Delete review (the reviews_aggregate trigger updates the product's rating)
+    await execute(db.table("reviews").delete().eq("id", review_id), op="reviews.delete")
+    invalidate_product_reviews(product_id)
     
     return {"message": "Review deleted"}
 
-
-async def update_product_rating(product_id: str):
-    """Update product rating and review count"""
-    db = get_db()
-    
-    # Get all reviews for product
-    reviews = db.table("reviews").select("rating").eq("product_id", product_id).execute()
-    
-    if reviews.data:
-        avg_rating = sum([r["rating"] for r in reviews.data]) / len(reviews.data)
-        review_count = len(reviews.data)
-    else:
-        avg_rating = 0.0
-        review_count = 0
-    
-    # Update product
-    db.table("products").update({
-        "rating": round(avg_rating, 2),
-        "review_count": review_count
-    }).eq("id", product_id).execute()
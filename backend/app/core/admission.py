@@ -0,0 +1,193 @@
+"""
+Admission control with per-route priority classes
+
+Routes are grouped into priority classes (checkout > cart > catalog >
+reviews). Each class has its own concurrency limit, and all classes share
+a global budget. A lower-priority class may only fill a fraction of the
+global budget, so the remaining headroom is always left for checkout.
+Requests that cannot be admitted wait in a bounded per-class queue and are
+woken in priority order; a lower class only defers to a higher one that is
+waiting for global capacity, not to one held back by its own class limit.
+They are shed with 429 when the queue is full or 503 when the queue
+timeout expires, both with Retry-After.
+"""
+import asyncio
+import json
+from collections import deque
+from typing import List, Optional
+from app.core.config import settings
+
+
+class PriorityClass:
+    """One admission lane"""
+
+    def __init__(self, name: str, prefixes: tuple, limit: int, share: float):
+        self.name = name
+        self.prefixes = prefixes
+        self.limit = limit
+        self.share = share
+        self.max_queue = limit * 2
+        self.active = 0
+        self.waiters = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "waiting": len(self.waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+        }
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, retry_after: int):
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Shared admission state; classes are listed highest priority first"""
+
+    def __init__(self, classes: List[PriorityClass], global_limit: int, queue_timeout: float, retry_after: int):
+        self.classes = classes
+        self.global_limit = global_limit
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.in_flight = 0
+
+    def classify(self, path: str) -> Optional[PriorityClass]:
+        for lane in self.classes:
+            if path.startswith(lane.prefixes):
+                return lane
+        return None
+
+    def _can_admit(self, lane: PriorityClass) -> bool:
+        return lane.active < lane.limit and self.in_flight < self.global_limit * lane.share
+
+    def _admit(self, lane: PriorityClass):
+        lane.active += 1
+        lane.admitted += 1
+        self.in_flight += 1
+
+    @staticmethod
+    def _waiting_for_capacity(lane: PriorityClass) -> bool:
+        """Queued requests that only global capacity keeps out (class slots are free)"""
+        return bool(lane.waiters) and lane.active < lane.limit
+
+    def _higher_priority_waiting(self, lane: PriorityClass) -> bool:
+        for other in self.classes:
+            if other is lane:
+                return False
+            if self._waiting_for_capacity(other):
+                return True
+        return False
+
+    async def acquire(self, lane: PriorityClass):
+        if not lane.waiters and not self._higher_priority_waiting(lane) and self._can_admit(lane):
+            self._admit(lane)
+            return
+
+        if len(lane.waiters) >= lane.max_queue:
+            lane.rejected_queue_full += 1
+            raise AdmissionRejected(429, self.retry_after)
+
+        lane.queued += 1
+        waiter = asyncio.get_running_loop().create_future()
+        lane.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                return  # Admitted right at the deadline
+            lane.rejected_timeout += 1
+            raise AdmissionRejected(503, self.retry_after)
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(lane)
+            raise
+        finally:
+            if waiter in lane.waiters:
+                lane.waiters.remove(waiter)
+
+    def release(self, lane: PriorityClass):
+        lane.active -= 1
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        for lane in self.classes:
+            while lane.waiters and self._can_admit(lane):
+                waiter = lane.waiters.popleft()
+                if waiter.done():
+                    continue
+                self._admit(lane)
+                waiter.set_result(None)
+            if self._waiting_for_capacity(lane):
+                # Keep lower classes waiting behind this one; a lane held back
+                # only by its own limit does not stop them
+                return
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "classes": {lane.name: lane.stats() for lane in self.classes},
+        }
+
+
+controller = AdmissionController(
+    classes=[
+        PriorityClass("checkout", ("/api/checkout", "/api/orders"), settings.ADMISSION_CHECKOUT_LIMIT, 1.0),
+        PriorityClass("cart", ("/api/cart", "/api/profile", "/api/auth", "/api/pages/profile"), settings.ADMISSION_CART_LIMIT, 0.9),
+        PriorityClass("catalog", ("/api/products", "/api/banners", "/api/pages"), settings.ADMISSION_CATALOG_LIMIT, 0.75),
+        PriorityClass("reviews", ("/api/reviews",), settings.ADMISSION_REVIEWS_LIMIT, 0.5),
+    ],
+    global_limit=settings.ADMISSION_GLOBAL_LIMIT,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+)
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware applying the shared AdmissionController"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            return await self.app(scope, receive, send)
+
+        lane = controller.classify(scope["path"])
+        if lane is None:
+            return await self.app(scope, receive, send)
+
+        try:
+            await controller.acquire(lane)
+        except AdmissionRejected as rejected:
+            return await _send_rejection(send, rejected)
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(lane)
+
+
+async def _send_rejection(send, rejected: AdmissionRejected):
+    detail = "Too many requests" if rejected.status_code == 429 else "Server is busy, please try again shortly"
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": rejected.status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("ascii")),
+            (b"retry-after", str(rejected.retry_after).encode("ascii")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,259 @@
+"""
+Shared-memory product catalog snapshot
+
+The catalog is serialized into a compact, versioned binary file that every
+worker memory-maps read-only, so a box running N workers holds one copy of
+the catalog in the page cache instead of N. A single refresher process
+(see app.services.catalog_refresher) writes new generations and swaps them
+in atomically with os.replace; workers notice the new file and remap it.
+
+File layout (little endian):
+
+    header      magic, format, generation, built_at, counts, section offsets
+    index       one fixed-size record per product, sorted by id
+    categories  length-prefixed UTF-8 category names
+    data        per product: UTF-8 name followed by the compact JSON row
+
+Index records carry the fields needed to filter and sort (category, rating,
+effective price, created_at) so listing queries only decode the JSON of the
+rows on the requested page.
+"""
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"AGCS"
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("<4sHHQdIIIII")
+# id, row offset, row length, name offset, name length, category index,
+# rating x100, effective price in paise, created_at (epoch seconds)
+INDEX = struct.Struct("<36sIIIHHHid")
+ID_SIZE = 36
+CATEGORY_LEN = struct.Struct("<H")
+
+
+class SnapshotFormatError(Exception):
+    """Raised when a snapshot file is truncated or has an unknown format"""
+
+
+def _effective_price_paise(row: dict) -> int:
+    price = row.get("discount_price") or row.get("price") or 0
+    return int(round(float(price) * 100))
+
+
+def _created_at_epoch(value) -> float:
+    if not value:
+        return 0.0
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return 0.0
+
+
+def build_snapshot(rows: Iterable[dict], generation: int) -> bytes:
+    """Serialize product rows into the snapshot binary format"""
+    rows = sorted(rows, key=lambda r: str(r["id"]))
+    categories = sorted({r["category"] for r in rows})
+    category_index = {name: i for i, name in enumerate(categories)}
+
+    index_offset = HEADER.size
+    categories_offset = index_offset + INDEX.size * len(rows)
+
+    category_blob = bytearray()
+    for name in categories:
+        encoded = name.encode("utf-8")
+        category_blob += CATEGORY_LEN.pack(len(encoded)) + encoded
+
+    data_offset = categories_offset + len(category_blob)
+
+    index_blob = bytearray()
+    data_blob = bytearray()
+    for row in rows:
+        row_id = str(row["id"]).encode("ascii")
+        if len(row_id) > ID_SIZE:
+            raise SnapshotFormatError(f"Product id too long for snapshot: {row['id']}")
+
+        name = (row.get("name") or "").encode("utf-8")
+        name_off = data_offset + len(data_blob)
+        data_blob += name
+        body = json.dumps(row, separators=(",", ":"), default=str).encode("utf-8")
+        row_off = data_offset + len(data_blob)
+        data_blob += body
+
+        index_blob += INDEX.pack(
+            row_id,
+            row_off,
+            len(body),
+            name_off,
+            len(name),
+            category_index[row["category"]],
+            int(round(float(row.get("rating") or 0) * 100)),
+            _effective_price_paise(row),
+            _created_at_epoch(row.get("created_at")),
+        )
+
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, 0, generation, time.time(),
+        len(rows), len(categories), index_offset, categories_offset, data_offset
+    )
+    return bytes(header + index_blob + category_blob + data_blob)
+
+
+def write_snapshot(path: str, rows: Iterable[dict], generation: int):
+    """Write a snapshot and atomically swap it into place"""
+    blob = build_snapshot(rows, generation)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_generation(path: str) -> int:
+    """Generation of the snapshot at path, or 0 if there is none"""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+    except FileNotFoundError:
+        return 0
+    if len(header) < HEADER.size or header[:4] != MAGIC:
+        return 0
+    return HEADER.unpack(header)[3]
+
+
+class CatalogSnapshot:
+    """Read-only, memory-mapped view of a catalog snapshot"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)
+
+        if len(self._mm) < HEADER.size:
+            raise SnapshotFormatError("Snapshot is truncated")
+
+        (magic, version, _, self.generation, self.built_at, self.row_count,
+         category_count, self._index_offset, categories_offset, _) = HEADER.unpack_from(self._mm, 0)
+
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise SnapshotFormatError(f"Unsupported snapshot format in {path}")
+
+        self._categories = []
+        offset = categories_offset
+        for _ in range(category_count):
+            (length,) = CATEGORY_LEN.unpack_from(self._mm, offset)
+            offset += CATEGORY_LEN.size
+            self._categories.append(self._mm[offset:offset + length].decode("utf-8"))
+            offset += length
+
+    def _records(self):
+        end = self._index_offset + INDEX.size * self.row_count
+        return INDEX.iter_unpack(self._view[self._index_offset:end])
+
+    def _row(self, offset: int, length: int) -> dict:
+        return json.loads(self._mm[offset:offset + length])
+
+    def _name(self, record) -> str:
+        return self._mm[record[3]:record[3] + record[4]].decode("utf-8")
+
+    def categories(self) -> List[str]:
+        return list(self._categories)
+
+    def get(self, product_id: str) -> Optional[dict]:
+        """Binary search the id-sorted index for one product"""
+        key = product_id.encode("ascii", "ignore").ljust(ID_SIZE, b"\0")
+        lo, hi = 0, self.row_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = self._index_offset + mid * INDEX.size
+            current = self._mm[start:start + ID_SIZE]
+            if current < key:
+                lo = mid + 1
+            elif current > key:
+                hi = mid
+            else:
+                record = INDEX.unpack_from(self._mm, start)
+                return self._row(record[1], record[2])
+        return None
+
+    def query(
+        self,
+        category: Optional[str] = None,
+        search: Optional[str] = None,
+        sort_by: str = "created_at",
+        offset: int = 0,
+        limit: int = 20,
+    ) -> Tuple[List[dict], int]:
+        """Filter, sort and paginate the catalog, decoding only the returned rows"""
+        records = self._records()
+
+        if category is not None:
+            if category not in self._categories:
+                return [], 0
+            category_idx = self._categories.index(category)
+            records = (r for r in records if r[5] == category_idx)
+
+        if search:
+            needle = search.lower()
+            records = (r for r in records if needle in self._name(r).lower())
+
+        records = list(records)
+
+        if sort_by == "name":
+            records.sort(key=self._name)
+        elif sort_by == "rating":
+            records.sort(key=lambda r: r[6], reverse=True)
+        elif sort_by in ("price", "price_desc"):
+            records.sort(key=lambda r: r[7], reverse=(sort_by == "price_desc"))
+        else:
+            records.sort(key=lambda r: r[8], reverse=True)
+
+        page = records[offset:offset + limit]
+        return [self._row(r[1], r[2]) for r in page], len(records)
+
+
+_current: Optional[CatalogSnapshot] = None
+_signature = None
+_checked_at = 0.0
+
+
+def get_catalog_snapshot() -> Optional[CatalogSnapshot]:
+    """
+    Current snapshot for this worker, or None when snapshots are disabled,
+    missing or older than CATALOG_SNAPSHOT_MAX_AGE_SECONDS.
+    The file is re-checked at most every CATALOG_SNAPSHOT_CHECK_SECONDS.
+    """
+    global _current, _signature, _checked_at
+
+    path = settings.CATALOG_SNAPSHOT_PATH
+    if not path:
+        return None
+
+    now = time.monotonic()
+    if now - _checked_at >= settings.CATALOG_SNAPSHOT_CHECK_SECONDS:
+        _checked_at = now
+        try:
+            st = os.stat(path)
+            signature = (st.st_ino, st.st_mtime_ns, st.st_size)
+            if signature != _signature:
+                # The previous mapping is released once in-flight readers drop it
+                _current = CatalogSnapshot(path)
+                _signature = signature
+        except (OSError, ValueError, SnapshotFormatError) as e:
+            logger.warning("Catalog snapshot unavailable: %s", e)
+            _current = None
+            _signature = None
+
+    if _current is None or time.time() - _current.built_at > settings.CATALOG_SNAPSHOT_MAX_AGE_SECONDS:
+        return None
+    return _current
@@ -0,0 +1,131 @@
+"""
+Negotiated response compression
+
+CompressionMiddleware compresses compressible responses (JSON, text) of
+at least COMPRESSION_MINIMUM_SIZE bytes with brotli when the client
+accepts it and the brotli package is installed, otherwise gzip. Responses
+that already carry a Content-Encoding, such as the precompressed payloads
+from app.core.response_cache, are passed through untouched.
+"""
+import gzip
+import zlib
+from typing import Optional
+from starlette.datastructures import Headers, MutableHeaders
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Best encoding this server can produce that the client accepts"""
+    accepted = set()
+    for token in accept_encoding.split(","):
+        name, _, params = token.partition(";")
+        params = params.replace(" ", "")
+        try:
+            quality = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            quality = 0.0
+        if quality > 0:
+            accepted.add(name.strip().lower())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    """One-shot compression; best=True spends more CPU for payloads that are cached"""
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if best else settings.BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=9 if best else settings.GZIP_LEVEL, mtime=0)
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=settings.BROTLI_QUALITY)
+            self._process = self._compressor.process
+            self._finish = self._compressor.finish
+        else:
+            self._compressor = zlib.compressobj(settings.GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._process = self._compressor.compress
+            self._finish = self._compressor.flush
+
+    def process(self, data: bytes) -> bytes:
+        return self._process(data)
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware; streamed responses are compressed chunk by chunk"""
+
+    def __init__(self, app, minimum_size: int = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MINIMUM_SIZE if minimum_size is None else minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if "content-encoding" in headers or not content_type.startswith(COMPRESSIBLE_TYPES):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Held until the first body chunk shows whether it is worth compressing
+                    start_message = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                return await send(message)
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    return await send(message)
+
+                headers = MutableHeaders(raw=start_message["headers"])
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if not more_body:
+                    body = compress(body, encoding)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start_message)
+                    return await send({"type": "http.response.body", "body": body})
+
+                del headers["Content-Length"]
+                compressor = _StreamCompressor(encoding)
+                await send(start_message)
+
+            chunk = compressor.process(body)
+            if not more_body:
+                chunk += compressor.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
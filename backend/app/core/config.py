@@ -11,6 +11,10 @@ class Settings(BaseSettings):
     APP_VERSION: str = "1.0.0"
     DEBUG: bool = True
     
+    # Logging (see app.core.log); DEBUG records are sampled
+    LOG_LEVEL: str = "INFO"
+    LOG_DEBUG_SAMPLE_RATE: float = 0.01
+    
     # Supabase
     SUPABASE_URL: str
     SUPABASE_KEY: str
@@ -21,11 +25,92 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    JWT_BACKEND: str = "jose"  # jose, or pyjwt if installed
+    TOKEN_CACHE_SIZE: int = 10000
+    # How often each worker picks up tokens revoked by other workers
+    REVOCATION_SYNC_SECONDS: float = 5.0
+    
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_SIZE: int = 16
     
     # Payment Gateway (Razorpay)
     RAZORPAY_KEY: str = "rzp_test_demo"  # Replace with actual key
     RAZORPAY_SECRET: str = "demo_secret"  # Replace with actual secret
     
+    # Catalog read coalescing - seconds to keep a coalesced result (0 disables)
+    CATALOG_MICROCACHE_SECONDS: float = 0.0
+    
+    # Shared catalog snapshot (empty path disables it)
+    CATALOG_SNAPSHOT_PATH: str = ""
+    CATALOG_SNAPSHOT_CHECK_SECONDS: float = 1.0
+    CATALOG_SNAPSHOT_REFRESH_SECONDS: float = 30.0
+    CATALOG_SNAPSHOT_MAX_AGE_SECONDS: float = 300.0
+    
+    # Per-user profile cache
+    PROFILE_CACHE_TTL_SECONDS: float = 300.0
+    PROFILE_CACHE_SIZE: int = 10000
+    # How often each worker drops profiles updated through other workers
+    PROFILE_SYNC_SECONDS: float = 2.0
+    
+    # Per-product review read model (first REVIEW_CACHE_DEPTH reviews per sort)
+    REVIEW_CACHE_TTL_SECONDS: float = 60.0
+    REVIEW_CACHE_SIZE: int = 2000
+    REVIEW_CACHE_DEPTH: int = 20
+    
+    # Review helpful-vote write buffer
+    HELPFUL_VOTE_FLUSH_SECONDS: float = 0.25
+    HELPFUL_VOTE_FLUSH_BATCH: int = 200
+    HELPFUL_VOTE_SPOOL_PATH: str = "helpful_votes.spool"
+    HELPFUL_VOTE_MAX_PENDING: int = 10000
+    
+    # Database call policy
+    DB_TIMEOUT_SECONDS: float = 5.0
+    DB_MAX_RETRIES: int = 2
+    DB_RETRY_BASE_SECONDS: float = 0.05
+    DB_RETRY_MAX_SECONDS: float = 1.0
+    REQUEST_DEADLINE_SECONDS: float = 15.0
+    DB_BREAKER_WINDOW_SECONDS: float = 10.0
+    DB_BREAKER_MIN_CALLS: int = 20
+    DB_BREAKER_ERROR_RATE: float = 0.5
+    DB_BREAKER_COOLDOWN_SECONDS: float = 5.0
+    
+    # Admission control - concurrent requests per priority class
+    ADMISSION_GLOBAL_LIMIT: int = 64
+    ADMISSION_CHECKOUT_LIMIT: int = 32
+    ADMISSION_CART_LIMIT: int = 32
+    ADMISSION_CATALOG_LIMIT: int = 48
+    ADMISSION_REVIEWS_LIMIT: int = 16
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 2.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 2
+    
+    # Login rate limits (token buckets)
+    LOGIN_RATE_PER_MINUTE_PER_IP: float = 20
+    LOGIN_BURST_PER_IP: int = 10
+    # Failed attempts per (email, client IP)
+    LOGIN_RATE_PER_MINUTE_PER_USER: float = 5
+    LOGIN_BURST_PER_USER: int = 5
+    # Proxies allowed to set X-Forwarded-For (comma-separated)
+    TRUSTED_PROXIES: str = "127.0.0.1,::1"
+    
+    # Resized WebP widths the frontend's /img/<width>/ endpoint serves (comma-separated)
+    IMAGE_DERIVATIVE_WIDTHS: str = "160,320,640,960"
+    
+    # Response compression (brotli is used when the package is installed)
+    COMPRESSION_MINIMUM_SIZE: int = 500
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4
+    # Precompressed cache for public listing responses
+    RESPONSE_CACHE_TTL_SECONDS: float = 30.0
+    RESPONSE_CACHE_SIZE: int = 256
+    
+    # How often each worker checks the promotions table for changes
+    PROMOTIONS_REFRESH_SECONDS: float = 10.0
+    
+    # Bearer token for GET /metrics (empty disables the endpoint)
+    METRICS_TOKEN: str = ""
+    
     # CORS - will be parsed from comma-separated string
     ALLOWED_ORIGINS: str = "http://localhost:5000,http://127.0.0.1:5000"
     
@@ -33,6 +118,14 @@ class Settings(BaseSettings):
         """Parse ALLOWED_ORIGINS into a list"""
         return [origin.strip() for origin in self.ALLOWED_ORIGINS.split(',')]
     
+    def get_trusted_proxies(self) -> List[str]:
+        """Parse TRUSTED_PROXIES into a list"""
+        return [proxy.strip() for proxy in self.TRUSTED_PROXIES.split(',') if proxy.strip()]
+    
+    def get_image_derivative_widths(self) -> List[int]:
+        """Parse IMAGE_DERIVATIVE_WIDTHS into a sorted list"""
+        return sorted(int(width) for width in self.IMAGE_DERIVATIVE_WIDTHS.split(',') if width.strip())
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
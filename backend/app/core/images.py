@@ -0,0 +1,23 @@
+"""
+Responsive image URLs
+
+Product images stored under the frontend's /static/images/ have resized
+WebP derivatives at /img/<width>/<path> (see frontend/image_derivatives.py).
+"""
+from typing import Optional
+from app.core.config import settings
+
+LOCAL_IMAGE_PREFIX = "/static/images/"
+
+_widths = settings.get_image_derivative_widths()
+
+
+def image_variant_url(image_url: str, width: int) -> str:
+    return f"/img/{width}/{image_url[len(LOCAL_IMAGE_PREFIX):]}"
+
+
+def image_srcset(image_url: Optional[str]) -> Optional[str]:
+    """srcset value listing every derivative width, or None for remote/missing images"""
+    if not image_url or not image_url.startswith(LOCAL_IMAGE_PREFIX):
+        return None
+    return ", ".join(f"{image_variant_url(image_url, width)} {width}w" for width in _widths)
@@ -0,0 +1,52 @@
+"""
+Application logging
+
+Loggers under "app" (logging.getLogger(__name__) in any app module) go
+through a QueueHandler, so a request only enqueues the record and a
+background thread writes it to stderr. The level is LOG_LEVEL, and only
+LOG_DEBUG_SAMPLE_RATE of DEBUG records are kept, so per-item debug
+logging stays affordable when it is switched on in production.
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import random
+from app.core.config import settings
+
+
+class DebugSampler(logging.Filter):
+    """Keeps every record above DEBUG and a random fraction of DEBUG ones"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+_listener = None
+
+
+def configure_logging():
+    """Attach the queued, sampled handler to the "app" logger (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    records = queue.SimpleQueue()
+    output = logging.StreamHandler()
+    output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    handler = logging.handlers.QueueHandler(records)
+    handler.addFilter(DebugSampler(settings.LOG_DEBUG_SAMPLE_RATE))
+
+    logger = logging.getLogger("app")
+    logger.setLevel(settings.LOG_LEVEL.upper())
+    logger.addHandler(handler)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(records, output)
+    _listener.start()
+    atexit.register(_listener.stop)
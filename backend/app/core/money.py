@@ -0,0 +1,23 @@
+"""
+Money conversions
+
+Amounts are stored as two-decimal rupees (DECIMAL(10,2)) and computed on
+as integer paise.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+
+def to_paise(amount) -> int:
+    """Rupees (float, str, Decimal or None) to integer paise, rounding half up"""
+    if amount is None:
+        return 0
+    return int((Decimal(str(amount)) * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def to_rupees(paise: int) -> float:
+    return paise / 100
+
+
+def percent_of(paise: int, percent) -> int:
+    """percent% of an amount in paise, rounded half up"""
+    return int((Decimal(paise) * Decimal(str(percent)) / 100).to_integral_value(rounding=ROUND_HALF_UP))
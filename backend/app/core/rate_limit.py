@@ -0,0 +1,80 @@
+"""
+Token-bucket rate limiting
+"""
+import math
+import time
+from collections import OrderedDict
+from typing import Tuple
+from fastapi import HTTPException, Request, status
+from app.core.config import settings
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets refilled at rate_per_minute, holding at most burst tokens"""
+
+    def __init__(self, rate_per_minute: float, burst: int, max_keys: int = 100000):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.rejected = 0
+
+    def _tokens(self, key: str, now: float) -> float:
+        tokens, updated = self._buckets.get(key, (float(self.burst), now))
+        return min(float(self.burst), tokens + (now - updated) * self.rate)
+
+    def wait_time(self, key: str) -> float:
+        """Like hit() but without taking a token"""
+        tokens = self._tokens(key, time.monotonic())
+        if tokens >= 1:
+            return 0.0
+        self.rejected += 1
+        return (1 - tokens) / self.rate
+
+    def hit(self, key: str) -> float:
+        """Take one token; returns 0 if allowed, otherwise seconds until one is available"""
+        now = time.monotonic()
+        tokens = self._tokens(key, now)
+
+        if tokens >= 1:
+            retry_after = 0.0
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / self.rate
+            self.rejected += 1
+
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    def check(self, key: str, consume: bool = True):
+        """Raise 429 with Retry-After when the key is over its limit; consume=False leaves the bucket as is"""
+        retry_after = self.hit(key) if consume else self.wait_time(key)
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts, please try again later",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+
+def client_ip(request: Request) -> str:
+    """Client address, trusting X-Forwarded-For only from configured proxies (e.g. the frontend)"""
+    peer = request.client.host if request.client else ""
+    forwarded = request.headers.get("X-Forwarded-For")
+    if forwarded and peer in settings.get_trusted_proxies():
+        return forwarded.split(",")[0].strip()
+    return peer
+
+
+login_ip_limiter = TokenBucketLimiter(settings.LOGIN_RATE_PER_MINUTE_PER_IP, settings.LOGIN_BURST_PER_IP)
+# Failed logins per (email, client IP): charged only when a password is
+# wrong, so nobody can lock a user out by spending the user's budget
+login_user_limiter = TokenBucketLimiter(settings.LOGIN_RATE_PER_MINUTE_PER_USER, settings.LOGIN_BURST_PER_USER)
+
+
+async def limit_login_by_ip(request: Request):
+    """Dependency: per-IP login rate limit, checked before any bcrypt work"""
+    login_ip_limiter.check(client_ip(request))
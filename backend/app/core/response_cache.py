@@ -0,0 +1,91 @@
+"""
+Precompressed response cache for hot, public JSON endpoints
+
+An entry keeps a payload's serialized JSON, a content-hash ETag and the bytes
+compressed once per encoding (at the highest level, since the work is
+amortized over every hit). Requests get the representation matching
+their Accept-Encoding, or 304 when If-None-Match matches. Entries expire
+after RESPONSE_CACHE_TTL_SECONDS; callers fold a data version (such as
+the catalog snapshot generation) into the key when they have one.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+from fastapi import Request, Response
+from app.core.config import settings
+from app.core.compression import choose_encoding, compress
+from app.core.singleflight import SingleFlight
+
+
+class CachedPayload:
+    """One serialized payload and its compressed encodings"""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = hashlib.sha256(body).hexdigest()[:20]
+        self.encoded: Dict[str, bytes] = {}
+        self.expires = time.monotonic() + settings.RESPONSE_CACHE_TTL_SECONDS
+
+    def representation(self, encoding: Optional[str]):
+        """(body, etag) for an encoding, compressing on first use"""
+        if encoding is None or len(self.body) < settings.COMPRESSION_MINIMUM_SIZE:
+            return self.body, f'"{self.etag}"'
+        if encoding not in self.encoded:
+            self.encoded[encoding] = compress(self.body, encoding, best=True)
+        return self.encoded[encoding], f'"{self.etag}-{encoding}"'
+
+
+class ResponseCache:
+    """LRU of CachedPayloads; misses for the same key are coalesced"""
+
+    def __init__(self, name: str, max_entries: int = None):
+        self.max_entries = settings.RESPONSE_CACHE_SIZE if max_entries is None else max_entries
+        self._entries: "OrderedDict[str, CachedPayload]" = OrderedDict()
+        self._flight = SingleFlight(f"response_cache.{name}")
+        self.hits = 0
+        self.not_modified = 0
+
+    async def _payload(self, key: str, build: Callable[[], Awaitable[bytes]]) -> CachedPayload:
+        payload = self._entries.get(key)
+        if payload is not None and payload.expires > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+        async def fetch():
+            fresh = CachedPayload(await build())
+            if self.max_entries > 0:
+                self._entries[key] = fresh
+                self._entries.move_to_end(key)
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return fresh
+
+        return await self._flight.do(key, fetch)
+
+    async def respond(self, request: Request, key: str, build: Callable[[], Awaitable[bytes]]) -> Response:
+        """Serve the JSON bytes build() returns for key, reusing cached, precompressed copies"""
+        payload = await self._payload(key, build)
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+        body, etag = payload.representation(encoding)
+
+        headers = {
+            "ETag": etag,
+            "Vary": "Accept-Encoding",
+            "Cache-Control": f"public, max-age={int(settings.RESPONSE_CACHE_TTL_SECONDS)}",
+        }
+        if_none_match = request.headers.get("if-none-match", "")
+        if etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        if body is not payload.body:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def invalidate(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "not_modified": self.not_modified}
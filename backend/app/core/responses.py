@@ -0,0 +1,53 @@
+"""
+JSON response rendering
+
+ORJSONResponse is the app's default response class: orjson when it is
+installed, the standard library otherwise. trusted() is for handlers whose
+payload is already validated (models they just built, or rows the schema
+guarantees): returning a Response makes FastAPI skip the response_model
+validation and jsonable_encoder passes and serialize the content once.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, Decimal):
+        return float(value)
+    # Only reached without orjson, which handles these natively
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content (plain data, models, datetimes, NumPy values) to JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def trusted(content: Any, status_code: int = 200, headers: dict = None) -> ORJSONResponse:
+    """Respond with already-validated content, skipping FastAPI's output validation"""
+    return ORJSONResponse(content, status_code=status_code, headers=headers)
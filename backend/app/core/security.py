@@ -1,15 +1,41 @@
 """
 Security utilities for authentication and authorization
 """
+import asyncio
+import hashlib
+import hmac
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Dict, Optional, Tuple
 from jose import JWTError, jwt
 import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.config import settings
 
+try:
+    import jwt as pyjwt  # Optional faster backend (PyJWT)
+except ImportError:
+    pyjwt = None
+
 security = HTTPBearer()
+_optional_bearer = HTTPBearer(auto_error=False)
+
+# bcrypt releases the GIL while hashing, so a small dedicated thread pool
+# keeps the 100-250 ms of CPU per call off the event loop thread
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+_hash_pending = 0
+
+# Verified claims keyed by SHA-256 of the token, kept until the token expires
+_token_cache: "OrderedDict[bytes, Tuple[dict, float]]" = OrderedDict()
+# Revoked token digests and their expiry
+_revoked_tokens: Dict[bytes, float] = {}
+_token_denylist: Optional[Callable[[dict], bool]] = None
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -25,11 +51,39 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     """Hash a password"""
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
 
+async def _run_password_hashing(func, *args):
+    """Run a bcrypt call on the hashing pool, rejecting fast when it is saturated"""
+    global _hash_pending
+    
+    if _hash_pending >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again shortly",
+            headers={"Retry-After": "1"},
+        )
+    
+    _hash_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_pending -= 1
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against a hash on the hashing pool"""
+    return await _run_password_hashing(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the hashing pool"""
+    return await _run_password_hashing(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
@@ -52,17 +106,102 @@ def create_refresh_token(data: dict) -> str:
     return encoded_jwt
 
 
+def _token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+def _decode_claims(token: str) -> dict:
+    """Verify a token with the configured JWT backend"""
+    if settings.JWT_BACKEND == "pyjwt" and pyjwt is not None:
+        try:
+            return pyjwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except pyjwt.PyJWTError as e:
+            raise JWTError(str(e))
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+
+def set_token_denylist(hook: Optional[Callable[[dict], bool]]):
+    """Install a hook that returns True for revoked claims (e.g. a shared denylist)"""
+    global _token_denylist
+    _token_denylist = hook
+
+
+def add_revoked(digest: bytes, exp: float):
+    """Treat the token with this digest as revoked in this process until exp"""
+    _token_cache.pop(digest, None)
+    if exp > time.time():
+        _revoked_tokens[digest] = exp
+
+
+def prune_revoked():
+    """Forget revocations whose tokens have expired anyway"""
+    now = time.time()
+    for revoked, exp in list(_revoked_tokens.items()):
+        if exp <= now:
+            del _revoked_tokens[revoked]
+
+
+def revoke_token(token: str) -> Tuple[bytes, float]:
+    """
+    Revoke a valid token in this process until it expires and return its
+    (digest, exp); app.services.revocations shares it with other workers.
+    Invalid or already revoked tokens raise 401, so they are never recorded.
+    """
+    claims = decode_token(token)
+    # Verified claims: the JWT backends reject a non-numeric exp
+    exp = float(claims.get("exp") or time.time() + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+    digest = _token_digest(token)
+    add_revoked(digest, exp)
+    return digest, exp
+
+
+def _credentials_error() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _is_revoked(digest: bytes, claims: dict) -> bool:
+    exp = _revoked_tokens.get(digest)
+    if exp is not None:
+        if exp > time.time():
+            return True
+        del _revoked_tokens[digest]
+    return _token_denylist is not None and _token_denylist(claims)
+
+
 def decode_token(token: str) -> dict:
-    """Decode and verify JWT token"""
+    """Decode and verify JWT token, reusing verified claims until they expire"""
+    digest = _token_digest(token)
+    
+    cached = _token_cache.get(digest)
+    if cached is not None:
+        claims, exp = cached
+        if exp > time.time():
+            _token_cache.move_to_end(digest)
+            if _is_revoked(digest, claims):
+                raise _credentials_error()
+            # Shared between requests - callers must not mutate it
+            return claims
+        del _token_cache[digest]
+    
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
+        payload = _decode_claims(token)
     except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _credentials_error()
+    
+    if _is_revoked(digest, payload):
+        raise _credentials_error()
+    
+    exp = payload.get("exp")
+    if exp and settings.TOKEN_CACHE_SIZE > 0:
+        _token_cache[digest] = (payload, float(exp))
+        if len(_token_cache) > settings.TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    
+    return payload
 
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
@@ -84,3 +223,19 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         )
     
     return {"user_id": user_id, "email": payload.get("email")}
+
+
+async def require_metrics_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(_optional_bearer)
+):
+    """Allow only callers presenting METRICS_TOKEN; 404 when none is configured"""
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None or not hmac.compare_digest(
+        credentials.credentials.encode(), settings.METRICS_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
@@ -0,0 +1,103 @@
+"""
+Request coalescing (singleflight) for hot read paths
+
+Concurrent identical reads await a single in-flight fetch and share its
+result. An optional micro-cache keeps the result around for a short window
+so a burst of campaign traffic costs one database round trip.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+_registry: List["SingleFlight"] = []
+
+
+def make_key(name: str, **params: Any) -> str:
+    """Build a normalized cache key from an operation name and its parameters"""
+    parts = [f"{k}={'' if v is None else str(v).strip()}" for k, v in sorted(params.items())]
+    return f"{name}?{'&'.join(parts)}"
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share the same key"""
+
+    def __init__(self, name: str, ttl: float = 0.0, max_entries: int = 1024):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+        self.calls = 0
+        self.fetches = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+        _registry.append(self)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the result of fn(), sharing it with concurrent callers of the same key"""
+        self.calls += 1
+
+        if self.ttl > 0:
+            cached = self._cache.get(key)
+            if cached and cached[0] > time.monotonic():
+                self.cache_hits += 1
+                return cached[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.fetches += 1
+            task = asyncio.ensure_future(self._run(key, fn))
+            task.add_done_callback(_consume_exception)
+            self._inflight[key] = task
+        else:
+            self.coalesced += 1
+
+        # Shield so one cancelled caller (e.g. client disconnect) does not
+        # cancel the fetch the other waiters depend on
+        return await asyncio.shield(task)
+
+    async def _run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            result = await fn()
+        finally:
+            self._inflight.pop(key, None)
+
+        if self.ttl > 0:
+            self._store(key, result)
+        return result
+
+    def _store(self, key: str, result: Any):
+        if len(self._cache) >= self.max_entries:
+            now = time.monotonic()
+            for stale in [k for k, (expires, _) in self._cache.items() if expires <= now]:
+                del self._cache[stale]
+            while len(self._cache) >= self.max_entries:
+                del self._cache[next(iter(self._cache))]
+        self._cache[key] = (time.monotonic() + self.ttl, result)
+
+    def invalidate(self, key: str = None):
+        """Drop one micro-cached key, or all of them"""
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "fetches": self.fetches,
+            "coalesced": self.coalesced,
+            "cache_hits": self.cache_hits,
+            "inflight": len(self._inflight),
+        }
+
+
+def _consume_exception(task: asyncio.Future):
+    # Mark the exception as retrieved when every waiter went away
+    if not task.cancelled():
+        task.exception()
+
+
+def singleflight_stats() -> dict:
+    """Counters for every registered singleflight group"""
+    return {group.name: group.stats() for group in _registry}
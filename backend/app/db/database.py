@@ -5,12 +5,15 @@ Supabase database client configuration
 import app.ssl_setup  # noqa: F401
 
 from supabase import create_client, Client
+from supabase.lib.client_options import ClientOptions
 from app.core.config import settings
 
-# Supabase clients - SSL configured via ssl_setup module
-# Note: Timeout is handled at the httpx level in ssl_setup
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
-supabase_admin: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
+# Supabase clients - SSL configured via ssl_setup module. The HTTP timeout
+# matches the executor's, so a slow query frees its worker thread and pool
+# connection instead of running on after execute() has given up on it.
+_options = ClientOptions(postgrest_client_timeout=settings.DB_TIMEOUT_SECONDS)
+supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY, options=_options)
+supabase_admin: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY, options=_options)
 
 
 def get_db() -> Client:
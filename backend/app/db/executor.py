@@ -0,0 +1,217 @@
+"""
+Resilient execution of Supabase queries
+
+Every data-layer call goes through execute(), which provides:
+
+- a per-operation timeout, capped by the remaining request deadline
+- retries with decorrelated jitter for transient transport errors; calls
+  marked non-idempotent are only retried when the request never reached
+  Supabase (connect/pool errors)
+- no retry after the executor's own timeout: the abandoned call keeps its
+  thread until the HTTP client's timeout (also DB_TIMEOUT_SECONDS, see
+  app.db.database) fires, and piling retries on top would exhaust the
+  threadpool while the database is slow
+- a circuit breaker that sheds load while Supabase's error rate is high
+- counters for calls, retries, timeouts and breaker state (see db_stats)
+
+The supabase client is synchronous, so queries run on the threadpool and
+no longer block the event loop.
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+import httpx
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+
+
+class DatabaseTimeoutError(Exception):
+    """The query or the request's deadline budget timed out"""
+
+
+class DatabaseUnavailableError(Exception):
+    """The circuit breaker is open and the call was shed"""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Database temporarily unavailable")
+        self.retry_after = retry_after
+
+
+# Errors raised before the request was sent - always safe to retry
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# Errors where the request may or may not have been applied
+_TRANSIENT_ERRORS = (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError, asyncio.TimeoutError)
+
+_deadline: ContextVar[Optional[float]] = ContextVar("db_request_deadline", default=None)
+
+
+def set_request_deadline(seconds: float):
+    """Start the deadline budget for the current request; returns a reset token"""
+    return _deadline.set(time.monotonic() + seconds)
+
+
+def reset_request_deadline(token):
+    _deadline.reset(token)
+
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left in the current request's deadline, or None without one"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+class CircuitBreaker:
+    """Error-rate circuit breaker over a sliding time window"""
+
+    def __init__(self, window: float, min_calls: int, error_rate: float, cooldown: float):
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._outcomes = deque()
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+
+    def _trim(self, now: float):
+        while self._outcomes and self._outcomes[0][0] < now - self.window:
+            self._outcomes.popleft()
+
+    def before_call(self):
+        """Raise DatabaseUnavailableError if the call should be shed"""
+        if self.state == "closed":
+            return
+
+        now = time.monotonic()
+        if self.state == "open":
+            if now - self.opened_at < self.cooldown:
+                raise DatabaseUnavailableError(self.cooldown - (now - self.opened_at))
+            self.state = "half_open"
+
+        # Half-open: let a single probe through (a probe that never reported
+        # back, e.g. a cancelled request, is replaced after the cooldown)
+        if self._probe_in_flight and now - self._probe_started < self.cooldown:
+            raise DatabaseUnavailableError(self.cooldown)
+        self._probe_in_flight = True
+        self._probe_started = now
+
+    def record(self, ok: bool):
+        now = time.monotonic()
+
+        if self.state == "half_open":
+            self._probe_in_flight = False
+            if ok:
+                self.state = "closed"
+                self._outcomes.clear()
+            else:
+                self._open(now)
+            return
+
+        self._outcomes.append((now, ok))
+        self._trim(now)
+        if len(self._outcomes) >= self.min_calls:
+            failures = sum(1 for _, outcome in self._outcomes if not outcome)
+            if failures / len(self._outcomes) >= self.error_rate:
+                self._open(now)
+
+    def _open(self, now: float):
+        self.state = "open"
+        self.opened_at = now
+        self.times_opened += 1
+        self._outcomes.clear()
+
+    def stats(self) -> dict:
+        self._trim(time.monotonic())
+        return {
+            "state": self.state,
+            "times_opened": self.times_opened,
+            "window_calls": len(self._outcomes),
+            "window_failures": sum(1 for _, ok in self._outcomes if not ok),
+        }
+
+
+breaker = CircuitBreaker(
+    window=settings.DB_BREAKER_WINDOW_SECONDS,
+    min_calls=settings.DB_BREAKER_MIN_CALLS,
+    error_rate=settings.DB_BREAKER_ERROR_RATE,
+    cooldown=settings.DB_BREAKER_COOLDOWN_SECONDS,
+)
+
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+def _count(op: str, counter: str):
+    op_stats = _stats.setdefault(op, {"calls": 0, "retries": 0, "timeouts": 0, "failures": 0, "shed": 0})
+    op_stats[counter] += 1
+
+
+async def execute(query, *, op: str = "query", idempotent: bool = True, timeout: Optional[float] = None) -> Any:
+    """
+    Execute a supabase/postgrest query builder with the shared timeout,
+    retry and circuit breaker policy.
+    """
+    _count(op, "calls")
+    timeout = timeout or settings.DB_TIMEOUT_SECONDS
+    backoff = settings.DB_RETRY_BASE_SECONDS
+    attempt = 0
+
+    while True:
+        budget = remaining_budget()
+        if budget is not None and budget <= 0:
+            _count(op, "timeouts")
+            raise DatabaseTimeoutError(f"{op}: request deadline exceeded")
+
+        try:
+            breaker.before_call()
+        except DatabaseUnavailableError:
+            _count(op, "shed")
+            raise
+
+        try:
+            call_timeout = timeout if budget is None else min(timeout, budget)
+            result = await asyncio.wait_for(run_in_threadpool(query.execute), call_timeout)
+        except _TRANSIENT_ERRORS as e:
+            breaker.record(False)
+            if isinstance(e, (asyncio.TimeoutError, httpx.TimeoutException)):
+                _count(op, "timeouts")
+
+            # asyncio.TimeoutError: the thread is still running the call
+            retryable = (idempotent or isinstance(e, _NOT_SENT_ERRORS)) and not isinstance(e, asyncio.TimeoutError)
+            if not retryable or attempt >= settings.DB_MAX_RETRIES:
+                _count(op, "failures")
+                if isinstance(e, (asyncio.TimeoutError, httpx.TimeoutException)):
+                    raise DatabaseTimeoutError(f"{op}: {e!r}") from e
+                raise
+
+            # Decorrelated jitter, never sleeping past the request deadline
+            backoff = min(settings.DB_RETRY_MAX_SECONDS, random.uniform(settings.DB_RETRY_BASE_SECONDS, backoff * 3))
+            budget = remaining_budget()
+            if budget is not None and budget <= backoff:
+                _count(op, "failures")
+                raise DatabaseTimeoutError(f"{op}: no deadline budget left to retry") from e
+
+            attempt += 1
+            _count(op, "retries")
+            await asyncio.sleep(backoff)
+            continue
+        except Exception:
+            # Application-level errors (constraint violations, bad filters)
+            # mean Supabase is healthy
+            breaker.record(True)
+            _count(op, "failures")
+            raise
+
+        breaker.record(True)
+        return result
+
+
+def db_stats() -> dict:
+    """Per-operation counters plus circuit breaker state"""
+    return {"operations": _stats, "breaker": breaker.stats()}
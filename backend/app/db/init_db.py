@@ -1,8 +1,11 @@
 """
 Database initialization - Creates tables if they don't exist
 """
+import logging
 from app.db.database import get_admin_db
 
+logger = logging.getLogger(__name__)
+
 
 async def init_database():
     """
@@ -123,11 +126,10 @@ async def init_database():
     ON CONFLICT DO NOTHING;
     """
     
-    print("Database initialization SQL schema prepared.")
-    print("\n" + "="*80)
-    print("IMPORTANT: Run the above SQL in your Supabase SQL Editor to create tables.")
-    print("You can find the SQL Editor at: Project Settings > SQL Editor")
-    print("="*80 + "\n")
+    logger.info(
+        "Database schema is not created automatically: run schema.sql in the "
+        "Supabase SQL Editor (Project Settings > SQL Editor)"
+    )
     
     # Note: Supabase requires tables to be created via SQL editor or migrations
     # The actual table creation should be done manually in Supabase dashboard
@@ -0,0 +1,15 @@
+"""
+PostgREST query helpers for what the postgrest client cannot express
+"""
+
+
+def order_desc(query, *columns: str, foreign_table: str = None):
+    """
+    Order a query (or one of its embeds) by several columns, all descending.
+    This postgrest client sends one order parameter per .order() call and
+    PostgREST applies only one of them, so the columns are joined into a
+    single parameter.
+    """
+    key = f"{foreign_table}.order" if foreign_table else "order"
+    query.params = query.params.add(key, ",".join(f"{column}.desc" for column in columns))
+    return query
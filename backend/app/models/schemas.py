@@ -1,9 +1,10 @@
 """
 Pydantic models for request/response validation
 """
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, Field, computed_field
+from typing import Optional, List, Union
 from datetime import datetime, date
+from app.core.images import image_srcset
 
 
 # User Models
@@ -78,7 +79,14 @@ class ProductResponse(ProductBase):
     id: str
     rating: float = 0.0
     review_count: int = 0
+    rating_histogram: List[int] = [0, 0, 0, 0, 0]  # 1-star ... 5-star counts
     created_at: datetime
+    
+    @computed_field
+    @property
+    def image_srcset(self) -> Optional[str]:
+        """Resized WebP variants of image_url for <img srcset>, when it is a local image"""
+        return image_srcset(self.image_url)
 
 
 class ProductList(BaseModel):
@@ -106,6 +114,7 @@ class CartItemResponse(BaseModel):
     price: float
     quantity: int
     subtotal: float
+    promotion: Optional[str] = None
 
 
 class CartResponse(BaseModel):
@@ -113,6 +122,8 @@ class CartResponse(BaseModel):
     total_items: int
     total_price: float
     total_savings: float = 0.0
+    coupon_code: Optional[str] = None
+    coupon_discount: float = 0.0
     final_total: float
 
 
@@ -121,6 +132,7 @@ class OrderCreate(BaseModel):
     address_id: str
     payment_method: str  # cod, online
     items: List[dict]  # Will contain cart items
+    coupon_code: Optional[str] = None
 
 
 class OrderItemResponse(BaseModel):
@@ -145,6 +157,21 @@ class OrderResponse(BaseModel):
     updated_at: datetime
 
 
+class OrderSummary(BaseModel):
+    """An order without its items, for order history lists"""
+    id: str
+    order_number: str
+    status: str
+    total_amount: float
+    item_count: int
+    created_at: datetime
+
+
+class OrderHistory(BaseModel):
+    orders: List[Union[OrderResponse, OrderSummary]]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for older orders
+
+
 # Review Models
 class ReviewCreate(BaseModel):
     product_id: str
@@ -171,3 +198,4 @@ class ReviewList(BaseModel):
     reviews: List[ReviewResponse]
     total: int
     average_rating: float
+    rating_histogram: List[int] = [0, 0, 0, 0, 0]  # 1-star ... 5-star counts
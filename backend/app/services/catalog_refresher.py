@@ -0,0 +1,83 @@
+"""
+Catalog snapshot refresher
+
+Run exactly one of these per host next to the API workers:
+
+    python -m app.services.catalog_refresher            # refresh every CATALOG_SNAPSHOT_REFRESH_SECONDS
+    python -m app.services.catalog_refresher --once     # write a single generation and exit
+
+An exclusive lock on "<CATALOG_SNAPSHOT_PATH>.lock" keeps a second refresher
+from running against the same snapshot file.
+"""
+import argparse
+import fcntl
+import logging
+import sys
+import time
+from app.core.config import settings
+from app.core.catalog_snapshot import read_generation, write_snapshot
+from app.core.log import configure_logging
+from app.db.database import get_admin_db
+
+# Named explicitly: under "python -m" __name__ is "__main__", outside the "app" logger
+logger = logging.getLogger("app.services.catalog_refresher")
+
+# PostgREST caps a single response, so the catalog is read in pages
+FETCH_PAGE_SIZE = 1000
+
+
+def fetch_catalog() -> list:
+    """Read every product row"""
+    db = get_admin_db()
+    rows = []
+    offset = 0
+    while True:
+        result = db.table("products").select("*").order("id").range(
+            offset, offset + FETCH_PAGE_SIZE - 1
+        ).execute()
+        rows.extend(result.data)
+        if len(result.data) < FETCH_PAGE_SIZE:
+            return rows
+        offset += FETCH_PAGE_SIZE
+
+
+def refresh_once(path: str) -> int:
+    """Write the next snapshot generation and return it"""
+    rows = fetch_catalog()
+    generation = read_generation(path) + 1
+    write_snapshot(path, rows, generation)
+    logger.info("Catalog snapshot generation %d written (%d products)", generation, len(rows))
+    return generation
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the shared catalog snapshot")
+    parser.add_argument("--once", action="store_true", help="write one snapshot and exit")
+    parser.add_argument("--interval", type=float, default=settings.CATALOG_SNAPSHOT_REFRESH_SECONDS)
+    args = parser.parse_args()
+    configure_logging()
+
+    path = settings.CATALOG_SNAPSHOT_PATH
+    if not path:
+        sys.exit("CATALOG_SNAPSHOT_PATH is not set")
+
+    lock_file = open(f"{path}.lock", "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        sys.exit("Another catalog refresher is already running")
+
+    while True:
+        try:
+            refresh_once(path)
+        except Exception as e:
+            # Keep serving the previous generation; workers fall back to the
+            # database once it is older than CATALOG_SNAPSHOT_MAX_AGE_SECONDS
+            logger.exception("Catalog snapshot refresh failed")
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Write-coalescing buffer for review "helpful" votes
+
+Votes are accumulated in memory and flushed every
+HELPFUL_VOTE_FLUSH_SECONDS, or sooner once HELPFUL_VOTE_FLUSH_BATCH votes
+are pending. Each flush is a single apply_helpful_votes() call, which
+records the votes and bumps helpful_count by the per-review delta in one
+statement (see migration_review_helpful_votes.sql). Replaying a batch is
+harmless, so failed flushes are simply retried.
+
+Votes still pending at shutdown are flushed. If the database cannot be
+reached, they are spooled to "<HELPFUL_VOTE_SPOOL_PATH>.<pid>" and
+replayed by the next worker that starts; replaying votes twice is harmless.
+At most HELPFUL_VOTE_MAX_PENDING votes are held, counting a batch that is
+being flushed; past that add() raises HelpfulVoteBufferFull, so a database
+outage cannot grow the buffer without bound.
+"""
+import asyncio
+import glob
+import json
+import logging
+import os
+from collections import Counter
+from typing import Callable, Dict, Set, Tuple
+from app.core.config import settings
+from app.db.database import get_db
+from app.db.executor import execute
+
+logger = logging.getLogger(__name__)
+
+
+class HelpfulVoteBufferFull(Exception):
+    """Raised by add() while HELPFUL_VOTE_MAX_PENDING votes are waiting to be flushed"""
+
+
+class HelpfulVoteBuffer:
+    """Pending (review_id, user_id) votes, deduplicated per user"""
+
+    def __init__(self, flush_interval: float, flush_batch: int, spool_path: str, max_pending: int):
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.spool_path = spool_path
+        self.max_pending = max_pending
+        # Insertion-ordered set of pending votes
+        self._pending: Dict[Tuple[str, str], None] = {}
+        # Votes taken out of _pending by a flush that has not finished
+        self._in_flight = 0
+        self._wakeup = None
+        self._task = None
+        self._listeners = []
+        self.accepted = 0
+        self.deduplicated = 0
+        self.rejected = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+
+    def add(self, review_id: str, user_id: str) -> bool:
+        """
+        Queue a vote; returns False if this user's vote is already pending and
+        raises HelpfulVoteBufferFull when the buffer is at max_pending
+        """
+        key = (review_id, user_id)
+        if key in self._pending:
+            self.deduplicated += 1
+            return False
+        if len(self._pending) + self._in_flight >= self.max_pending:
+            self.rejected += 1
+            raise HelpfulVoteBufferFull()
+
+        self._pending[key] = None
+        self.accepted += 1
+        if len(self._pending) >= self.flush_batch and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    def on_flush(self, callback: Callable[[Set[str]], None]):
+        """Call callback(review_ids) after each successful flush"""
+        self._listeners.append(callback)
+
+    def pending_deltas(self) -> Dict[str, int]:
+        """Not-yet-flushed increments per review"""
+        return dict(Counter(review_id for review_id, _ in self._pending))
+
+    async def flush(self):
+        if not self._pending:
+            return
+
+        batch = list(self._pending)
+        self._pending.clear()
+        self._in_flight = len(batch)
+        votes = [{"review_id": review_id, "user_id": user_id} for review_id, user_id in batch]
+
+        try:
+            await execute(
+                get_db().rpc("apply_helpful_votes", {"votes": votes}),
+                op="reviews.apply_helpful_votes"
+            )
+        except Exception as e:
+            # Put the batch back in front of anything queued meanwhile
+            self.failed_flushes += 1
+            self._pending = {**dict.fromkeys(batch), **self._pending}
+            logger.warning("Helpful vote flush failed (%d votes kept): %s", len(batch), e)
+            raise
+        finally:
+            self._in_flight = 0
+
+        self.flushes += 1
+        review_ids = {review_id for review_id, _ in batch}
+        for callback in self._listeners:
+            callback(review_ids)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                await asyncio.sleep(self.flush_interval)
+
+    async def start(self):
+        """Replay spooled votes and start the background flusher"""
+        self._load_spool()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and persist whatever is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        try:
+            await self.flush()
+        except Exception:
+            self._write_spool()
+
+    def _load_spool(self):
+        if not self.spool_path:
+            return
+        for path in glob.glob(f"{glob.escape(self.spool_path)}.*"):
+            if path.endswith(".tmp"):
+                continue
+            try:
+                with open(path) as f:
+                    for review_id, user_id in json.load(f):
+                        self._pending[(review_id, user_id)] = None
+                os.remove(path)
+            except (OSError, ValueError) as e:
+                # Another worker may have replayed and removed it first
+                logger.warning("Could not replay helpful vote spool %s: %s", path, e)
+
+    def _write_spool(self):
+        if not self.spool_path or not self._pending:
+            return
+        path = f"{self.spool_path}.{os.getpid()}"
+        with open(f"{path}.tmp", "w") as f:
+            json.dump([list(key) for key in self._pending], f)
+        os.replace(f"{path}.tmp", path)
+        logger.warning("Spooled %d helpful votes to %s", len(self._pending), path)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "accepted": self.accepted,
+            "deduplicated": self.deduplicated,
+            "rejected": self.rejected,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+        }
+
+
+helpful_votes = HelpfulVoteBuffer(
+    flush_interval=settings.HELPFUL_VOTE_FLUSH_SECONDS,
+    flush_batch=settings.HELPFUL_VOTE_FLUSH_BATCH,
+    spool_path=settings.HELPFUL_VOTE_SPOOL_PATH,
+    max_pending=settings.HELPFUL_VOTE_MAX_PENDING,
+)
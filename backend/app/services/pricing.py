@@ -0,0 +1,113 @@
+"""
+Cart pricing in integer paise
+
+The single place that turns cart rows (cart joined with products) into
+money: unit prices, promotions, line subtotals, coupons, savings and
+totals. Amounts are converted once from the database's two-decimal rupee
+values to integer paise and the whole cart is priced in one vectorized
+pass, so totals are exact and the Razorpay amount, CartResponse and
+order_items.subtotal all agree to the paisa. Rupee values are only
+produced at the edges, for responses and database writes.
+"""
+from datetime import datetime
+from typing import List, Optional
+import numpy as np
+from app.core.money import to_paise, to_rupees
+from app.services.promotions import CouponError, Promotion, PromotionIndex, current_promotions, utc_now
+
+
+class PricedLine:
+    """One cart row with its prices in paise"""
+
+    __slots__ = ("row", "quantity", "list_price", "unit_price", "discount", "subtotal", "savings", "promotion")
+
+    def __init__(
+        self, row: dict, quantity: int, list_price: int, unit_price: int,
+        discount: int, subtotal: int, savings: int, promotion: Optional[Promotion]
+    ):
+        self.row = row
+        self.quantity = quantity
+        self.list_price = list_price
+        self.unit_price = unit_price
+        self.discount = discount
+        self.subtotal = subtotal
+        self.savings = savings
+        self.promotion = promotion
+
+    @property
+    def product(self) -> dict:
+        return self.row["products"]
+
+    def order_item(self) -> dict:
+        """Row for the order_items table"""
+        return {
+            "product_id": self.product["id"],
+            "product_name": self.product["name"],
+            "quantity": self.quantity,
+            "price": to_rupees(self.unit_price),
+            "subtotal": to_rupees(self.subtotal),
+        }
+
+
+class PricedCart:
+    """A priced cart; amounts are in paise"""
+
+    def __init__(self, lines: List[PricedLine], subtotal: int, savings: int, coupon: Optional[Promotion] = None):
+        self.lines = lines
+        self.subtotal = subtotal
+        self.coupon = coupon
+        self.coupon_discount = coupon.cart_discount(subtotal) if coupon else 0
+        self.savings = savings + self.coupon_discount
+        self.total = subtotal - self.coupon_discount
+
+    def __len__(self):
+        return len(self.lines)
+
+    def order_items(self) -> List[dict]:
+        return [line.order_item() for line in self.lines]
+
+
+def price_cart(
+    rows: List[dict],
+    coupon_code: Optional[str] = None,
+    promotions: PromotionIndex = None,
+    now: datetime = None
+) -> PricedCart:
+    """
+    Price cart rows that embed products(id, category, price, discount_price);
+    raises promotions.CouponError for a coupon_code that is not live
+    """
+    promotions = current_promotions() if promotions is None else promotions
+    now = utc_now() if now is None else now
+    count = len(rows)
+
+    list_prices = np.fromiter((to_paise(row["products"]["price"]) for row in rows), dtype=np.int64, count=count)
+    discounts = np.fromiter((to_paise(row["products"]["discount_price"]) for row in rows), dtype=np.int64, count=count)
+    quantities = np.fromiter((row["quantity"] for row in rows), dtype=np.int64, count=count)
+
+    # A discount_price of 0 or NULL means no discount
+    unit_prices = np.where(discounts > 0, discounts, list_prices)
+
+    applied = [None] * count
+    promo_discounts = np.zeros(count, dtype=np.int64)
+    if promotions:
+        for i, (row, unit_price, quantity) in enumerate(zip(rows, unit_prices.tolist(), quantities.tolist())):
+            promo_discounts[i], applied[i] = promotions.best_line_promotion(row["products"], unit_price, quantity, now)
+
+    subtotals = unit_prices * quantities - promo_discounts
+    savings = (list_prices - unit_prices) * quantities + promo_discounts
+
+    lines = [
+        PricedLine(row, *values, promotion)
+        for row, promotion, values in zip(rows, applied, zip(
+            quantities.tolist(), list_prices.tolist(), unit_prices.tolist(),
+            promo_discounts.tolist(), subtotals.tolist(), savings.tolist()
+        ))
+    ]
+    subtotal = int(subtotals.sum())
+    coupon = None
+    if coupon_code:
+        coupon = promotions.coupon(coupon_code, now)
+        if subtotal < coupon.min_subtotal:
+            raise CouponError(f"This coupon needs a cart subtotal of at least ₹{to_rupees(coupon.min_subtotal):.2f}")
+    return PricedCart(lines, subtotal, int(savings.sum()), coupon)
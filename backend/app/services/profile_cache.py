@@ -0,0 +1,130 @@
+"""
+Per-user profile cache
+
+Keeps each user's public profile row (full_name, phone, email, dates) in
+memory so the handlers that need it do not query the users table on every
+call. The cache is populated on login/signup and written through by
+update_profile. Every PROFILE_SYNC_SECONDS, ProfileInvalidator reads the
+users whose updated_at moved and drops their entries, so edits made
+through another worker show up within that interval. Entries also expire
+after PROFILE_CACHE_TTL_SECONDS.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.db.database import get_db
+from app.db.executor import execute
+
+logger = logging.getLogger(__name__)
+
+# Never cached or returned from here
+_PRIVATE_FIELDS = ("password_hash",)
+
+_profiles: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+_profile_flight = SingleFlight("users.profile")
+
+
+def remember_profile(row: dict):
+    """Store (or overwrite) a user's profile from a users table row"""
+    if settings.PROFILE_CACHE_SIZE <= 0 or not row or "id" not in row:
+        return
+
+    profile = {k: v for k, v in row.items() if k not in _PRIVATE_FIELDS}
+    user_id = str(row["id"])
+    _profiles[user_id] = (time.monotonic() + settings.PROFILE_CACHE_TTL_SECONDS, profile)
+    _profiles.move_to_end(user_id)
+    if len(_profiles) > settings.PROFILE_CACHE_SIZE:
+        _profiles.popitem(last=False)
+
+
+def forget_profile(user_id: str):
+    _profiles.pop(str(user_id), None)
+
+
+async def get_user_profile(user_id: str) -> Optional[dict]:
+    """The user's profile, from memory when possible; None if the user does not exist"""
+    cached = _profiles.get(user_id)
+    if cached is not None:
+        expires, profile = cached
+        if expires > time.monotonic():
+            _profiles.move_to_end(user_id)
+            return dict(profile)
+        del _profiles[user_id]
+
+    async def fetch():
+        result = await execute(get_db().table("users").select("*").eq("id", user_id), op="users.get")
+        if not result.data:
+            return None
+        remember_profile(result.data[0])
+        return {k: v for k, v in result.data[0].items() if k not in _PRIVATE_FIELDS}
+
+    profile = await _profile_flight.do(user_id, fetch)
+    return dict(profile) if profile else None
+
+
+class ProfileInvalidator:
+    """Drops cached profiles that were updated through another worker"""
+
+    def __init__(self, interval: float, batch_size: int = 1000):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task = None
+        self._since = None
+        self.invalidated = 0
+        self.failed_checks = 0
+
+    async def check(self):
+        query = get_db().table("users").select("id, updated_at")
+        if self._since is None:
+            # Start from the newest update; earlier ones predate this cache
+            query = query.order("updated_at", desc=True).limit(1)
+        else:
+            # gte: rows sharing the last updated_at are re-read, which is harmless
+            query = query.gte("updated_at", self._since).order("updated_at").limit(self.batch_size)
+        rows = await execute(query, op="users.profile_changes")
+        if not rows.data:
+            return
+
+        for row in rows.data:
+            cached = _profiles.get(str(row["id"]))
+            # The worker that wrote through already holds this version
+            if cached is not None and cached[1].get("updated_at") != row["updated_at"]:
+                forget_profile(row["id"])
+                self.invalidated += 1
+        self._since = rows.data[-1]["updated_at"]
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception:
+                # Entries still expire after PROFILE_CACHE_TTL_SECONDS
+                self.failed_checks += 1
+
+    async def start(self):
+        """Find the current high-water mark and start watching for changes"""
+        try:
+            await self.check()
+        except Exception as e:
+            logger.warning("Profile change check failed: %s", e)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"cached": len(_profiles), "invalidated": self.invalidated, "failed_checks": self.failed_checks}
+
+
+profile_invalidator = ProfileInvalidator(interval=settings.PROFILE_SYNC_SECONDS)
@@ -0,0 +1,206 @@
+"""
+Promotions engine
+
+Rules from the promotions table are compiled into a PromotionIndex keyed
+by product id, category and coupon code, so pricing a cart looks up each
+line's candidates in O(1) and never queries the database. Supported rules:
+
+    percent       value% off the line, by product or category
+    flat          value rupees off each unit, by product or category
+    buy_x_get_y   get_quantity free units for every buy_quantity bought
+    coupons       percent/flat off the cart subtotal, over min_subtotal
+
+Line promotions apply to the price after discount_price; a line gets the
+single best one that is live. Time windows (starts_at/ends_at) are checked
+when pricing, so a rule starts and ends on time without a reload.
+
+Each worker reloads the index in the background when the table changes
+(detected from its row count and latest updated_at), every
+PROMOTIONS_REFRESH_SECONDS.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.money import percent_of, to_paise
+from app.db.database import get_db
+from app.db.executor import execute
+
+logger = logging.getLogger(__name__)
+
+
+class CouponError(ValueError):
+    """A coupon code that does not exist, is not live or does not apply"""
+
+
+def _parse_time(value) -> Optional[datetime]:
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+class Promotion:
+    """One compiled rule; money fields are in paise"""
+
+    __slots__ = (
+        "id", "name", "kind", "value", "flat_off", "buy_quantity", "get_quantity",
+        "min_subtotal", "starts_at", "ends_at",
+    )
+
+    def __init__(self, row: dict):
+        self.id = row["id"]
+        self.name = row["name"]
+        self.kind = row["kind"]
+        self.value = row.get("value") or 0
+        self.flat_off = to_paise(self.value)
+        self.buy_quantity = row.get("buy_quantity") or 0
+        self.get_quantity = row.get("get_quantity") or 0
+        self.min_subtotal = to_paise(row.get("min_subtotal"))
+        self.starts_at = _parse_time(row.get("starts_at"))
+        self.ends_at = _parse_time(row.get("ends_at"))
+
+    def is_live(self, now: datetime) -> bool:
+        return (self.starts_at is None or self.starts_at <= now) and (self.ends_at is None or now < self.ends_at)
+
+    def line_discount(self, unit_price: int, quantity: int) -> int:
+        """Discount in paise on quantity units at unit_price"""
+        if self.kind == "percent":
+            return percent_of(unit_price * quantity, self.value)
+        if self.kind == "flat":
+            return min(self.flat_off, unit_price) * quantity
+        if self.kind == "buy_x_get_y" and self.buy_quantity > 0 and self.get_quantity > 0:
+            free_units = quantity // (self.buy_quantity + self.get_quantity) * self.get_quantity
+            return free_units * unit_price
+        return 0
+
+    def cart_discount(self, subtotal: int) -> int:
+        """Coupon discount in paise on a cart subtotal"""
+        if subtotal < self.min_subtotal:
+            return 0
+        if self.kind == "percent":
+            return percent_of(subtotal, self.value)
+        return min(self.flat_off, subtotal)
+
+
+class PromotionIndex:
+    """Promotions keyed by product id, category and coupon code"""
+
+    def __init__(self, rows: List[dict], version: str = ""):
+        self.version = version
+        self.by_product: Dict[str, List[Promotion]] = {}
+        self.by_category: Dict[str, List[Promotion]] = {}
+        self.coupons: Dict[str, Promotion] = {}
+        for row in rows:
+            try:
+                promotion = Promotion(row)
+            except (KeyError, ValueError) as e:
+                logger.warning("Skipping malformed promotion %s: %s", row.get("id"), e)
+                continue
+            if row.get("coupon_code"):
+                self.coupons[row["coupon_code"].strip().upper()] = promotion
+            elif row.get("product_id"):
+                self.by_product.setdefault(row["product_id"], []).append(promotion)
+            elif row.get("category"):
+                self.by_category.setdefault(row["category"], []).append(promotion)
+
+    def __bool__(self):
+        return bool(self.by_product or self.by_category or self.coupons)
+
+    def best_line_promotion(
+        self, product: dict, unit_price: int, quantity: int, now: datetime
+    ) -> Tuple[int, Optional[Promotion]]:
+        """(discount in paise, promotion) of the best live promotion for a cart line"""
+        best, best_discount = None, 0
+        candidates = self.by_product.get(product["id"], []) + self.by_category.get(product.get("category"), [])
+        for promotion in candidates:
+            if not promotion.is_live(now):
+                continue
+            discount = promotion.line_discount(unit_price, quantity)
+            if discount > best_discount:
+                best, best_discount = promotion, discount
+        return best_discount, best
+
+    def coupon(self, code: str, now: datetime) -> Promotion:
+        """The live coupon for a code; raises CouponError otherwise"""
+        promotion = self.coupons.get(code.strip().upper())
+        if promotion is None or not promotion.is_live(now):
+            raise CouponError("Invalid or expired coupon")
+        return promotion
+
+
+_index = PromotionIndex([])
+
+
+def current_promotions() -> PromotionIndex:
+    return _index
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class PromotionReloader:
+    """Keeps this worker's PromotionIndex in step with the promotions table"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task = None
+        self.reloads = 0
+        self.failed_checks = 0
+
+    async def _version(self) -> str:
+        latest = await execute(
+            get_db().table("promotions").select("updated_at", count="exact").order("updated_at", desc=True).limit(1),
+            op="promotions.latest_update"
+        )
+        return f"{latest.count}:{latest.data[0]['updated_at'] if latest.data else ''}"
+
+    async def refresh(self):
+        """Rebuild the index if the promotions table changed"""
+        global _index
+        version = await self._version()
+        if version == _index.version:
+            return
+        rows = await execute(get_db().table("promotions").select("*").eq("is_active", True), op="promotions.list")
+        _index = PromotionIndex(rows.data, version)
+        self.reloads += 1
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+            except Exception:
+                # Keep pricing with the rules already loaded
+                self.failed_checks += 1
+
+    async def start(self):
+        """Load the rules and start watching for changes"""
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.warning("Promotions not loaded: %s", e)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "version": _index.version,
+            "products": len(_index.by_product),
+            "categories": len(_index.by_category),
+            "coupons": len(_index.coupons),
+            "reloads": self.reloads,
+            "failed_checks": self.failed_checks,
+        }
+
+
+promotion_reloader = PromotionReloader(interval=settings.PROMOTIONS_REFRESH_SECONDS)
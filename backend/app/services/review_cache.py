@@ -0,0 +1,141 @@
+"""
+Per-product review read model
+
+Each entry holds a product's review aggregate (count, average, histogram)
+plus the first REVIEW_CACHE_DEPTH reviews in both "newest" and "helpful"
+order, all fetched in one products query with the reviews embedded twice.
+Reviewer names come from the denormalized reviews.user_name column, so no
+users join is needed. Entries are dropped on review writes in this worker,
+when a helpful-vote flush touches one of their reviews, and otherwise
+expire after REVIEW_CACHE_TTL_SECONDS.
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.db.database import get_db
+from app.db.query import order_desc
+from app.db.executor import execute
+from app.services.counters import helpful_votes
+
+# sort name (also the embed alias) -> columns ordered descending; each
+# ends in id so ties have one order and cached and deep pages line up
+REVIEW_SORTS = {
+    "newest": ("created_at", "id"),
+    "helpful": ("helpful_count", "created_at", "id"),
+}
+
+
+def order_reviews(query, sort: str, foreign_table: str = None):
+    """Apply a REVIEW_SORTS order to a reviews query or embed"""
+    return order_desc(query, *REVIEW_SORTS[sort], foreign_table=foreign_table)
+
+_entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+# Bumped on invalidation so a fetch that raced a write is not stored
+_generations: Dict[str, int] = {}
+# review_id -> product_id for every review held in an entry
+_review_products: Dict[str, str] = {}
+_review_flight = SingleFlight("reviews.read_model")
+
+
+def _aggregate(row: dict) -> dict:
+    review_count = row.get("review_count") or 0
+    return {
+        "total": review_count,
+        "average_rating": round(row["rating_sum"] / review_count, 2) if review_count else 0.0,
+        "rating_histogram": row.get("rating_histogram") or [0, 0, 0, 0, 0],
+    }
+
+
+def _store(product_id: str, entry: dict):
+    if settings.REVIEW_CACHE_SIZE <= 0:
+        return
+
+    _drop(product_id)
+    _entries[product_id] = (time.monotonic() + settings.REVIEW_CACHE_TTL_SECONDS, entry)
+    for sort in REVIEW_SORTS:
+        for review in entry[sort]:
+            _review_products[review["id"]] = product_id
+    if len(_entries) > settings.REVIEW_CACHE_SIZE:
+        _drop(next(iter(_entries)))
+
+
+def _drop(product_id: str):
+    cached = _entries.pop(product_id, None)
+    if cached is None:
+        return
+    for sort in REVIEW_SORTS:
+        for review in cached[1][sort]:
+            _review_products.pop(review["id"], None)
+
+
+def invalidate_product_reviews(product_id: str):
+    """Forget a product's cached reviews after a review write"""
+    product_id = str(product_id)
+    _generations[product_id] = _generations.get(product_id, 0) + 1
+    _drop(product_id)
+
+
+def _on_helpful_flush(review_ids: Iterable[str]):
+    for review_id in review_ids:
+        product_id = _review_products.get(review_id)
+        if product_id is not None:
+            invalidate_product_reviews(product_id)
+
+
+helpful_votes.on_flush(_on_helpful_flush)
+
+
+async def get_review_summary(product_id: str) -> Optional[dict]:
+    """
+    Aggregate plus the top reviews in each sort order, or None if the
+    product does not exist. Reviews are plain dicts with user_name set.
+    """
+    cached = _entries.get(product_id)
+    if cached is not None:
+        expires, entry = cached
+        if expires > time.monotonic():
+            _entries.move_to_end(product_id)
+            return entry
+        _drop(product_id)
+
+    async def fetch():
+        generation = _generations.get(product_id, 0)
+        depth = settings.REVIEW_CACHE_DEPTH
+        embeds = ", ".join(f"{sort}:reviews(*)" for sort in REVIEW_SORTS)
+        query = get_db().table("products").select(
+            f"rating_sum, review_count, rating_histogram, {embeds}"
+        ).eq("id", product_id)
+        for sort in REVIEW_SORTS:
+            query = order_reviews(query, sort, foreign_table=sort).limit(depth, foreign_table=sort)
+
+        result = await execute(query, op="reviews.read_model")
+        if not result.data:
+            return None
+
+        row = result.data[0]
+        entry = _aggregate(row)
+        for sort in REVIEW_SORTS:
+            entry[sort] = row.get(sort) or []
+
+        if _generations.get(product_id, 0) == generation:
+            _store(product_id, entry)
+        return entry
+
+    return await _review_flight.do(product_id, fetch)
+
+
+async def review_exists(review_id: str) -> bool:
+    """Whether a review exists, without a query when a cached entry holds it"""
+    if review_id in _review_products:
+        return True
+    result = await execute(get_db().table("reviews").select("id").eq("id", review_id), op="reviews.exists")
+    return bool(result.data)
+
+
+def review_cache_stats() -> dict:
+    return {
+        "products": len(_entries),
+        "reviews": len(_review_products),
+    }
@@ -0,0 +1,94 @@
+"""
+Token revocations shared between workers
+
+Logging out revokes the token in the serving worker at once and records
+its digest in the revoked_tokens table (see migration_revoked_tokens.sql).
+Every worker polls the table every REVOCATION_SYNC_SECONDS for rows added
+since its last check and adds them to its in-process revocation list, so
+a logged-out token stops working everywhere within that interval, even
+while it sits in another worker's verified-token cache.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from app.core.config import settings
+from app.core.security import add_revoked, prune_revoked, revoke_token
+from app.db.database import get_db
+from app.db.executor import execute
+
+logger = logging.getLogger(__name__)
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+async def revoke(token: str):
+    """Revoke a token here now and in every other worker at their next sync"""
+    digest, exp = revoke_token(token)
+    await execute(
+        get_db().table("revoked_tokens").upsert(
+            {"token_digest": digest.hex(), "expires_at": _iso(exp)},
+            on_conflict="token_digest", ignore_duplicates=True
+        ),
+        op="revoked_tokens.insert"
+    )
+
+
+class RevocationSync:
+    """Copies new revoked_tokens rows into this worker's revocation list"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task = None
+        self._since = None
+        self.synced = 0
+        self.failed_checks = 0
+
+    async def sync(self):
+        prune_revoked()
+        now = datetime.now(timezone.utc).isoformat()
+        query = get_db().table("revoked_tokens").select("token_digest, expires_at, revoked_at").gt("expires_at", now)
+        if self._since:
+            # gte: rows sharing the last revoked_at are re-read, which is harmless
+            query = query.gte("revoked_at", self._since)
+        rows = await execute(query.order("revoked_at"), op="revoked_tokens.sync")
+
+        for row in rows.data:
+            expires_at = datetime.fromisoformat(row["expires_at"].replace("Z", "+00:00")).timestamp()
+            add_revoked(bytes.fromhex(row["token_digest"]), expires_at)
+        if rows.data:
+            self._since = rows.data[-1]["revoked_at"]
+            self.synced += len(rows.data)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sync()
+            except Exception:
+                # Keep the revocations already loaded
+                self.failed_checks += 1
+
+    async def start(self):
+        """Load unexpired revocations and start polling for new ones"""
+        try:
+            await self.sync()
+        except Exception as e:
+            logger.warning("Token revocations not loaded: %s", e)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"synced": self.synced, "failed_checks": self.failed_checks}
+
+
+revocation_sync = RevocationSync(interval=settings.REVOCATION_SYNC_SECONDS)
@@ -0,0 +1,27 @@
+"""
+Shared setup for the standalone benchmark scripts
+
+Lets the scripts import the backend's app package without a .env file.
+Run them from the backend directory, e.g. `python benchmarks/bench_password_hashing.py`.
+"""
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+# The Supabase client only checks that keys are JWT-shaped
+os.environ.setdefault("SUPABASE_KEY", "benchmark.anon.key")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "benchmark.service.key")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
@@ -0,0 +1,79 @@
+"""
+Order detail: the old multi-query plan vs the single embedded select
+
+Needs a real database: reads backend/.env and issues read-only queries for
+one existing order. The old plan is replayed query for query (order, the
+user's phone, items joined to product images); the new one is the select
+get_order now makes.
+
+    cd backend
+    python benchmarks/bench_order_detail.py --order-id <uuid> --user-id <uuid> --iterations 50
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from dotenv import load_dotenv
+
+# Real credentials first; _env only fills in what is still missing
+load_dotenv()
+import _env  # noqa: E402
+
+
+async def old_plan(db, execute, order_id, user_id):
+    await execute(db.table("orders").select("*").eq("id", order_id).eq("user_id", user_id), op="bench.orders.get")
+    await execute(db.table("users").select("phone").eq("id", user_id), op="bench.users.phone")
+    await execute(db.table("order_items").select("*, products(image_url)").eq("order_id", order_id), op="bench.order_items")
+    return 3
+
+
+async def new_plan(db, execute, order_id, user_id):
+    await execute(
+        db.table("orders").select("*, order_items(*, products(image_url))").eq("id", order_id).eq("user_id", user_id),
+        op="bench.orders.get_with_items"
+    )
+    return 1
+
+
+async def measure(plan, args, db, execute):
+    latencies = []
+    round_trips = 0
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        round_trips = await plan(db, execute, args.order_id, args.user_id)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "round_trips": round_trips,
+        "p50_ms": round(_env.percentile(latencies, 50), 2),
+        "p95_ms": round(_env.percentile(latencies, 95), 2),
+        "mean_ms": round(sum(latencies) / len(latencies), 2),
+    }
+
+
+async def run(args):
+    from app.db.database import get_db
+    from app.db.executor import execute
+
+    db = get_db()
+    # Warm the connection pool so neither plan pays for the first connect
+    await new_plan(db, execute, args.order_id, args.user_id)
+
+    report = {
+        "old": await measure(old_plan, args, db, execute),
+        "new": await measure(new_plan, args, db, execute),
+    }
+    report["p50_reduction_pct"] = round(100 * (1 - report["new"]["p50_ms"] / report["old"]["p50_ms"]), 1)
+    print(json.dumps(report, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--order-id", required=True)
+    parser.add_argument("--user-id", required=True)
+    parser.add_argument("--iterations", type=int, default=50)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
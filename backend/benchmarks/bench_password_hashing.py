@@ -0,0 +1,90 @@
+"""
+Login throughput and event-loop impact of bcrypt verification
+
+Runs a burst of concurrent password verifications while a stream of
+lightweight "catalog" requests keeps ticking on the same event loop, once
+with bcrypt called inline (the old behaviour) and once through the bounded
+hashing pool. Prints a JSON report.
+
+    cd backend
+    python benchmarks/bench_password_hashing.py --logins 40 --rounds 12
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import _env  # noqa: F401
+from _env import percentile
+
+
+async def catalog_traffic(stop: asyncio.Event, latencies: list):
+    """Simulated catalog requests: a few ms of awaited I/O each"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.002)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def run(mode: str, logins: int, hashed: str):
+    from fastapi import HTTPException
+    from app.core.security import verify_password, verify_password_async
+
+    async def login_inline():
+        return verify_password("correct horse", hashed)
+
+    async def login_pooled():
+        try:
+            return await verify_password_async("correct horse", hashed)
+        except HTTPException:
+            return None
+
+    login = login_inline if mode == "inline" else login_pooled
+
+    stop = asyncio.Event()
+    latencies = []
+    ticker = asyncio.create_task(catalog_traffic(stop, latencies))
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await ticker
+
+    completed = sum(1 for r in results if r)
+    return {
+        "mode": mode,
+        "logins": logins,
+        "completed": completed,
+        "rejected_503": sum(1 for r in results if r is None),
+        "elapsed_s": round(elapsed, 3),
+        "logins_per_s": round(completed / elapsed, 1),
+        "catalog_requests": len(latencies),
+        "catalog_p50_ms": round(percentile(latencies, 50), 2),
+        "catalog_p99_ms": round(percentile(latencies, 99), 2),
+        "catalog_max_ms": round(max(latencies, default=0.0), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    parser.add_argument("--workers", type=int, default=2, help="hashing pool size")
+    args = parser.parse_args()
+
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+    os.environ["PASSWORD_HASH_QUEUE_SIZE"] = str(args.logins)
+
+    from app.core.security import get_password_hash
+    hashed = get_password_hash("correct horse")
+
+    report = [asyncio.run(run(mode, args.logins, hashed)) for mode in ("inline", "pool")]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
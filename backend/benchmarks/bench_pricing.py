@@ -0,0 +1,70 @@
+"""
+Cart pricing: the old per-row float loop vs pricing.price_cart
+
+Also counts carts where the float total, converted with int(total * 100)
+as the Razorpay amount used to be, is off by a paisa.
+
+    cd backend
+    python benchmarks/bench_pricing.py --iterations 2000
+"""
+import argparse
+import json
+import random
+import timeit
+
+import _env  # noqa: F401
+
+
+def float_total(rows):
+    total = 0.0
+    for item in rows:
+        product = item["products"]
+        price = product["discount_price"] if product["discount_price"] else product["price"]
+        total += price * item["quantity"]
+    return total
+
+
+def random_cart(rng, size):
+    rows = []
+    for i in range(size):
+        price = round(rng.uniform(20, 2000), 2)
+        discount = round(price * rng.uniform(0.6, 0.95), 2) if rng.random() < 0.5 else None
+        rows.append({
+            "id": f"cart-{i}",
+            "quantity": rng.randint(1, 5),
+            "products": {"id": f"product-{i}", "name": f"Product {i}", "price": price, "discount_price": discount},
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--carts", type=int, default=10000, help="random carts for the rounding check")
+    args = parser.parse_args()
+
+    from app.services.pricing import price_cart
+
+    rng = random.Random(42)
+    report = {}
+    for size in (1, 5, 20, 100):
+        rows = random_cart(rng, size)
+        before = timeit.timeit(lambda: float_total(rows), number=args.iterations)
+        after = timeit.timeit(lambda: price_cart(rows), number=args.iterations)
+        report[f"cart_{size}"] = {
+            "float_loop_us": round(before / args.iterations * 1e6, 2),
+            "price_cart_us": round(after / args.iterations * 1e6, 2),
+        }
+
+    off_by_paisa = 0
+    for _ in range(args.carts):
+        rows = random_cart(rng, rng.randint(1, 10))
+        if int(float_total(rows) * 100) != price_cart(rows).total:
+            off_by_paisa += 1
+    report["float_amount_mismatches"] = f"{off_by_paisa}/{args.carts}"
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Response serialization: FastAPI's response_model path vs trusted output
+
+The response_model path re-validates the handler's models against the
+declared type, converts them to JSON-safe data and renders it with the
+standard library. trusted() renders the models once with orjson (or the
+standard library fallback when orjson is not installed).
+
+    cd backend
+    python benchmarks/bench_serialization.py --iterations 500
+"""
+import argparse
+import json
+import timeit
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import _env  # noqa: F401
+
+
+def product_list(count):
+    from app.models.schemas import ProductList, ProductResponse
+
+    now = datetime.now(timezone.utc)
+    products = [
+        ProductResponse(
+            id=str(uuid.uuid4()),
+            name=f"Organic Masala Blend {i}",
+            description="Stone-ground, small-batch spice blend made from sun-dried whole spices. " * 8,
+            category=("Masala", "Whole Spices", "Powders")[i % 3],
+            price=249.0 + i,
+            discount_price=199.0 + i if i % 2 else None,
+            stock=100 + i,
+            unit="grams",
+            image_url=f"/static/images/products/product-{i}.jpg",
+            additional_images=[f"/static/images/products/product-{i}-{j}.jpg" for j in range(4)],
+            rating=4.2,
+            review_count=37,
+            rating_histogram=[1, 2, 4, 10, 20],
+            created_at=now - timedelta(days=i),
+        )
+        for i in range(count)
+    ]
+    return ProductList, ProductList(products=products, total=count * 5, page=1, page_size=count)
+
+
+def cart(count):
+    from app.models.schemas import CartItemResponse, CartResponse
+
+    items = [
+        CartItemResponse(
+            id=str(uuid.uuid4()),
+            product_id=str(uuid.uuid4()),
+            product_name=f"Organic Masala Blend {i}",
+            product_image=f"/static/images/products/product-{i}.jpg",
+            price=199.0 + i,
+            quantity=1 + i % 3,
+            subtotal=(199.0 + i) * (1 + i % 3),
+        )
+        for i in range(count)
+    ]
+    total = sum(item.subtotal for item in items)
+    return CartResponse, CartResponse(items=items, total_items=count, total_price=total, final_total=total)
+
+
+def orders(count, items_per_order=4):
+    from app.models.schemas import OrderResponse
+
+    now = datetime.now(timezone.utc)
+    result = []
+    for i in range(count):
+        items = [
+            {
+                "product_id": str(uuid.uuid4()),
+                "product_name": f"Organic Masala Blend {j}",
+                "product_image": f"/static/images/products/product-{j}.jpg",
+                "quantity": 2,
+                "price": 199.0,
+                "subtotal": 398.0,
+            }
+            for j in range(items_per_order)
+        ]
+        result.append(OrderResponse(
+            id=str(uuid.uuid4()),
+            order_number=f"AO20240101120000{i:06d}",
+            status="delivered",
+            payment_method="online",
+            payment_status="completed",
+            total_amount=398.0 * items_per_order,
+            items=items,
+            shipping_address={
+                "full_name": "Test Customer", "phone": "9876543210", "address_line1": "12 Market Road",
+                "city": "Madurai", "state": "Tamil Nadu", "pincode": "625001",
+            },
+            created_at=now - timedelta(days=i),
+            updated_at=now - timedelta(days=i),
+        ))
+    return List[OrderResponse], result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    from pydantic import BaseModel, TypeAdapter
+    from app.core import responses
+
+    def response_model_path(response_type, content):
+        # What FastAPI does with a returned model: dump, re-validate, serialize, render
+        adapter = TypeAdapter(response_type)
+        if isinstance(content, BaseModel):
+            data = content.model_dump()
+        else:
+            data = [item.model_dump() for item in content]
+        validated = adapter.validate_python(data)
+        return json.dumps(adapter.dump_python(validated, mode="json")).encode("utf-8")
+
+    payloads = {
+        "products_100": product_list(100),
+        "cart_20": cart(20),
+        "orders_50": orders(50),
+    }
+
+    report = {"orjson": responses.orjson is not None}
+    for name, (response_type, content) in payloads.items():
+        before = timeit.timeit(lambda: response_model_path(response_type, content), number=args.iterations)
+        after = timeit.timeit(lambda: responses.dumps(content), number=args.iterations)
+        report[name] = {
+            "bytes": len(responses.dumps(content)),
+            "response_model_us": round(before / args.iterations * 1e6, 1),
+            "trusted_us": round(after / args.iterations * 1e6, 1),
+            "speedup": round(before / after, 2),
+        }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
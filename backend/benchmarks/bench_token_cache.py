@@ -0,0 +1,45 @@
+"""
+Per-request auth overhead: full JWT verification vs the verified-token cache
+
+    cd backend
+    python benchmarks/bench_token_cache.py --iterations 20000
+"""
+import argparse
+import json
+import os
+import timeit
+
+import _env  # noqa: F401
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    from app.core import security
+    from app.core.config import settings
+
+    token = security.create_access_token({"sub": "bench-user", "email": "bench@example.com"})
+    report = {}
+
+    backends = ["jose"] + (["pyjwt"] if security.pyjwt is not None else [])
+    for backend in backends:
+        settings.JWT_BACKEND = backend
+
+        def uncached():
+            security._token_cache.clear()
+            security.decode_token(token)
+
+        seconds = timeit.timeit(uncached, number=args.iterations)
+        report[f"{backend}_uncached_us"] = round(seconds / args.iterations * 1e6, 2)
+
+    security.decode_token(token)
+    seconds = timeit.timeit(lambda: security.decode_token(token), number=args.iterations)
+    report["cached_us"] = round(seconds / args.iterations * 1e6, 2)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""
+In-process stand-in for the Supabase PostgREST client
+
+Implements the part of the query builder the API uses (select with
+embedded resources, eq/neq/lt/gt/ilike/in_ filters, order/limit/range,
+including on embedded resources and multi-column order passed as raw
+params, exact counts, insert/update/delete, and
+the rpc functions from schema.sql) over in-memory tables. Embeds follow
+the schema's naming convention: a <name>_id column on the row points at
+table <name>s, otherwise the embedded table points back with
+<row's table singular>_id.
+
+install() puts it in place of app.db.database, so the backend can be
+imported and exercised without network access. Every execute() sleeps
+latency seconds (blocking, like the real client in the executor's
+threadpool) and is counted in calls/calls_by_table.
+"""
+import copy
+import operator
+import re
+import sys
+import threading
+import time
+import types
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _singular(table: str) -> str:
+    return table[:-1] if table.endswith("s") else table
+
+
+def _ilike(value, pattern) -> bool:
+    if value is None:
+        return False
+    regex = "^" + ".*".join(re.escape(part) for part in pattern.split("%")) + "$"
+    return re.match(regex, str(value), re.IGNORECASE) is not None
+
+
+class Node:
+    """One item of a select list: *, a column, or an embedded resource"""
+
+    def __init__(self, kind: str, name: str, alias: str = None, children=None):
+        self.kind = kind
+        self.name = name
+        self.alias = alias or name
+        self.children = children or []
+
+
+def parse_select(columns: str):
+    """Parse "*, name, alias:table(col, other(*))" into Nodes"""
+    nodes, items = [], []
+    depth = start = 0
+    for i, char in enumerate(columns):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            items.append(columns[start:i])
+            start = i + 1
+    items.append(columns[start:])
+
+    for item in (item.strip() for item in items):
+        if not item:
+            continue
+        alias, rest = None, item
+        if ":" in item.split("(", 1)[0]:
+            alias, rest = (part.strip() for part in item.split(":", 1))
+        if "(" in rest:
+            table, inner = rest.split("(", 1)
+            nodes.append(Node("embed", table.strip(), alias, parse_select(inner[:-1])))
+        elif rest == "*":
+            nodes.append(Node("*", "*"))
+        else:
+            nodes.append(Node("column", rest, alias))
+    return nodes
+
+
+class Response:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class Params:
+    """Raw query parameters (query.params.add); only order is understood"""
+
+    def __init__(self, query: "Query"):
+        self.query = query
+
+    def add(self, key, value):
+        if key != "order" and not key.endswith(".order"):
+            raise NotImplementedError(f"fake PostgREST does not support the {key} parameter")
+        path = key[:-len(".order")] or None
+        for part in value.split(","):
+            column, _, direction = part.partition(".")
+            self.query.orders[path].append((column, direction.startswith("desc")))
+        return self
+
+
+class Query:
+    """Chainable query against one table; execute() runs it"""
+
+    def __init__(self, db: "FakeDatabase", table: str):
+        self.db = db
+        self.table = table
+        self.action = "select"
+        self.columns = "*"
+        self.count = None
+        self.payload = None
+        self.filters = []
+        self.orders = defaultdict(list)
+        self.slices = {}
+        self.params = Params(self)
+
+    # Actions
+    def select(self, *columns, count=None):
+        self.columns = ",".join(columns) or "*"
+        self.count = count
+        return self
+
+    def insert(self, json, **kwargs):
+        self.action, self.payload = "insert", json
+        return self
+
+    def update(self, json, **kwargs):
+        self.action, self.payload = "update", json
+        return self
+
+    def delete(self, **kwargs):
+        self.action = "delete"
+        return self
+
+    # Filters
+    def _filter(self, column, op, value):
+        self.filters.append((column, op, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, operator.eq, value)
+
+    def neq(self, column, value):
+        return self._filter(column, operator.ne, value)
+
+    def lt(self, column, value):
+        return self._filter(column, operator.lt, value)
+
+    def lte(self, column, value):
+        return self._filter(column, operator.le, value)
+
+    def gt(self, column, value):
+        return self._filter(column, operator.gt, value)
+
+    def gte(self, column, value):
+        return self._filter(column, operator.ge, value)
+
+    def in_(self, column, values):
+        return self._filter(column, lambda value, options: value in options, list(values))
+
+    def ilike(self, column, pattern):
+        return self._filter(column, _ilike, pattern)
+
+    # Modifiers
+    def order(self, column, *, desc=False, nullsfirst=False, foreign_table=None):
+        self.orders[foreign_table].append((column, desc))
+        return self
+
+    def limit(self, size, *, foreign_table=None):
+        offset = self.slices.get(foreign_table, (0, None))[0]
+        self.slices[foreign_table] = (offset, size)
+        return self
+
+    def range(self, start, end, foreign_table=None):
+        self.slices[foreign_table] = (start, end - start + 1)
+        return self
+
+    def execute(self):
+        return self.db.run(self.table, self._run)
+
+    # Evaluation (called with the database lock held)
+    def _matches(self, row) -> bool:
+        for column, op, value in self.filters:
+            current = row.get(column)
+            if op is not _ilike and current is None:
+                return False
+            if not op(current, value):
+                return False
+        return True
+
+    def _arrange(self, rows, path):
+        for column, desc in reversed(self.orders.get(path, [])):
+            rows.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+        if path in self.slices:
+            offset, size = self.slices[path]
+            rows = rows[offset:offset + size if size is not None else None]
+        return rows
+
+    def _project(self, table, row, nodes):
+        out = {}
+        for node in nodes:
+            if node.kind == "*":
+                out.update(row)
+            elif node.kind == "column":
+                out[node.alias] = row.get(node.name)
+            else:
+                out[node.alias] = self._embed(table, row, node)
+        return out
+
+    def _embed(self, table, row, node):
+        foreign_key = f"{_singular(node.name)}_id"
+        if foreign_key in row:
+            target = self.db.find(node.name, row[foreign_key])
+            return self._project(node.name, target, node.children) if target else None
+
+        back_key = f"{_singular(table)}_id"
+        children = [child for child in self.db.tables[node.name] if child.get(back_key) == row["id"]]
+        children = self._arrange(children, node.alias)
+        return [self._project(node.name, child, node.children) for child in children]
+
+    def _run(self):
+        rows = self.db.tables[self.table]
+
+        if self.action == "insert":
+            payload = self.payload if isinstance(self.payload, list) else [self.payload]
+            created = [self.db.new_row(self.table, values) for values in payload]
+            rows.extend(created)
+            return Response(copy.deepcopy(created))
+
+        matched = [row for row in rows if self._matches(row)]
+
+        if self.action == "update":
+            for row in matched:
+                row.update(copy.deepcopy(self.payload))
+                if "updated_at" in row:
+                    row["updated_at"] = _now()
+            return Response(copy.deepcopy(matched))
+
+        if self.action == "delete":
+            ids = {id(row) for row in matched}
+            rows[:] = [row for row in rows if id(row) not in ids]
+            return Response(copy.deepcopy(matched))
+
+        count = len(matched) if self.count else None
+        matched = self._arrange(list(matched), None)
+        nodes = parse_select(self.columns)
+        return Response(copy.deepcopy([self._project(self.table, row, nodes) for row in matched]), count)
+
+
+class Rpc:
+    def __init__(self, db: "FakeDatabase", name: str, params: dict):
+        self.db = db
+        self.name = name
+        self.params = params
+
+    def execute(self):
+        function = getattr(self.db, f"rpc_{self.name}")
+        return self.db.run(f"rpc.{self.name}", lambda: Response(function(**self.params)))
+
+
+class FakeDatabase:
+    """In-memory tables plus the client interface (table(), rpc())"""
+
+    # Column defaults the real schema would fill in
+    DEFAULTS = {
+        "products": {"rating": 0.0, "review_count": 0, "rating_sum": 0, "rating_histogram": [0, 0, 0, 0, 0]},
+        "reviews": {"helpful_count": 0, "user_name": ""},
+        "addresses": {"is_default": False},
+        "promotions": {"is_active": True},
+    }
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.tables = defaultdict(list)
+        self.calls = 0
+        self.calls_by_table = Counter()
+        self._lock = threading.Lock()
+
+    def table(self, name: str) -> Query:
+        return Query(self, name)
+
+    def from_(self, name: str) -> Query:
+        return Query(self, name)
+
+    def rpc(self, name: str, params: dict) -> Rpc:
+        return Rpc(self, name, params)
+
+    def run(self, label: str, operation):
+        with self._lock:
+            self.calls += 1
+            self.calls_by_table[label] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            return operation()
+
+    def new_row(self, table: str, values: dict) -> dict:
+        now = _now()
+        row = {"id": str(uuid.uuid4()), "created_at": now, "updated_at": now}
+        row.update(copy.deepcopy(self.DEFAULTS.get(table, {})))
+        row.update(copy.deepcopy(values))
+        return row
+
+    def find(self, table: str, row_id):
+        for row in self.tables[table]:
+            if row["id"] == row_id:
+                return row
+        return None
+
+    def seed(self, table: str, rows):
+        self.tables[table].extend(self.new_row(table, row) for row in rows)
+
+    # schema.sql functions
+    def rpc_decrement_stock(self, product_id, quantity):
+        product = self.find("products", product_id)
+        if product and product["stock"] >= quantity:
+            product["stock"] -= quantity
+        return None
+
+    def rpc_increment_stock(self, product_id, quantity):
+        product = self.find("products", product_id)
+        if product:
+            product["stock"] += quantity
+        return None
+
+    def rpc_cancel_order(self, p_order_id, p_user_id):
+        order = self.find("orders", p_order_id)
+        if order is None or order["user_id"] != p_user_id:
+            return {"result": "not_found", "status": None, "restocked": []}
+        if order["status"] in ("shipped", "delivered", "cancelled"):
+            result = "already_cancelled" if order["status"] == "cancelled" else "not_cancellable"
+            return {"result": result, "status": order["status"], "restocked": []}
+
+        order["status"] = "cancelled"
+        quantities = Counter()
+        for item in self.tables["order_items"]:
+            if item["order_id"] == p_order_id:
+                quantities[item["product_id"]] += item["quantity"]
+        restocked = []
+        for product_id, quantity in quantities.items():
+            product = self.find("products", product_id)
+            if product:
+                product["stock"] += quantity
+                restocked.append({"product_id": product_id, "stock": product["stock"]})
+        return {"result": "cancelled", "status": "cancelled", "restocked": restocked}
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "by_table": dict(self.calls_by_table)}
+
+
+def install(db: FakeDatabase):
+    """Serve app.db.database from db; call before importing the backend"""
+    module = types.ModuleType("app.db.database")
+    module.__doc__ = "Fake Supabase clients (benchmarks/loadtest/fake_postgrest.py)"
+    module.supabase = db
+    module.supabase_admin = db
+    module.get_db = lambda: db
+    module.get_admin_db = lambda: db
+    sys.modules["app.db.database"] = module
+    return module
@@ -0,0 +1,47 @@
+"""
+Offline stand-in for the Razorpay client used by app.api.checkout
+
+Orders get random ids; payment signatures are checked the way Razorpay
+does it (HMAC-SHA256 of "<order_id>|<payment_id>" with the key secret),
+so journeys sign their fake payments with sign().
+"""
+import hashlib
+import hmac
+import time
+import uuid
+
+import razorpay
+
+
+def sign(secret: str, order_id: str, payment_id: str) -> str:
+    return hmac.new(secret.encode(), f"{order_id}|{payment_id}".encode(), hashlib.sha256).hexdigest()
+
+
+class _Orders:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.created = 0
+
+    def create(self, data: dict) -> dict:
+        # Blocking, like the real SDK's HTTP call
+        if self.latency:
+            time.sleep(self.latency)
+        self.created += 1
+        return {"id": f"order_{uuid.uuid4().hex[:14]}", "amount": data["amount"], "currency": data["currency"], "status": "created"}
+
+
+class _Utility:
+    def __init__(self, secret: str):
+        self.secret = secret
+
+    def verify_payment_signature(self, params: dict) -> bool:
+        expected = sign(self.secret, params["razorpay_order_id"] or "", params["razorpay_payment_id"] or "")
+        if not hmac.compare_digest(expected, params["razorpay_signature"] or ""):
+            raise razorpay.errors.SignatureVerificationError("Razorpay Signature Verification Failed")
+        return True
+
+
+class FakeRazorpayClient:
+    def __init__(self, secret: str, latency: float = 0.0):
+        self.order = _Orders(latency)
+        self.utility = _Utility(secret)
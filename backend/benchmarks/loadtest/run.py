@@ -0,0 +1,293 @@
+"""
+Offline load test of the shopper journey
+
+Runs the FastAPI app in process against an in-memory PostgREST stand-in
+(fake_postgrest.py) and a fake Razorpay client (fake_razorpay.py), so it
+needs no database, network or credentials. Each virtual user signs up,
+saves an address, then repeats the journey
+
+    home -> search -> product page -> add to cart -> cart
+         -> Razorpay order -> create order -> order history
+
+Every database call sleeps --db-latency-ms, like a round trip to
+Supabase. The JSON report has journey and per-step p50/p95/p99,
+throughput, and database calls per journey; the run exits 1 when a
+limit in --thresholds is exceeded, so CI can gate on it.
+
+    cd backend
+    python benchmarks/loadtest/run.py --users 20 --journeys 10
+    python benchmarks/loadtest/run.py --users 50 --journeys 20 --catalog-snapshot --output loadtest.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import _env  # noqa: E402
+from fake_postgrest import FakeDatabase, install  # noqa: E402
+from fake_razorpay import FakeRazorpayClient, sign  # noqa: E402
+
+CATEGORIES = ["Fruits", "Vegetables", "Dairy", "Bakery", "Snacks", "Beverages", "Staples", "Spices"]
+SEARCH_TERMS = ["fresh", "organic", "pack", "premium", "classic"]
+STEPS = ["home", "search", "product", "add_to_cart", "cart", "razorpay_order", "create_order", "order_history"]
+
+
+def seed(db: FakeDatabase, product_count: int):
+    rng = random.Random(7)
+    adjectives = ["Fresh", "Organic", "Premium", "Classic", "Farm"]
+    db.seed("products", [
+        {
+            "name": f"{rng.choice(adjectives)} {CATEGORIES[i % len(CATEGORIES)]} item {i}",
+            "description": f"{CATEGORIES[i % len(CATEGORIES)]} pack number {i}",
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "price": round(rng.uniform(20, 900), 2),
+            "discount_price": round(rng.uniform(10, 19), 2) if i % 4 == 0 else None,
+            # Large enough that concurrent checkouts never run out
+            "stock": 10 ** 6,
+            "unit": "pack",
+            "image_url": f"https://cdn.example.com/products/{i}.jpg",
+            "additional_images": [],
+        }
+        for i in range(product_count)
+    ])
+    db.seed("banners", [
+        {
+            "title": f"Banner {i}", "subtitle": None, "image_url": f"https://cdn.example.com/banners/{i}.jpg",
+            "link_url": None, "button_text": "Shop now", "display_order": i, "is_active": True,
+        }
+        for i in range(3)
+    ])
+
+
+class Recorder:
+    """Latency samples and errors per step"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(Counter)
+        self.journeys = []
+        self.failures = 0
+
+    async def step(self, name, call, *args, **kwargs):
+        start = time.perf_counter()
+        response = await call(*args, **kwargs)
+        self.samples[name].append((time.perf_counter() - start) * 1000)
+        if response.status_code >= 400:
+            self.errors[name][response.status_code] += 1
+            raise StepFailed(name, response)
+        return response.json()
+
+
+class StepFailed(Exception):
+    def __init__(self, step, response):
+        super().__init__(f"{step}: HTTP {response.status_code} {response.text[:200]}")
+        self.step = step
+
+
+def latency_summary(samples) -> dict:
+    return {
+        "count": len(samples),
+        "p50_ms": round(_env.percentile(samples, 50), 2),
+        "p95_ms": round(_env.percentile(samples, 95), 2),
+        "p99_ms": round(_env.percentile(samples, 99), 2),
+    }
+
+
+async def sign_up(client, index: int) -> dict:
+    """Create one virtual user with a default address; returns headers and address id"""
+    email = f"loadtest-{index}-{uuid.uuid4().hex[:8]}@example.com"
+    response = await client.post("/api/auth/signup", json={
+        "email": email, "password": "loadtest-password", "full_name": f"Load Test {index}", "phone": "9876543210",
+    })
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    response = await client.post("/api/profile/addresses", headers=headers, json={
+        "address_line1": f"{index} Test Street", "city": "Pune", "state": "Maharashtra", "pincode": "411001", "is_default": True,
+    })
+    response.raise_for_status()
+    return {"headers": headers, "address_id": response.json()["id"]}
+
+
+async def journey(client, user: dict, recorder: Recorder, secret: str, rng: random.Random):
+    headers = user["headers"]
+
+    home = await recorder.step("home", client.get, "/api/pages/home")
+    await recorder.step("search", client.get, "/api/products/", params={"search": rng.choice(SEARCH_TERMS)})
+    product_id = rng.choice(home["products"]["products"])["id"]
+    await recorder.step("product", client.get, f"/api/pages/product/{product_id}")
+    await recorder.step("add_to_cart", client.post, "/api/cart/add", headers=headers, json={
+        "product_id": product_id, "quantity": rng.randint(1, 3),
+    })
+    await recorder.step("cart", client.get, "/api/cart/", headers=headers)
+
+    payment = await recorder.step("razorpay_order", client.post, "/api/checkout/razorpay-order", headers=headers, json={
+        "address_id": user["address_id"],
+    })
+    payment_id = f"pay_{uuid.uuid4().hex[:14]}"
+    await recorder.step("create_order", client.post, "/api/checkout/create-order", headers=headers, json={
+        "address_id": user["address_id"],
+        "payment_method": "online",
+        "payment_details": {
+            "razorpay_order_id": payment["razorpay_order_id"],
+            "razorpay_payment_id": payment_id,
+            "razorpay_signature": sign(secret, payment["razorpay_order_id"], payment_id),
+        },
+    })
+    await recorder.step("order_history", client.get, "/api/orders/", headers=headers, params={"fields": "summary"})
+
+
+async def virtual_user(client, user, recorder, secret, journeys, seed_value):
+    rng = random.Random(seed_value)
+    for _ in range(journeys):
+        start = time.perf_counter()
+        try:
+            await journey(client, user, recorder, secret, rng)
+        except StepFailed:
+            recorder.failures += 1
+            continue
+        recorder.journeys.append((time.perf_counter() - start) * 1000)
+
+
+def check(report: dict, thresholds: dict) -> list:
+    """Human-readable list of the thresholds the report exceeds"""
+    regressions = []
+    limits = [
+        ("journey_p95_ms", report["journey"]["p95_ms"], "max"),
+        ("journey_p99_ms", report["journey"]["p99_ms"], "max"),
+        ("db_calls_per_journey", report["db_calls_per_journey"], "max"),
+        ("error_rate", report["error_rate"], "max"),
+        ("journeys_per_second", report["throughput"]["journeys_per_second"], "min"),
+    ]
+    for name, value, kind in limits:
+        limit = thresholds.get(name)
+        if limit is None:
+            continue
+        if (kind == "max" and value > limit) or (kind == "min" and value < limit):
+            regressions.append(f"{name} {value} {'>' if kind == 'max' else '<'} {limit}")
+    for step, limit in thresholds.get("step_p95_ms", {}).items():
+        value = report["steps"].get(step, {}).get("p95_ms")
+        if value is not None and value > limit:
+            regressions.append(f"{step} p95_ms {value} > {limit}")
+    return regressions
+
+
+async def run(args, fake: FakeDatabase):
+    import httpx
+
+    # Import the app only now, so it binds to the fake database
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main
+        from app.api import checkout
+        from app.core.config import settings
+
+        if settings.CATALOG_SNAPSHOT_PATH:
+            from app.core.catalog_snapshot import write_snapshot
+            write_snapshot(settings.CATALOG_SNAPSHOT_PATH, fake.tables["products"], 1)
+
+        razorpay = FakeRazorpayClient(settings.RAZORPAY_SECRET, latency=args.razorpay_latency_ms / 1000)
+        checkout.razorpay_client = razorpay
+        await main.startup_event()
+
+    transport = httpx.ASGITransport(app=main.app)
+    limits = httpx.Limits(max_connections=None)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", limits=limits, timeout=60) as client:
+            users = await asyncio.gather(*(sign_up(client, i) for i in range(args.users)))
+
+            recorder = Recorder()
+            calls_before = Counter(fake.calls_by_table)
+            start = time.perf_counter()
+            await asyncio.gather(*(
+                virtual_user(client, user, recorder, settings.RAZORPAY_SECRET, args.journeys, seed_value)
+                for seed_value, user in enumerate(users)
+            ))
+            elapsed = time.perf_counter() - start
+    finally:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await main.shutdown_event()
+
+    completed = len(recorder.journeys)
+    attempted = completed + recorder.failures
+    calls = Counter(fake.calls_by_table)
+    calls.subtract(calls_before)
+    attempts = max(attempted, 1)
+
+    report = {
+        "config": {
+            "users": args.users, "journeys_per_user": args.journeys, "products": args.products,
+            "db_latency_ms": args.db_latency_ms, "razorpay_latency_ms": args.razorpay_latency_ms,
+            "catalog_snapshot": args.catalog_snapshot,
+        },
+        "journeys": completed,
+        "failures": recorder.failures,
+        "error_rate": round(recorder.failures / attempts, 4),
+        "errors": {step: dict(codes) for step, codes in recorder.errors.items()},
+        "duration_s": round(elapsed, 2),
+        "throughput": {
+            "journeys_per_second": round(completed / elapsed, 2),
+            "requests_per_second": round(sum(len(s) for s in recorder.samples.values()) / elapsed, 2),
+        },
+        "journey": latency_summary(recorder.journeys),
+        "steps": {step: latency_summary(recorder.samples[step]) for step in STEPS if recorder.samples[step]},
+        "db_calls_per_journey": round(sum(calls.values()) / attempts, 2),
+        "db_calls_by_table_per_journey": {
+            table: round(count / attempts, 2) for table, count in sorted(calls.items()) if count
+        },
+        "razorpay_orders": razorpay.order.created,
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--journeys", type=int, default=10, help="journeys per virtual user")
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--db-latency-ms", type=float, default=2.0)
+    parser.add_argument("--razorpay-latency-ms", type=float, default=0.0)
+    parser.add_argument("--catalog-snapshot", action="store_true", help="serve listings from a catalog snapshot")
+    parser.add_argument("--thresholds", default=os.path.join(HERE, "thresholds.json"))
+    parser.add_argument("--output", help="also write the report to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    # Cheap hashing for signups, no stray spool file, quiet logs
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    os.environ.setdefault("HELPFUL_VOTE_SPOOL_PATH", os.path.join(workdir, "helpful_votes.spool"))
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ["CATALOG_SNAPSHOT_PATH"] = os.path.join(workdir, "catalog.snapshot") if args.catalog_snapshot else ""
+
+    fake = FakeDatabase(latency=args.db_latency_ms / 1000)
+    seed(fake, args.products)
+    install(fake)
+
+    report = asyncio.run(run(args, fake))
+
+    thresholds = {}
+    if args.thresholds and os.path.exists(args.thresholds):
+        with open(args.thresholds) as f:
+            thresholds = json.load(f)
+    report["regressions"] = check(report, thresholds)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    sys.exit(1 if report["regressions"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+"""
+Micro-benchmarks for the CPU-bound hot paths, with stored baselines
+
+Each benchmark times one call over several rounds (loops per round are
+calibrated to --min-time, with GC off, like timeit) and reports min,
+median, mean and stddev in microseconds. Fixtures are sized like
+production: catalogs of 1k-100k products, 50-line carts and 200-order
+histories.
+
+    cd backend
+    python benchmarks/microbench.py list
+    python benchmarks/microbench.py run --save main          # writes benchmarks/baselines/main.json
+    python benchmarks/microbench.py run -k price_cart
+    python benchmarks/microbench.py compare main              # re-runs and compares medians
+    python benchmarks/microbench.py compare main after.json --threshold 0.05
+
+compare exits 1 when a median is more than --threshold slower than the
+baseline. Baselines are only comparable on the same machine and settings
+(BCRYPT_ROUNDS in particular), which are recorded alongside the numbers.
+"""
+import argparse
+import gc
+import hashlib
+import hmac
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import timeit
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import _env  # noqa: F401
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+CATEGORIES = ["Fruits", "Vegetables", "Dairy", "Bakery", "Snacks", "Beverages", "Staples", "Spices"]
+
+# name -> setup(size) returning the zero-argument callable to time
+BENCHMARKS = {}
+
+
+def benchmark(name, sizes=(None,)):
+    """Register setup under name, or name[size] for each size"""
+    def register(setup):
+        for size in sizes:
+            key = name if size is None else f"{name}[{size}]"
+            BENCHMARKS[key] = (setup, size)
+        return setup
+    return register
+
+
+# Fixtures
+
+def make_products(count, seed=1):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    products = []
+    for i in range(count):
+        price = round(rng.uniform(20, 2000), 2)
+        products.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "name": f"Organic product {i}",
+            "description": "Fresh from the farm, packed the same day.",
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "price": price,
+            "discount_price": round(price * rng.uniform(0.6, 0.95), 2) if rng.random() < 0.4 else None,
+            "stock": rng.randint(0, 500),
+            "unit": "pack",
+            "image_url": f"https://cdn.example.com/products/{i}.jpg",
+            "additional_images": [],
+            "rating": round(rng.uniform(0, 5), 1),
+            "review_count": rng.randint(0, 400),
+            "rating_histogram": [rng.randint(0, 80) for _ in range(5)],
+            "created_at": (start + timedelta(minutes=i)).isoformat(),
+        })
+    return products
+
+
+def make_cart(lines, seed=2):
+    rng = random.Random(seed)
+    return [
+        {"id": f"cart-{i}", "quantity": rng.randint(1, 5), "products": product}
+        for i, product in enumerate(make_products(lines, seed))
+    ]
+
+
+def make_orders(count, items_per_order=3, seed=3):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    orders = []
+    for i in range(count):
+        created = (start + timedelta(hours=i)).isoformat()
+        items = []
+        for j in range(items_per_order):
+            price = round(rng.uniform(20, 900), 2)
+            quantity = rng.randint(1, 4)
+            items.append({
+                "product_id": str(uuid.uuid4()), "product_name": f"Product {j}",
+                "product_image": None, "quantity": quantity, "price": price, "subtotal": round(price * quantity, 2),
+            })
+        orders.append({
+            "id": str(uuid.uuid4()), "order_number": f"AO20240101{i:06d}", "status": "delivered",
+            "payment_method": "online", "payment_status": "paid",
+            "total_amount": round(sum(item["subtotal"] for item in items), 2), "items": items,
+            "shipping_address": {"address_line1": "12 Farm Road", "city": "Pune", "state": "Maharashtra", "pincode": "411001"},
+            "created_at": created, "updated_at": created,
+        })
+    return orders
+
+
+# Benchmarks
+
+@benchmark("catalog.price_sort", sizes=(1000, 10000, 100000))
+def bench_price_sort(size):
+    """A price-sorted listing page from the catalog snapshot, as get_products serves it"""
+    from app.core.catalog_snapshot import CatalogSnapshot, write_snapshot
+
+    # The mapping outlives the file, so nothing is left behind in /tmp
+    with tempfile.TemporaryDirectory(prefix="microbench-") as workdir:
+        path = os.path.join(workdir, "catalog.snapshot")
+        write_snapshot(path, make_products(size), 1)
+        snapshot = CatalogSnapshot(path)
+    return lambda: snapshot.query(sort_by="price", offset=0, limit=20)
+
+
+@benchmark("pricing.price_cart", sizes=(50,))
+def bench_price_cart(size):
+    from app.services.pricing import price_cart
+    from app.services.promotions import PromotionIndex
+
+    rows = make_cart(size)
+    promotions = PromotionIndex([])
+    now = datetime.now(timezone.utc)
+    return lambda: price_cart(rows, promotions=promotions, now=now)
+
+
+@benchmark("pricing.price_cart_promotions", sizes=(50,))
+def bench_price_cart_promotions(size):
+    from app.services.pricing import price_cart
+    from app.services.promotions import PromotionIndex
+
+    rows = make_cart(size)
+    promotions = PromotionIndex([
+        {"id": f"promo-{i}", "name": f"{category} week", "kind": "percent", "value": 10, "category": category}
+        for i, category in enumerate(CATEGORIES)
+    ] + [
+        {"id": f"bxgy-{i}", "name": "Buy 2 get 1", "kind": "buy_x_get_y", "buy_quantity": 2, "get_quantity": 1,
+         "product_id": row["products"]["id"]}
+        for i, row in enumerate(rows[::5])
+    ])
+    now = datetime.now(timezone.utc)
+    return lambda: price_cart(rows, promotions=promotions, now=now)
+
+
+@benchmark("checkout.generate_order_number")
+def bench_generate_order_number(size):
+    from app.api.checkout import generate_order_number
+    return generate_order_number
+
+
+@benchmark("checkout.verify_razorpay_signature")
+def bench_verify_razorpay_signature(size):
+    from app.api.checkout import verify_razorpay_signature
+    from app.core.config import settings
+
+    order_id, payment_id = "order_MicroBench0001", "pay_MicroBench0001"
+    signature = hmac.new(
+        settings.RAZORPAY_SECRET.encode(), f"{order_id}|{payment_id}".encode(), hashlib.sha256
+    ).hexdigest()
+    return lambda: verify_razorpay_signature(order_id, payment_id, signature)
+
+
+@benchmark("security.create_access_token")
+def bench_create_access_token(size):
+    from app.core.security import create_access_token
+    claims = {"sub": str(uuid.uuid4()), "email": "bench@example.com"}
+    return lambda: create_access_token(claims)
+
+
+@benchmark("security.decode_token_uncached")
+def bench_decode_token_uncached(size):
+    from app.core import security
+    token = security.create_access_token({"sub": str(uuid.uuid4()), "email": "bench@example.com"})
+
+    def decode():
+        security._token_cache.clear()
+        security.decode_token(token)
+    return decode
+
+
+@benchmark("security.decode_token_cached")
+def bench_decode_token_cached(size):
+    from app.core import security
+    token = security.create_access_token({"sub": str(uuid.uuid4()), "email": "bench@example.com"})
+    security.decode_token(token)
+    return lambda: security.decode_token(token)
+
+
+@benchmark("security.verify_password")
+def bench_verify_password(size):
+    from app.core.security import get_password_hash, verify_password
+    hashed = get_password_hash("microbench-password")
+    return lambda: verify_password("microbench-password", hashed)
+
+
+@benchmark("schemas.product_list_validate", sizes=(100, 1000))
+def bench_product_list_validate(size):
+    from app.models.schemas import ProductList
+    payload = {"products": make_products(size), "total": size, "page": 1, "page_size": size}
+    return lambda: ProductList.model_validate(payload)
+
+
+@benchmark("schemas.product_list_dump_json", sizes=(100, 1000))
+def bench_product_list_dump_json(size):
+    from app.models.schemas import ProductList
+    product_list = ProductList.model_validate(
+        {"products": make_products(size), "total": size, "page": 1, "page_size": size}
+    )
+    return product_list.model_dump_json
+
+
+@benchmark("schemas.order_history_validate", sizes=(200,))
+def bench_order_history_validate(size):
+    from typing import List
+    from pydantic import TypeAdapter
+    from app.models.schemas import OrderResponse
+
+    adapter = TypeAdapter(List[OrderResponse])
+    orders = make_orders(size)
+    return lambda: adapter.validate_python(orders)
+
+
+@benchmark("schemas.order_history_dump_json", sizes=(200,))
+def bench_order_history_dump_json(size):
+    from typing import List
+    from pydantic import TypeAdapter
+    from app.models.schemas import OrderResponse
+
+    adapter = TypeAdapter(List[OrderResponse])
+    orders = adapter.validate_python(make_orders(size))
+    return lambda: adapter.dump_json(orders)
+
+
+# Runner
+
+def measure(func, rounds, min_time) -> dict:
+    """Per-call timings in microseconds over rounds of calibrated loops"""
+    timer = timeit.Timer(func)
+    loops = 1
+    while True:
+        elapsed = timer.timeit(loops)
+        if elapsed >= min_time:
+            break
+        loops *= 10 if elapsed < min_time / 10 else 2
+
+    samples = [elapsed / loops * 1e6]
+    samples += [timer.timeit(loops) / loops * 1e6 for _ in range(rounds - 1)]
+    return {
+        "min_us": round(min(samples), 3),
+        "median_us": round(statistics.median(samples), 3),
+        "mean_us": round(statistics.fmean(samples), 3),
+        "stddev_us": round(statistics.stdev(samples), 3) if len(samples) > 1 else 0.0,
+        "rounds": len(samples),
+        "loops": loops,
+    }
+
+
+def selected(pattern, names=None):
+    names = BENCHMARKS if names is None else [name for name in names if name in BENCHMARKS]
+    return [name for name in names if not pattern or pattern in name]
+
+
+def run_suite(names, rounds, min_time) -> dict:
+    from app.core.config import settings
+
+    results = {}
+    for name in names:
+        setup, size = BENCHMARKS[name]
+        func = setup(size)
+        func()  # warm up caches and lazy imports
+        results[name] = measure(func, rounds, min_time)
+        gc.collect()
+        print(f"{name}: {results[name]['median_us']} us", file=sys.stderr)
+    return {
+        "machine": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+        },
+        "settings": {"bcrypt_rounds": settings.BCRYPT_ROUNDS, "jwt_backend": settings.JWT_BACKEND},
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "benchmarks": results,
+    }
+
+
+def baseline_path(name_or_path: str) -> str:
+    if os.path.exists(name_or_path):
+        return name_or_path
+    return os.path.join(BASELINE_DIR, f"{name_or_path}.json")
+
+
+def load(name_or_path: str) -> dict:
+    with open(baseline_path(name_or_path)) as f:
+        return json.load(f)
+
+
+def save(report: dict, name_or_path: str) -> str:
+    path = name_or_path if name_or_path.endswith(".json") else os.path.join(BASELINE_DIR, f"{name_or_path}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+    return path
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> dict:
+    """Median change per benchmark present in both reports"""
+    results, regressions, improvements = {}, [], []
+    for name, before in baseline["benchmarks"].items():
+        after = current["benchmarks"].get(name)
+        if after is None:
+            continue
+        change = after["median_us"] / before["median_us"] - 1 if before["median_us"] else 0.0
+        status = "unchanged"
+        if change > threshold:
+            status = "regression"
+            regressions.append(name)
+        elif change < -threshold:
+            status = "improvement"
+            improvements.append(name)
+        results[name] = {
+            "baseline_us": before["median_us"],
+            "current_us": after["median_us"],
+            "change_pct": round(change * 100, 1),
+            "status": status,
+        }
+    notes = []
+    if baseline.get("settings") != current.get("settings"):
+        notes.append(f"settings differ: baseline {baseline.get('settings')}, current {current.get('settings')}")
+    if baseline.get("machine") != current.get("machine"):
+        notes.append("machine differs from the baseline's; absolute times are not comparable")
+    return {
+        "threshold_pct": round(threshold * 100, 1),
+        "results": results,
+        "regressions": regressions,
+        "improvements": improvements,
+        "notes": notes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="list benchmark names")
+
+    run_parser = commands.add_parser("run", help="run benchmarks and print the report")
+    compare_parser = commands.add_parser("compare", help="compare a run against a baseline")
+    compare_parser.add_argument("baseline", help="baseline name (benchmarks/baselines/<name>.json) or path")
+    compare_parser.add_argument("current", nargs="?", help="report to compare; runs the suite when omitted")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="allowed median slowdown (0.10 = 10%%)")
+    for sub in (run_parser, compare_parser):
+        sub.add_argument("-k", "--filter", help="only benchmarks whose name contains this")
+        sub.add_argument("--rounds", type=int, default=7)
+        sub.add_argument("--min-time", type=float, default=0.1, help="seconds per round")
+    run_parser.add_argument("--save", help="baseline name or .json path to write the report to")
+
+    args = parser.parse_args()
+
+    if args.command == "list":
+        print("\n".join(BENCHMARKS))
+        return
+
+    if args.command == "run":
+        report = run_suite(selected(args.filter), args.rounds, args.min_time)
+        if args.save:
+            print(f"Saved {save(report, args.save)}", file=sys.stderr)
+        print(json.dumps(report, indent=2))
+        return
+
+    baseline = load(args.baseline)
+    if args.current:
+        current = load(args.current)
+    else:
+        current = run_suite(selected(args.filter, list(baseline["benchmarks"])), args.rounds, args.min_time)
+    result = compare(baseline, current, args.threshold)
+    print(json.dumps(result, indent=2))
+    sys.exit(1 if result["regressions"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,18 +2,43 @@
 Agam Organics - FastAPI Backend
 Main application entry point
 """
-from fastapi import FastAPI
+import math
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.core.config import settings
-from app.api import auth, products, cart, orders, profile, reviews, banners, checkout
+from app.core.log import configure_logging
+from app.api import auth, products, cart, orders, profile, reviews, banners, checkout, pages
 from app.db.init_db import init_database
+from app.core.singleflight import singleflight_stats
+from app.core.catalog_snapshot import get_catalog_snapshot
+from app.core.admission import AdmissionControlMiddleware, controller as admission_controller
+from app.core.compression import CompressionMiddleware
+from app.core.responses import ORJSONResponse
+from app.core.rate_limit import login_ip_limiter, login_user_limiter
+from app.core.security import require_metrics_token
+from app.services.counters import helpful_votes
+from app.services.revocations import revocation_sync
+from app.services.review_cache import review_cache_stats
+from app.services.promotions import promotion_reloader
+from app.services.profile_cache import profile_invalidator
+from app.db.executor import (
+    DatabaseTimeoutError, DatabaseUnavailableError,
+    set_request_deadline, reset_request_deadline, db_stats
+)
+
+configure_logging()
 
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
-    description="E-commerce API for organic masala products"
+    description="E-commerce API for organic masala products",
+    default_response_class=ORJSONResponse
 )
 
+# Admission control (added first so CORS wraps its rejections)
+app.add_middleware(AdmissionControlMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -23,6 +48,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def request_deadline(request: Request, call_next):
+    """Give every request a deadline budget shared by its database calls"""
+    budget = settings.REQUEST_DEADLINE_SECONDS
+    # Callers (e.g. the frontend) may ask for a tighter budget
+    requested = request.headers.get("X-Request-Timeout")
+    if requested:
+        try:
+            budget = min(budget, max(float(requested), 0.0))
+        except ValueError:
+            pass
+    
+    token = set_request_deadline(budget)
+    try:
+        return await call_next(request)
+    finally:
+        reset_request_deadline(token)
+
+
+# Compression, added last so it is outermost and error, CORS and deadline
+# responses are compressed too
+app.add_middleware(CompressionMiddleware)
+
+
+@app.exception_handler(DatabaseTimeoutError)
+async def database_timeout_handler(request: Request, exc: DatabaseTimeoutError):
+    return JSONResponse(
+        status_code=504,
+        content={"detail": "Database operation timed out. Please try again."}
+    )
+
+
+@app.exception_handler(DatabaseUnavailableError)
+async def database_unavailable_handler(request: Request, exc: DatabaseUnavailableError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service temporarily unavailable. Please try again."},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+    )
+
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(products.router, prefix="/api/products", tags=["Products"])
@@ -32,12 +99,26 @@ app.include_router(profile.router, prefix="/api/profile", tags=["Profile"])
 app.include_router(reviews.router, prefix="/api/reviews", tags=["Reviews"])
 app.include_router(banners.router, prefix="/api/banners", tags=["Banners"])
 app.include_router(checkout.router, prefix="/api/checkout", tags=["Checkout"])
+app.include_router(pages.router, prefix="/api/pages", tags=["Pages"])
 
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on startup"""
     await init_database()
+    await helpful_votes.start()
+    await promotion_reloader.start()
+    await revocation_sync.start()
+    await profile_invalidator.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush buffered writes before exiting"""
+    await helpful_votes.stop()
+    await promotion_reloader.stop()
+    await revocation_sync.stop()
+    await profile_invalidator.stop()
 
 
 @app.get("/")
@@ -54,3 +135,31 @@ async def root():
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": settings.APP_NAME}
+
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_token)], include_in_schema=False)
+async def metrics():
+    """Internal performance counters (Authorization: Bearer <METRICS_TOKEN>)"""
+    snapshot = get_catalog_snapshot()
+    return {
+        "singleflight": singleflight_stats(),
+        "database": db_stats(),
+        "admission": admission_controller.stats(),
+        "helpful_votes": helpful_votes.stats(),
+        "review_cache": review_cache_stats(),
+        "promotions": promotion_reloader.stats(),
+        "revocations": revocation_sync.stats(),
+        "profiles": profile_invalidator.stats(),
+        "response_cache": {
+            "products": products.listing_cache.stats(),
+            "banners": banners.listing_cache.stats(),
+        },
+        "rate_limits": {
+            "login_ip_rejected": login_ip_limiter.rejected,
+            "login_user_rejected": login_user_limiter.rejected,
+        },
+        "catalog_snapshot": {
+            "generation": snapshot.generation if snapshot else None,
+            "products": snapshot.row_count if snapshot else 0,
+        },
+    }
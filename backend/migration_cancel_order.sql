@@ -0,0 +1,54 @@
+-- Migration: cancel_order function
+-- Cancels an order and restores its stock in one transaction. The status
+-- guard in the UPDATE takes the order's row lock, so of two concurrent
+-- calls (a double click) only one restores stock; the other sees the
+-- order already cancelled.
+-- Run this in Supabase SQL Editor
+
+CREATE OR REPLACE FUNCTION cancel_order(p_order_id UUID, p_user_id UUID)
+RETURNS JSONB AS $$
+DECLARE
+    current_status TEXT;
+    restocked JSONB;
+BEGIN
+    UPDATE public.orders
+    SET status = 'cancelled'
+    WHERE id = p_order_id
+      AND user_id = p_user_id
+      AND status NOT IN ('shipped', 'delivered', 'cancelled');
+
+    IF NOT FOUND THEN
+        SELECT status INTO current_status
+        FROM public.orders
+        WHERE id = p_order_id AND user_id = p_user_id;
+
+        RETURN jsonb_build_object(
+            'result', CASE
+                WHEN current_status IS NULL THEN 'not_found'
+                WHEN current_status = 'cancelled' THEN 'already_cancelled'
+                ELSE 'not_cancellable'
+            END,
+            'status', current_status,
+            'restocked', '[]'::jsonb
+        );
+    END IF;
+
+    WITH restock AS (
+        SELECT product_id, SUM(quantity) AS quantity
+        FROM public.order_items
+        WHERE order_id = p_order_id
+        GROUP BY product_id
+    ), updated AS (
+        UPDATE public.products p
+        SET stock = p.stock + r.quantity
+        FROM restock r
+        WHERE p.id = r.product_id
+        RETURNING p.id, p.stock
+    )
+    SELECT COALESCE(jsonb_agg(jsonb_build_object('product_id', id, 'stock', stock)), '[]'::jsonb)
+    INTO restocked
+    FROM updated;
+
+    RETURN jsonb_build_object('result', 'cancelled', 'status', 'cancelled', 'restocked', restocked);
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,18 @@
+-- Migration: Checkout quotes
+-- /api/checkout/razorpay-order records the priced cart (amount charged,
+-- coupon and order items) under the Razorpay order id. create-order builds
+-- the order from it, so the stored total always equals the amount paid.
+-- Run this in Supabase SQL Editor
+
+CREATE TABLE IF NOT EXISTS public.checkout_quotes (
+    razorpay_order_id TEXT PRIMARY KEY,
+    user_id UUID NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
+    coupon_code TEXT,
+    amount_paise BIGINT NOT NULL CHECK (amount_paise >= 0),
+    items JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Quotes are only read while the payment is in progress; run periodically
+-- (e.g. with pg_cron) to keep the table small:
+-- DELETE FROM public.checkout_quotes WHERE created_at < NOW() - INTERVAL '7 days';
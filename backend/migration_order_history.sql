@@ -0,0 +1,8 @@
+-- Migration: Order history pagination
+-- Order history is read newest first, one page at a time per user, with
+-- each order's items embedded in the same request.
+-- Run this in Supabase SQL Editor
+
+DROP INDEX IF EXISTS idx_orders_user_created;
+CREATE INDEX IF NOT EXISTS idx_orders_user_created_id ON public.orders(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_order_items_order ON public.order_items(order_id);
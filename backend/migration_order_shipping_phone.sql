@@ -0,0 +1,12 @@
+-- Migration: Snapshot the contact phone into orders.shipping_address
+-- New orders store the account phone in shipping_address when the address
+-- has none, so the order page no longer looks it up. This fills it in for
+-- orders placed before that change.
+-- Run this in Supabase SQL Editor
+
+UPDATE public.orders o
+SET shipping_address = o.shipping_address || jsonb_build_object('phone', u.phone)
+FROM public.users u
+WHERE u.id = o.user_id
+  AND u.phone IS NOT NULL
+  AND COALESCE(o.shipping_address->>'phone', '') = '';
@@ -0,0 +1,6 @@
+-- Migration: Profile cache sync
+-- Each API worker polls for users whose updated_at moved since its last
+-- check and drops their cached profiles; this index keeps the poll cheap.
+-- Run this in Supabase SQL Editor
+
+CREATE INDEX IF NOT EXISTS idx_users_updated ON public.users(updated_at);
@@ -0,0 +1,41 @@
+-- Migration: Promotions
+-- Category/product discounts, buy-X-get-Y offers and cart coupons, each
+-- with an optional time window. API workers compile the active rows into
+-- an in-memory index and reload it when updated_at or the row count changes.
+-- Run this in Supabase SQL Editor
+
+CREATE TABLE IF NOT EXISTS public.promotions (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL CHECK (kind IN ('percent', 'flat', 'buy_x_get_y')),
+    -- Exactly one target: a product, a category, or (for coupons) the cart
+    product_id UUID REFERENCES public.products(id) ON DELETE CASCADE,
+    category TEXT,
+    coupon_code TEXT UNIQUE,
+    -- Percent off for 'percent', rupees off (per unit, or per cart for coupons) for 'flat'
+    value DECIMAL(10,2) NOT NULL DEFAULT 0 CHECK (value >= 0),
+    buy_quantity INTEGER CHECK (buy_quantity > 0),
+    get_quantity INTEGER CHECK (get_quantity > 0),
+    min_subtotal DECIMAL(10,2) NOT NULL DEFAULT 0,
+    starts_at TIMESTAMP WITH TIME ZONE,
+    ends_at TIMESTAMP WITH TIME ZONE,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    CHECK (num_nonnulls(product_id, category, coupon_code) = 1),
+    CHECK (kind <> 'percent' OR value <= 100),
+    CHECK (kind <> 'buy_x_get_y' OR (buy_quantity IS NOT NULL AND get_quantity IS NOT NULL AND coupon_code IS NULL)),
+    CHECK (starts_at IS NULL OR ends_at IS NULL OR starts_at < ends_at)
+);
+
+-- Used by the workers' change check
+CREATE INDEX IF NOT EXISTS idx_promotions_updated ON public.promotions(updated_at DESC);
+
+DROP TRIGGER IF EXISTS update_promotions_updated_at ON public.promotions;
+CREATE TRIGGER update_promotions_updated_at
+    BEFORE UPDATE ON public.promotions
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Example rules (inactive until switched on):
+-- INSERT INTO public.promotions (name, kind, category, value, is_active) VALUES ('Masala week', 'percent', 'Masala', 15, FALSE);
+-- INSERT INTO public.promotions (name, kind, coupon_code, value, min_subtotal, is_active) VALUES ('WELCOME100', 'flat', 'WELCOME100', 100, 499, FALSE);
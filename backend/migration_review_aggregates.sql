@@ -0,0 +1,68 @@
+-- Migration: Incremental review aggregates on products
+-- Keeps rating_sum, review_count, rating and a 1-5 star histogram on each
+-- product, maintained by a trigger in the same statement as the review
+-- insert/update/delete, so no code path has to rescan reviews.
+-- Run this in Supabase SQL Editor
+
+ALTER TABLE public.products ADD COLUMN IF NOT EXISTS rating_sum INTEGER NOT NULL DEFAULT 0;
+-- rating_histogram[1] counts 1-star reviews ... rating_histogram[5] counts 5-star reviews
+ALTER TABLE public.products ADD COLUMN IF NOT EXISTS rating_histogram INTEGER[] NOT NULL DEFAULT '{0,0,0,0,0}';
+
+CREATE OR REPLACE FUNCTION apply_review_aggregate()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Right-hand sides see the row before this UPDATE, so review_count and
+    -- rating_sum below are the old values
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE public.products
+        SET rating_sum = rating_sum - OLD.rating,
+            review_count = review_count - 1,
+            rating_histogram[OLD.rating] = rating_histogram[OLD.rating] - 1,
+            rating = CASE WHEN review_count > 1
+                          THEN ROUND((rating_sum - OLD.rating)::NUMERIC / (review_count - 1), 2)
+                          ELSE 0 END
+        WHERE id = OLD.product_id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE public.products
+        SET rating_sum = rating_sum + NEW.rating,
+            review_count = review_count + 1,
+            rating_histogram[NEW.rating] = rating_histogram[NEW.rating] + 1,
+            rating = ROUND((rating_sum + NEW.rating)::NUMERIC / (review_count + 1), 2)
+        WHERE id = NEW.product_id;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS reviews_aggregate ON public.reviews;
+CREATE TRIGGER reviews_aggregate
+    AFTER INSERT OR DELETE OR UPDATE OF rating, product_id ON public.reviews
+    FOR EACH ROW EXECUTE FUNCTION apply_review_aggregate();
+
+-- Backfill aggregates from existing reviews
+UPDATE public.products
+SET rating_sum = 0, review_count = 0, rating = 0, rating_histogram = '{0,0,0,0,0}';
+
+UPDATE public.products p
+SET rating_sum = a.rating_sum,
+    review_count = a.review_count,
+    rating = ROUND(a.rating_sum::NUMERIC / a.review_count, 2),
+    rating_histogram = a.rating_histogram
+FROM (
+    SELECT product_id,
+           SUM(rating) AS rating_sum,
+           COUNT(*) AS review_count,
+           ARRAY[
+               COUNT(*) FILTER (WHERE rating = 1),
+               COUNT(*) FILTER (WHERE rating = 2),
+               COUNT(*) FILTER (WHERE rating = 3),
+               COUNT(*) FILTER (WHERE rating = 4),
+               COUNT(*) FILTER (WHERE rating = 5)
+           ]::INTEGER[] AS rating_histogram
+    FROM public.reviews
+    GROUP BY product_id
+) a
+WHERE p.id = a.product_id;
@@ -0,0 +1,47 @@
+-- Migration: Deduplicated, batched "helpful" votes on reviews
+-- The API buffers votes in memory and applies them in batches through
+-- apply_helpful_votes(), one statement per batch instead of a read and a
+-- write per click. The primary key gives each user at most one vote per review.
+-- Run this in Supabase SQL Editor
+
+ALTER TABLE public.reviews ADD COLUMN IF NOT EXISTS helpful_count INTEGER DEFAULT 0;
+
+CREATE TABLE IF NOT EXISTS public.review_helpful_votes (
+    review_id UUID NOT NULL REFERENCES public.reviews(id) ON DELETE CASCADE,
+    user_id UUID NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (review_id, user_id)
+);
+
+-- votes: [{"review_id": "...", "user_id": "..."}, ...]
+-- Safe to replay: votes that were already applied are ignored
+CREATE OR REPLACE FUNCTION apply_helpful_votes(votes JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    applied INTEGER;
+BEGIN
+    WITH incoming AS (
+        SELECT DISTINCT (v->>'review_id')::UUID AS review_id, (v->>'user_id')::UUID AS user_id
+        FROM jsonb_array_elements(votes) AS v
+    ), inserted AS (
+        INSERT INTO public.review_helpful_votes (review_id, user_id)
+        SELECT i.review_id, i.user_id
+        FROM incoming i
+        JOIN public.reviews r ON r.id = i.review_id
+        JOIN public.users u ON u.id = i.user_id
+        ON CONFLICT DO NOTHING
+        RETURNING review_id
+    ), deltas AS (
+        SELECT review_id, COUNT(*) AS delta
+        FROM inserted
+        GROUP BY review_id
+    )
+    UPDATE public.reviews r
+    SET helpful_count = r.helpful_count + d.delta
+    FROM deltas d
+    WHERE r.id = d.review_id;
+
+    GET DIAGNOSTICS applied = ROW_COUNT;
+    RETURN applied;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,33 @@
+-- Migration: Review read model
+-- Stores the reviewer's name on each review so review pages are served
+-- without joining users, and indexes the two orders the product page uses.
+-- Run this in Supabase SQL Editor
+
+ALTER TABLE public.reviews ADD COLUMN IF NOT EXISTS user_name TEXT NOT NULL DEFAULT '';
+
+UPDATE public.reviews r
+SET user_name = COALESCE(u.full_name, '')
+FROM public.users u
+WHERE u.id = r.user_id AND r.user_name = '';
+
+-- Ties are broken by created_at, then id, so pages never overlap
+DROP INDEX IF EXISTS idx_reviews_product_created;
+DROP INDEX IF EXISTS idx_reviews_product_helpful;
+CREATE INDEX IF NOT EXISTS idx_reviews_product_created_id ON public.reviews(product_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_reviews_product_helpful_created_id ON public.reviews(product_id, helpful_count DESC, created_at DESC, id DESC);
+
+-- Keep user_name in step with profile name changes
+CREATE OR REPLACE FUNCTION sync_review_user_name()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE public.reviews SET user_name = COALESCE(NEW.full_name, '') WHERE user_id = NEW.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS users_sync_review_user_name ON public.users;
+CREATE TRIGGER users_sync_review_user_name
+    AFTER UPDATE OF full_name ON public.users
+    FOR EACH ROW
+    WHEN (OLD.full_name IS DISTINCT FROM NEW.full_name)
+    EXECUTE FUNCTION sync_review_user_name();
@@ -0,0 +1,17 @@
+-- Migration: Shared token revocations
+-- Logout records the revoked token's SHA-256 digest here; every API worker
+-- polls for new rows so the token stops working in all of them.
+-- Run this in Supabase SQL Editor
+
+CREATE TABLE IF NOT EXISTS public.revoked_tokens (
+    token_digest TEXT PRIMARY KEY,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    revoked_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+-- Used by the workers' incremental sync
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_revoked ON public.revoked_tokens(revoked_at);
+
+-- Rows are only needed until the token would have expired anyway; run
+-- periodically (e.g. with pg_cron) to keep the table small:
+-- DELETE FROM public.revoked_tokens WHERE expires_at < NOW();
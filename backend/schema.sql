@@ -55,6 +55,8 @@ CREATE TABLE IF NOT EXISTS public.products (
     image_url TEXT NOT NULL,
     rating DECIMAL(3,2) DEFAULT 0.0,
     review_count INTEGER DEFAULT 0,
+    rating_sum INTEGER NOT NULL DEFAULT 0,
+    rating_histogram INTEGER[] NOT NULL DEFAULT '{0,0,0,0,0}',
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
@@ -101,6 +103,8 @@ CREATE TABLE IF NOT EXISTS public.reviews (
     product_id UUID NOT NULL REFERENCES public.products(id),
     rating INTEGER NOT NULL CHECK (rating >= 1 AND rating <= 5),
     comment TEXT,
+    user_name TEXT NOT NULL DEFAULT '',
+    helpful_count INTEGER DEFAULT 0,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     UNIQUE(user_id, product_id)
@@ -120,14 +124,43 @@ CREATE TABLE IF NOT EXISTS public.banners (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Promotions (see migration_promotions.sql)
+CREATE TABLE IF NOT EXISTS public.promotions (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL CHECK (kind IN ('percent', 'flat', 'buy_x_get_y')),
+    product_id UUID REFERENCES public.products(id) ON DELETE CASCADE,
+    category TEXT,
+    coupon_code TEXT UNIQUE,
+    value DECIMAL(10,2) NOT NULL DEFAULT 0 CHECK (value >= 0),
+    buy_quantity INTEGER CHECK (buy_quantity > 0),
+    get_quantity INTEGER CHECK (get_quantity > 0),
+    min_subtotal DECIMAL(10,2) NOT NULL DEFAULT 0,
+    starts_at TIMESTAMP WITH TIME ZONE,
+    ends_at TIMESTAMP WITH TIME ZONE,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    CHECK (num_nonnulls(product_id, category, coupon_code) = 1),
+    CHECK (kind <> 'percent' OR value <= 100),
+    CHECK (kind <> 'buy_x_get_y' OR (buy_quantity IS NOT NULL AND get_quantity IS NOT NULL AND coupon_code IS NULL)),
+    CHECK (starts_at IS NULL OR ends_at IS NULL OR starts_at < ends_at)
+);
+
 -- Create indexes for better performance
+CREATE INDEX IF NOT EXISTS idx_users_updated ON public.users(updated_at);
 CREATE INDEX IF NOT EXISTS idx_products_category ON public.products(category);
 CREATE INDEX IF NOT EXISTS idx_products_rating ON public.products(rating DESC);
 CREATE INDEX IF NOT EXISTS idx_cart_user ON public.cart(user_id);
 CREATE INDEX IF NOT EXISTS idx_orders_user ON public.orders(user_id);
+CREATE INDEX IF NOT EXISTS idx_orders_user_created_id ON public.orders(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_order_items_order ON public.order_items(order_id);
 CREATE INDEX IF NOT EXISTS idx_orders_status ON public.orders(status);
 CREATE INDEX IF NOT EXISTS idx_reviews_product ON public.reviews(product_id);
+CREATE INDEX IF NOT EXISTS idx_reviews_product_created_id ON public.reviews(product_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_reviews_product_helpful_created_id ON public.reviews(product_id, helpful_count DESC, created_at DESC, id DESC);
 CREATE INDEX IF NOT EXISTS idx_banners_active_order ON public.banners(is_active, display_order);
+CREATE INDEX IF NOT EXISTS idx_promotions_updated ON public.promotions(updated_at DESC);
 
 -- Add triggers for updated_at
 CREATE TRIGGER update_users_updated_at 
@@ -158,6 +191,10 @@ CREATE TRIGGER update_banners_updated_at
     BEFORE UPDATE ON public.banners
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+CREATE TRIGGER update_promotions_updated_at 
+    BEFORE UPDATE ON public.promotions
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
 -- RPC functions for stock management
 CREATE OR REPLACE FUNCTION decrement_stock(product_id UUID, quantity INTEGER)
 RETURNS VOID AS $$
@@ -177,6 +214,162 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Cancels an order and restores its stock atomically (see migration_cancel_order.sql)
+CREATE OR REPLACE FUNCTION cancel_order(p_order_id UUID, p_user_id UUID)
+RETURNS JSONB AS $$
+DECLARE
+    current_status TEXT;
+    restocked JSONB;
+BEGIN
+    UPDATE public.orders
+    SET status = 'cancelled'
+    WHERE id = p_order_id
+      AND user_id = p_user_id
+      AND status NOT IN ('shipped', 'delivered', 'cancelled');
+
+    IF NOT FOUND THEN
+        SELECT status INTO current_status
+        FROM public.orders
+        WHERE id = p_order_id AND user_id = p_user_id;
+
+        RETURN jsonb_build_object(
+            'result', CASE
+                WHEN current_status IS NULL THEN 'not_found'
+                WHEN current_status = 'cancelled' THEN 'already_cancelled'
+                ELSE 'not_cancellable'
+            END,
+            'status', current_status,
+            'restocked', '[]'::jsonb
+        );
+    END IF;
+
+    WITH restock AS (
+        SELECT product_id, SUM(quantity) AS quantity
+        FROM public.order_items
+        WHERE order_id = p_order_id
+        GROUP BY product_id
+    ), updated AS (
+        UPDATE public.products p
+        SET stock = p.stock + r.quantity
+        FROM restock r
+        WHERE p.id = r.product_id
+        RETURNING p.id, p.stock
+    )
+    SELECT COALESCE(jsonb_agg(jsonb_build_object('product_id', id, 'stock', stock)), '[]'::jsonb)
+    INTO restocked
+    FROM updated;
+
+    RETURN jsonb_build_object('result', 'cancelled', 'status', 'cancelled', 'restocked', restocked);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Review aggregates (rating_sum, review_count, rating, rating_histogram) are
+-- maintained incrementally; see migration_review_aggregates.sql
+CREATE OR REPLACE FUNCTION apply_review_aggregate()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE public.products
+        SET rating_sum = rating_sum - OLD.rating,
+            review_count = review_count - 1,
+            rating_histogram[OLD.rating] = rating_histogram[OLD.rating] - 1,
+            rating = CASE WHEN review_count > 1
+                          THEN ROUND((rating_sum - OLD.rating)::NUMERIC / (review_count - 1), 2)
+                          ELSE 0 END
+        WHERE id = OLD.product_id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE public.products
+        SET rating_sum = rating_sum + NEW.rating,
+            review_count = review_count + 1,
+            rating_histogram[NEW.rating] = rating_histogram[NEW.rating] + 1,
+            rating = ROUND((rating_sum + NEW.rating)::NUMERIC / (review_count + 1), 2)
+        WHERE id = NEW.product_id;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER reviews_aggregate
+    AFTER INSERT OR DELETE OR UPDATE OF rating, product_id ON public.reviews
+    FOR EACH ROW EXECUTE FUNCTION apply_review_aggregate();
+
+-- Keep user_name in step with profile name changes
+CREATE OR REPLACE FUNCTION sync_review_user_name()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE public.reviews SET user_name = COALESCE(NEW.full_name, '') WHERE user_id = NEW.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER users_sync_review_user_name
+    AFTER UPDATE OF full_name ON public.users
+    FOR EACH ROW
+    WHEN (OLD.full_name IS DISTINCT FROM NEW.full_name)
+    EXECUTE FUNCTION sync_review_user_name();
+
+-- One helpful vote per user per review, applied in batches by the API
+CREATE TABLE IF NOT EXISTS public.review_helpful_votes (
+    review_id UUID NOT NULL REFERENCES public.reviews(id) ON DELETE CASCADE,
+    user_id UUID NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (review_id, user_id)
+);
+
+-- votes: [{"review_id": "...", "user_id": "..."}, ...]
+-- Safe to replay: votes that were already applied are ignored
+CREATE OR REPLACE FUNCTION apply_helpful_votes(votes JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    applied INTEGER;
+BEGIN
+    WITH incoming AS (
+        SELECT DISTINCT (v->>'review_id')::UUID AS review_id, (v->>'user_id')::UUID AS user_id
+        FROM jsonb_array_elements(votes) AS v
+    ), inserted AS (
+        INSERT INTO public.review_helpful_votes (review_id, user_id)
+        SELECT i.review_id, i.user_id
+        FROM incoming i
+        JOIN public.reviews r ON r.id = i.review_id
+        JOIN public.users u ON u.id = i.user_id
+        ON CONFLICT DO NOTHING
+        RETURNING review_id
+    ), deltas AS (
+        SELECT review_id, COUNT(*) AS delta
+        FROM inserted
+        GROUP BY review_id
+    )
+    UPDATE public.reviews r
+    SET helpful_count = r.helpful_count + d.delta
+    FROM deltas d
+    WHERE r.id = d.review_id;
+
+    GET DIAGNOSTICS applied = ROW_COUNT;
+    RETURN applied;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Revoked access tokens, shared by the API workers (see migration_revoked_tokens.sql)
+CREATE TABLE IF NOT EXISTS public.revoked_tokens (
+    token_digest TEXT PRIMARY KEY,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    revoked_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_revoked ON public.revoked_tokens(revoked_at);
+
+-- Priced carts behind Razorpay orders (see migration_checkout_quotes.sql)
+CREATE TABLE IF NOT EXISTS public.checkout_quotes (
+    razorpay_order_id TEXT PRIMARY KEY,
+    user_id UUID NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
+    coupon_code TEXT,
+    amount_paise BIGINT NOT NULL CHECK (amount_paise >= 0),
+    items JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
 -- Enable Row Level Security (RLS)
 ALTER TABLE public.users ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.addresses ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,13 @@
+"""
+Lets the tests import the backend's app package without a .env file
+(the Supabase client only checks that keys are JWT-shaped)
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "test.anon.key")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "test.service.key")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
@@ -0,0 +1,113 @@
+"""
+Invariants of cart pricing over randomized carts, promotions and coupons
+"""
+import random
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.money import to_paise, to_rupees
+from app.services.pricing import price_cart
+from app.services.promotions import CouponError, PromotionIndex
+
+NOW = datetime(2025, 6, 1, tzinfo=timezone.utc)
+CATEGORIES = ["Fruits", "Vegetables", "Dairy", "Bakery"]
+SEEDS = range(200)
+
+
+def random_cart(rng):
+    rows = []
+    for i in range(rng.randint(1, 50)):
+        price = rng.randint(100, 500000) / 100
+        discount = rng.randint(1, int(price * 100)) / 100 if rng.random() < 0.4 else rng.choice([None, 0])
+        rows.append({
+            "id": f"cart-{i}",
+            "quantity": rng.randint(1, 10),
+            "products": {
+                "id": f"product-{i}", "name": f"Product {i}", "category": rng.choice(CATEGORIES),
+                "price": price, "discount_price": discount,
+            },
+        })
+    return rows
+
+
+def random_promotions(rng, rows):
+    promotions = []
+    for i in range(rng.randint(0, 8)):
+        rule = {"id": f"promo-{i}", "name": f"Promo {i}"}
+        kind = rng.choice(["percent", "flat", "buy_x_get_y"])
+        if kind == "percent":
+            rule.update(kind=kind, value=rng.randint(1, 100))
+        elif kind == "flat":
+            rule.update(kind=kind, value=rng.randint(1, 50000) / 100)
+        else:
+            rule.update(kind=kind, buy_quantity=rng.randint(1, 3), get_quantity=rng.randint(1, 2))
+        if rng.random() < 0.5:
+            rule["product_id"] = rng.choice(rows)["products"]["id"]
+        else:
+            rule["category"] = rng.choice(CATEGORIES)
+        promotions.append(rule)
+    # The promotions table only allows percent values up to 100
+    kind = rng.choice(["percent", "flat"])
+    promotions.append({
+        "id": "coupon", "name": "Coupon", "coupon_code": "SAVE", "kind": kind,
+        "value": rng.randint(1, 100) if kind == "percent" else rng.randint(1, 100000) / 100,
+        "min_subtotal": rng.choice([None, 0, 100, 1000]),
+    })
+    return PromotionIndex(promotions)
+
+
+def priced(seed):
+    rng = random.Random(seed)
+    rows = random_cart(rng)
+    promotions = random_promotions(rng, rows)
+    coupon_code = "save" if rng.random() < 0.5 else None
+    try:
+        return price_cart(rows, coupon_code, promotions=promotions, now=NOW)
+    except CouponError:
+        return price_cart(rows, promotions=promotions, now=NOW)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_paise_round_trip(seed):
+    rng = random.Random(seed)
+    for _ in range(1000):
+        paise = rng.randint(0, 10 ** 9)
+        assert to_paise(to_rupees(paise)) == paise
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_subtotal_is_sum_of_lines(seed):
+    cart = priced(seed)
+    assert cart.subtotal == sum(line.subtotal for line in cart.lines)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_total_is_subtotal_less_coupon(seed):
+    cart = priced(seed)
+    assert 0 <= cart.coupon_discount <= cart.subtotal
+    assert cart.total == cart.subtotal - cart.coupon_discount
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_savings_never_negative(seed):
+    cart = priced(seed)
+    assert cart.savings >= 0
+    assert all(line.savings >= 0 and line.subtotal >= 0 for line in cart.lines)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_order_items_add_up_to_subtotal(seed):
+    cart = priced(seed)
+    assert sum(to_paise(item["subtotal"]) for item in cart.order_items()) == cart.subtotal
+
+
+def test_coupon_below_min_subtotal_is_rejected():
+    rows = [{"id": "cart-0", "quantity": 1, "products": {
+        "id": "product-0", "name": "Product", "category": "Fruits", "price": 50.0, "discount_price": None,
+    }}]
+    promotions = PromotionIndex([{
+        "id": "coupon", "name": "Coupon", "coupon_code": "BIG", "kind": "flat", "value": 10, "min_subtotal": 100,
+    }])
+    with pytest.raises(CouponError):
+        price_cart(rows, "BIG", promotions=promotions, now=NOW)
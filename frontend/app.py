@@ -1,19 +1,41 @@
 """
 Agam Organics - Flask Frontend Application
 """
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, flash
+from flask import Flask, Response, render_template, request, redirect, url_for, session, jsonify, flash
 from functools import wraps
-import requests
+import logging
 import os
+import random
+import re
 from dotenv import load_dotenv
+from backend_client import (
+    api_call, gather, stream_body, HOP_BY_HOP_HEADERS, PROXY_FORWARDED_HEADERS, PROXY_DROPPED_RESPONSE_HEADERS
+)
+from page_cache import cached_page, cached_fragment, render_fragment, skip_page_cache
+from assets import assets, asset_urls
+from image_derivatives import images, image_srcset
+from compression import compress_response
 
 load_dotenv()
 
 app = Flask(__name__)
 app.secret_key = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
 
-# Backend API URL
-BACKEND_URL = os.getenv('BACKEND_URL', 'http://localhost:8000')
+# Leveled logging; only LOG_DEBUG_SAMPLE_RATE of DEBUG records are kept
+DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', '0.01'))
+app.logger.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+app.logger.addFilter(lambda record: record.levelno > logging.DEBUG or random.random() < DEBUG_SAMPLE_RATE)
+
+# Fingerprinted CSS/JS bundles (see build_assets.py)
+app.register_blueprint(assets)
+app.jinja_env.globals['asset_urls'] = asset_urls
+
+# Resized WebP images at /img/<width>/ (see image_derivatives.py)
+app.register_blueprint(images)
+app.jinja_env.globals['image_srcset'] = image_srcset
+
+# gzip/brotli for rendered pages (see compression.py)
+app.after_request(compress_response)
 
 
 # Helper Functions
@@ -36,19 +58,9 @@ def login_required(f):
     return decorated_function
 
 
-def api_call(method, endpoint, **kwargs):
-    """Make API call to backend"""
-    url = f"{BACKEND_URL}{endpoint}"
-    try:
-        response = requests.request(method, url, **kwargs)
-        return response
-    except Exception as e:
-        print(f"API Error: {e}")
-        return None
-
-
 # Routes
 @app.route('/')
+@cached_page
 def home():
     """Home page with product listing"""
     # Get query parameters for filtering and sorting
@@ -69,67 +81,70 @@ def home():
     if search:
         params['search'] = search
     
-    # Build query string
-    query_string = '&'.join([f"{k}={v}" for k, v in params.items()])
-    response = api_call('GET', f'/api/products?{query_string}')
-    
-    products = []
-    categories = []
-    banners = []
+    # Rendered fragments are shared by every visitor with the same view of the catalog
+    grid_key = (tuple(sorted(params.items())), 'access_token' in session)
+    banner_carousel = cached_fragment('partials/banner_carousel.html')
+    category_chips = cached_fragment('partials/category_chips.html', category)
+    product_grid = cached_fragment('partials/product_grid.html', *grid_key)
     
-    if response and response.status_code == 200:
-        data = response.json()
-        products = data.get('products', [])
-    
-    # Fetch categories
-    cat_response = api_call('GET', '/api/products/categories')
-    if cat_response and cat_response.status_code == 200:
-        categories = cat_response.json().get('categories', [])
-    
-    # Fetch banners
-    banner_response = api_call('GET', '/api/banners')
-    if banner_response and banner_response.status_code == 200:
-        banners = banner_response.json()
+    if banner_carousel is None or category_chips is None or product_grid is None:
+        # Products, categories and banners in one call
+        response = api_call('GET', '/api/pages/home', params=params)
+        
+        products = []
+        categories = []
+        banners = []
+        
+        fetched = bool(response and response.status_code == 200)
+        if fetched:
+            data = response.json()
+            products = data['products'].get('products', [])
+            categories = data.get('categories', [])
+            banners = data.get('banners', [])
+        else:
+            skip_page_cache()
+        
+        banner_carousel = render_fragment('partials/banner_carousel.html', cache=fetched, banners=banners)
+        category_chips = render_fragment(
+            'partials/category_chips.html', category, cache=fetched,
+            categories=categories, selected_category=category
+        )
+        product_grid = render_fragment('partials/product_grid.html', *grid_key, cache=fetched, products=products)
     
     return render_template(
         'home.html', 
-        products=products, 
-        categories=categories,
-        banners=banners,
+        banner_carousel=banner_carousel,
+        category_chips=category_chips,
+        product_grid=product_grid,
         selected_category=category,
         selected_sort=sort_by
     )
 
 
 @app.route('/product/<product_id>')
+@cached_page
 def product_detail(product_id):
     """Product detail page"""
-    # Get product details
-    product_response = api_call('GET', f'/api/products/{product_id}')
+    # Page 1 of reviews in either order is served from the backend's review cache
+    review_sort = request.args.get('review_sort', 'newest')
+    if review_sort not in ('newest', 'helpful'):
+        review_sort = 'newest'
     
-    if not product_response or product_response.status_code != 200:
+    # Product, similar products and reviews in one call
+    response = api_call('GET', f'/api/pages/product/{product_id}', params={'review_sort': review_sort})
+    
+    if not response or response.status_code != 200:
         flash('Product not found', 'error')
         return redirect(url_for('home'))
     
-    product = product_response.json()
-    
-    # Get similar products
-    similar_response = api_call('GET', f'/api/products/similar/{product_id}')
-    similar_products = []
-    if similar_response and similar_response.status_code == 200:
-        similar_products = similar_response.json().get('products', [])
-    
-    # Get reviews
-    reviews_response = api_call('GET', f'/api/reviews/{product_id}')
-    reviews_data = {'reviews': [], 'total': 0, 'average_rating': 0.0}
-    if reviews_response and reviews_response.status_code == 200:
-        reviews_data = reviews_response.json()
+    data = response.json()
     
     return render_template(
         'product_detail.html',
-        product=product,
-        similar_products=similar_products,
-        reviews=reviews_data
+        product=data['product'],
+        similar_products=data.get('similar_products', []),
+        reviews=data['reviews'],
+        review_sort=review_sort
     )
 
 
@@ -151,8 +166,12 @@ def cart():
 @login_required
 def checkout():
     """Checkout page"""
-    # Get cart
-    cart_response = api_call('GET', '/api/cart', headers=get_headers())
+    # Get cart and addresses concurrently
+    headers = get_headers()
+    cart_response, addresses_response = gather(
+        ('GET', '/api/cart', {'headers': headers}),
+        ('GET', '/api/profile/addresses', {'headers': headers})
+    )
     
     if not cart_response or cart_response.status_code != 200:
         flash('Error loading cart', 'error')
@@ -164,8 +183,6 @@ def checkout():
         flash('Your cart is empty', 'error')
         return redirect(url_for('home'))
     
-    # Get addresses
-    addresses_response = api_call('GET', '/api/profile/addresses', headers=get_headers())
     addresses = []
     if addresses_response and addresses_response.status_code == 200:
         addresses = addresses_response.json()
@@ -177,29 +194,24 @@ def checkout():
 @login_required
 def order_details(order_id):
     """Order details page"""
-    print(f"[DEBUG] Fetching order details for order_id: {order_id}")
-    print(f"[DEBUG] Headers: {get_headers()}")
-    
     response = api_call('GET', f'/api/orders/{order_id}', headers=get_headers())
     
-    print(f"[DEBUG] Response status: {response.status_code if response else 'None'}")
     if response and response.status_code != 200:
+        app.logger.info('Order %s lookup failed with status %s', order_id, response.status_code)
         try:
             error_data = response.json()
-            print(f"[DEBUG] Error response: {error_data}")
             flash(f"Order error: {error_data.get('detail', 'Order not found')}", 'error')
-        except:
-            print(f"[DEBUG] Response text: {response.text if response else 'None'}")
+        except ValueError:
             flash('Order not found', 'error')
         return redirect(url_for('profile'))
     
     if not response:
-        print("[DEBUG] No response from backend")
+        app.logger.warning('Order %s lookup got no response from backend', order_id)
         flash('Unable to connect to server', 'error')
         return redirect(url_for('profile'))
     
     order = response.json()
-    print(f"[DEBUG] Order data received: {order.get('order_number', 'N/A')}")
+    app.logger.debug('Order %s loaded with %d items', order_id, len(order.get('items', [])))
     return render_template('order_details.html', order=order)
 
 
@@ -207,28 +219,28 @@ def order_details(order_id):
 @login_required
 def profile():
     """User profile page"""
-    # Get user profile
-    profile_response = api_call('GET', '/api/profile', headers=get_headers())
+    # Profile, addresses and a page of order summaries in one call
+    orders_cursor = request.args.get('orders_cursor')
+    response = api_call(
+        'GET', '/api/pages/profile',
+        params={'orders_cursor': orders_cursor} if orders_cursor else None,
+        headers=get_headers()
+    )
     
-    if not profile_response or profile_response.status_code != 200:
+    if not response or response.status_code != 200:
         flash('Error loading profile', 'error')
         return redirect(url_for('home'))
     
-    user_profile = profile_response.json()
-    
-    # Get addresses
-    addresses_response = api_call('GET', '/api/profile/addresses', headers=get_headers())
-    addresses = []
-    if addresses_response and addresses_response.status_code == 200:
-        addresses = addresses_response.json()
+    data = response.json()
     
-    # Get orders
-    orders_response = api_call('GET', '/api/orders', headers=get_headers())
-    orders = []
-    if orders_response and orders_response.status_code == 200:
-        orders = orders_response.json()
-    
-    return render_template('profile.html', user=user_profile, addresses=addresses, orders=orders)
+    return render_template(
+        'profile.html',
+        user=data['user'],
+        addresses=data['addresses'],
+        orders=data['orders'],
+        orders_next_cursor=data.get('orders_next_cursor'),
+        orders_paged=bool(orders_cursor)
+    )
 
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -238,10 +250,11 @@ def login():
         email = request.form.get('email')
         password = request.form.get('password')
         
+        # Forward the visitor's address so the backend rate-limits per client
         response = api_call('POST', '/api/auth/login', json={
             'email': email,
             'password': password
-        })
+        }, headers={'X-Forwarded-For': request.remote_addr or ''})
         
         if response and response.status_code == 200:
             data = response.json()
@@ -290,18 +303,22 @@ def signup():
 @app.route('/logout')
 def logout():
     """Logout"""
+    if 'access_token' in session:
+        api_call('POST', '/api/auth/logout', headers=get_headers())
     session.clear()
     flash('Logged out successfully', 'success')
     return redirect(url_for('home'))
 
 
 @app.route('/about')
+@cached_page
 def about():
     """About Us page"""
     return render_template('about.html')
 
 
 @app.route('/contact', methods=['GET', 'POST'])
+@cached_page
 def contact():
     """Contact Us page"""
     if request.method == 'POST':
@@ -330,154 +347,70 @@ def debug_session():
     })
 
 
-# API endpoints for AJAX calls
-@app.route('/api/products')
-def api_products():
-    """Get products for AJAX requests"""
-    # Get query parameters
-    category = request.args.get('category', '')
-    sort_by = request.args.get('sort_by', 'created_at')
-    search = request.args.get('search', '')
-    page = request.args.get('page', '1')
-    page_size = request.args.get('page_size', '20')
-    
-    # Build API query parameters
-    params = {
-        'page': page,
-        'page_size': page_size
+# Backend routes the page scripts call through /api/*: method, path, login required
+PROXY_ROUTES = [
+    ('GET', re.compile(r'products/?'), False),
+    ('GET', re.compile(r'cart/?'), True),
+    ('POST', re.compile(r'cart/add'), True),
+    ('PUT', re.compile(r'cart/update/[^/]+'), True),
+    ('DELETE', re.compile(r'cart/remove/[^/]+'), True),
+    ('POST', re.compile(r'checkout/razorpay-order'), True),
+    ('POST', re.compile(r'checkout/create-order'), True),
+    ('POST', re.compile(r'profile/addresses'), True),
+    ('PUT', re.compile(r'orders/[^/]+/cancel'), True),
+]
+
+
+def proxy_needs_login(method, path):
+    """Whether a proxied route needs a login, or None when it is not proxied"""
+    for route_method, pattern, needs_login in PROXY_ROUTES:
+        if route_method == method and pattern.fullmatch(path):
+            return needs_login
+    return None
+
+
+# AJAX calls to the routes above are passed through to the backend
+@app.route('/api/<path:path>', methods=['GET', 'POST', 'PUT', 'PATCH', 'DELETE'])
+def api_proxy(path):
+    """Stream a backend API response back to the browser, adding the session's auth"""
+    needs_login = proxy_needs_login(request.method, path)
+    if needs_login is None:
+        return jsonify({'detail': 'Not Found'}), 404
+    
+    # A JSON content type or X-Requested-With cannot be sent cross-site
+    # without a CORS preflight, which keeps forms on other sites from acting
+    # with this session - bodiless requests included
+    if request.method != 'GET' and not (request.is_json or request.headers.get('X-Requested-With')):
+        return jsonify({'detail': 'Expected a JSON request'}), 415
+    
+    if needs_login and 'access_token' not in session:
+        return jsonify({'detail': 'Please login to continue'}), 401
+    
+    endpoint = f'/api/{path}'
+    if request.query_string:
+        endpoint += '?' + request.query_string.decode('latin-1')
+    
+    headers = {
+        name: value for name, value in request.headers.items()
+        if name.lower() in PROXY_FORWARDED_HEADERS
     }
-    
-    if category:
-        params['category'] = category
-    if sort_by:
-        params['sort_by'] = sort_by
-    if search:
-        params['search'] = search
-    
-    # Build query string
-    query_string = '&'.join([f"{k}={v}" for k, v in params.items()])
-    response = api_call('GET', f'/api/products?{query_string}')
-    
-    if response and response.status_code == 200:
-        return jsonify(response.json())
-    else:
-        return jsonify({'products': [], 'total': 0}), 500
-
-
-@app.route('/api/cart/add', methods=['POST'])
-@login_required
-def add_to_cart():
-    """Add item to cart via AJAX"""
-    data = request.get_json()
-    headers = get_headers()
-    print(f"DEBUG: Headers being sent: {headers}")
-    print(f"DEBUG: Data being sent: {data}")
-    response = api_call('POST', '/api/cart/add', headers=headers, json=data)
-    
-    if response:
-        print(f"DEBUG: Response status: {response.status_code}")
-        print(f"DEBUG: Response body: {response.text}")
-    else:
-        print("DEBUG: No response from backend")
-    
-    if response and response.status_code == 201:
-        return jsonify({'success': True, 'message': 'Added to cart'})
-    else:
-        error = response.json().get('detail', 'Failed to add to cart') if response else 'Failed to add to cart'
-        return jsonify({'success': False, 'message': error}), 400
-
-
-@app.route('/api/cart/update/<cart_item_id>', methods=['PUT'])
-@login_required
-def update_cart_item(cart_item_id):
-    """Update cart item quantity via AJAX"""
-    data = request.get_json()
-    response = api_call('PUT', f'/api/cart/update/{cart_item_id}', headers=get_headers(), json=data)
-    
-    if response and response.status_code == 200:
-        return jsonify({'success': True})
-    else:
-        return jsonify({'success': False}), 400
-
-
-@app.route('/api/cart/remove/<cart_item_id>', methods=['DELETE'])
-@login_required
-def remove_cart_item(cart_item_id):
-    """Remove cart item via AJAX"""
-    response = api_call('DELETE', f'/api/cart/remove/{cart_item_id}', headers=get_headers())
-    
-    if response and response.status_code == 200:
-        return jsonify({'success': True})
-    else:
-        return jsonify({'success': False}), 400
-
-
-@app.route('/api/cart', methods=['GET'])
-@login_required
-def get_cart_api():
-    """Get cart data via AJAX"""
-    response = api_call('GET', '/api/cart', headers=get_headers())
-    
-    if response and response.status_code == 200:
-        return jsonify(response.json())
-    else:
-        return jsonify({'error': 'Failed to fetch cart'}), 400
-
-
-@app.route('/api/checkout/razorpay-order', methods=['POST'])
-@login_required
-def create_razorpay_order():
-    """Create Razorpay order via AJAX"""
-    response = api_call('POST', '/api/checkout/razorpay-order', 
-                       headers=get_headers(), 
-                       json=request.json)
-    
-    if response and response.status_code == 200:
-        return jsonify(response.json())
-    else:
-        return jsonify({'error': 'Failed to create order'}), 400
-
-
-@app.route('/api/checkout/create-order', methods=['POST'])
-@login_required
-def create_order_api():
-    """Create order via AJAX"""
-    response = api_call('POST', '/api/checkout/create-order', 
-                       headers=get_headers(), 
-                       json=request.json)
-    
-    if response and response.status_code == 200:
-        return jsonify(response.json())
-    else:
-        return jsonify({'error': 'Failed to create order'}), 400
-
-
-@app.route('/api/profile/addresses', methods=['POST'])
-@login_required
-def add_address_api():
-    """Add address via AJAX"""
-    response = api_call('POST', '/api/profile/addresses', 
-                       headers=get_headers(), 
-                       json=request.json)
-    
-    if response and response.status_code == 201:
-        return jsonify(response.json()), 201
-    else:
-        return jsonify({'error': 'Failed to add address'}), 400
-
-
-@app.route('/api/orders/<order_id>/cancel', methods=['PUT'])
-@login_required
-def cancel_order_api(order_id):
-    """Cancel order via AJAX"""
-    response = api_call('PUT', f'/api/orders/{order_id}/cancel', 
-                       headers=get_headers())
-    
-    if response and response.status_code == 200:
-        return jsonify(response.json()), 200
-    else:
-        error_detail = response.json().get('detail', 'Failed to cancel order') if response else 'Failed to cancel order'
-        return jsonify({'detail': error_detail}), response.status_code if response else 400
+    headers.setdefault('Accept-Encoding', 'identity')
+    headers['X-Forwarded-For'] = request.remote_addr or ''
+    headers.update(get_headers())
+    
+    upstream = api_call(request.method, endpoint, headers=headers, data=request.get_data() or None, stream=True)
+    if upstream is None:
+        return jsonify({'detail': 'Unable to connect to server'}), 502
+    
+    return Response(
+        stream_body(upstream),
+        status=upstream.status_code,
+        headers=[
+            (name, value) for name, value in upstream.headers.items()
+            if name.lower() not in HOP_BY_HOP_HEADERS and name.lower() not in PROXY_DROPPED_RESPONSE_HEADERS
+        ],
+        direct_passthrough=True
+    )
 
 
 if __name__ == '__main__':
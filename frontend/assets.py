@@ -0,0 +1,60 @@
+"""
+Serving built static assets
+
+asset_urls(bundle) is the template helper for CSS/JS bundles. With a
+manifest from build_assets.py it returns the fingerprinted file under
+/assets/, served with a year-long immutable Cache-Control and a
+precompressed .br/.gz body when the browser accepts one. Without a
+manifest (local development) it falls back to the unbuilt source files.
+"""
+import json
+import os
+from flask import Blueprint, abort, request, send_from_directory, url_for
+from build_assets import BUNDLES, DIST_DIR, MANIFEST_PATH
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Accept-Encoding token -> suffix of the precompressed sibling, best first
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+assets = Blueprint('assets', __name__)
+
+
+def _load_manifest():
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)['bundles']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+_manifest = _load_manifest()
+
+
+def asset_urls(bundle):
+    """URLs to include for a bundle: one fingerprinted file, or its sources when unbuilt"""
+    if _manifest and bundle in _manifest:
+        return [url_for('assets.built_asset', filename=_manifest[bundle])]
+    return [url_for('static', filename=source) for source in BUNDLES[bundle]]
+
+
+@assets.route('/assets/<path:filename>')
+def built_asset(filename):
+    """A fingerprinted bundle; its name changes whenever its content does"""
+    if _manifest is None or filename not in _manifest.values():
+        abort(404)
+
+    accepted = request.headers.get('Accept-Encoding', '')
+    encoding, served = None, filename
+    for token, suffix in PRECOMPRESSED:
+        if token in accepted and os.path.exists(os.path.join(DIST_DIR, filename + suffix)):
+            encoding, served = token, filename + suffix
+            break
+
+    response = send_from_directory(DIST_DIR, served, conditional=True, etag=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+        response.mimetype = 'text/css' if filename.endswith('.css') else 'application/javascript'
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
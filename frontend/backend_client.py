@@ -0,0 +1,83 @@
+"""
+HTTP client for the backend API
+
+One keep-alive connection pool shared by every request thread, default
+connect/read timeouts, a helper that runs independent calls concurrently
+so a view pays for the slowest call instead of the sum, and the pieces
+the /api/* pass-through proxy needs to stream responses unchanged.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+BACKEND_URL = os.getenv('BACKEND_URL', 'http://localhost:8000')
+
+# Size the pool to the WSGI server's request threads
+POOL_SIZE = int(os.getenv('BACKEND_POOL_SIZE', '10'))
+CONNECT_TIMEOUT = float(os.getenv('BACKEND_CONNECT_TIMEOUT', '3.05'))
+READ_TIMEOUT = float(os.getenv('BACKEND_READ_TIMEOUT', '15'))
+FANOUT_WORKERS = int(os.getenv('BACKEND_FANOUT_WORKERS', '8'))
+
+session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+session.mount('http://', _adapter)
+session.mount('https://', _adapter)
+# The backend stops working on a request once the caller has given up on it
+session.headers['X-Request-Timeout'] = str(READ_TIMEOUT)
+
+# Connection-level headers that must not be forwarded by a proxy (RFC 7230)
+HOP_BY_HOP_HEADERS = {
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+    'te', 'trailer', 'transfer-encoding', 'upgrade',
+}
+# Browser request headers the proxy passes on; auth and forwarding headers
+# are set by the proxy itself, everything else stays with the browser
+PROXY_FORWARDED_HEADERS = {
+    'accept', 'accept-encoding', 'accept-language', 'content-type', 'if-none-match', 'if-modified-since',
+}
+# Response headers Werkzeug writes itself
+PROXY_DROPPED_RESPONSE_HEADERS = {'date', 'server'}
+
+PROXY_CHUNK_SIZE = 64 * 1024
+
+_fanout = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix='backend-call')
+
+
+def api_call(method, endpoint, **kwargs):
+    """Make API call to backend"""
+    url = f"{BACKEND_URL}{endpoint}"
+    kwargs.setdefault('timeout', (CONNECT_TIMEOUT, READ_TIMEOUT))
+    try:
+        return session.request(method, url, **kwargs)
+    except Exception as e:
+        logger.warning('API call %s %s failed: %s', method, endpoint, e)
+        return None
+
+
+def gather(*calls):
+    """
+    Run independent api_call()s concurrently and return their responses in
+    order. Each call is a (method, endpoint) or (method, endpoint, kwargs)
+    tuple. Build headers before calling: the Flask session is not available
+    on the pool threads.
+    """
+    futures = [
+        _fanout.submit(api_call, call[0], call[1], **(call[2] if len(call) > 2 else {}))
+        for call in calls
+    ]
+    return [future.result() for future in futures]
+
+
+def stream_body(response):
+    """Yield a streamed response's bytes as received (still compressed), then release the connection"""
+    try:
+        yield from response.raw.stream(PROXY_CHUNK_SIZE, decode_content=False)
+    finally:
+        response.close()
@@ -0,0 +1,119 @@
+"""
+Static asset build
+
+Bundles and minifies the site's CSS and JS, names each bundle after a hash
+of its contents, writes .gz (and .br when the brotli package is installed)
+siblings, and records everything in static/dist/manifest.json, which the
+asset_urls() template helper reads. Run it on every deploy:
+
+    cd frontend
+    python build_assets.py
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+# Bundle name -> source files (relative to static/), concatenated in order
+BUNDLES = {
+    'css/site.css': ['css/style.css', 'css/pages.css'],
+    'css/checkout.css': ['css/checkout.css'],
+    'js/main.js': ['js/main.js'],
+}
+
+_CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+_CSS_STRING = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')')
+
+
+def minify_css(source):
+    if rcssmin is not None:
+        return rcssmin.cssmin(source)
+
+    out = []
+    # Even indexes are outside quoted strings, odd ones are the strings
+    for i, part in enumerate(_CSS_STRING.split(_CSS_COMMENT.sub('', source))):
+        if i % 2:
+            out.append(part)
+            continue
+        part = re.sub(r'\s+', ' ', part)
+        part = re.sub(r'\s*([{};,>])\s*', r'\1', part)
+        out.append(part.replace(';}', '}'))
+    return ''.join(out).strip()
+
+
+def minify_js(source):
+    if rjsmin is not None:
+        return rjsmin.jsmin(source)
+
+    # Conservative without a real parser: drop indentation, blank lines
+    # and whole-line // comments only
+    lines = []
+    for line in source.splitlines():
+        line = line.strip()
+        if line and not line.startswith('//'):
+            lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+def build():
+    if os.path.isdir(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+    os.makedirs(DIST_DIR)
+
+    manifest = {}
+    for name, sources in BUNDLES.items():
+        parts = []
+        for source in sources:
+            with open(os.path.join(STATIC_DIR, source), encoding='utf-8') as f:
+                parts.append(f.read())
+
+        minify = minify_css if name.endswith('.css') else minify_js
+        content = '\n'.join(minify(part) for part in parts).encode('utf-8')
+
+        stem, ext = os.path.splitext(name)
+        digest = hashlib.sha256(content).hexdigest()[:12]
+        filename = f'{stem}.{digest}{ext}'
+        path = os.path.join(DIST_DIR, filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(path, 'wb') as f:
+            f.write(content)
+        with open(path + '.gz', 'wb') as f:
+            # mtime=0 keeps the .gz byte-identical between builds
+            f.write(gzip.compress(content, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(path + '.br', 'wb') as f:
+                f.write(brotli.compress(content, quality=11))
+
+        manifest[name] = filename
+        raw_size = sum(len(part.encode('utf-8')) for part in parts)
+        print(f'{name}: {raw_size} -> {len(content)} bytes as {filename}')
+
+    with open(MANIFEST_PATH, 'w') as f:
+        json.dump({'bundles': manifest, 'sources': BUNDLES}, f, indent=2)
+    return manifest
+
+
+if __name__ == '__main__':
+    build()
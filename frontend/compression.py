@@ -0,0 +1,75 @@
+"""
+Compression of rendered pages
+
+compress_response is an after_request hook that gzips (or brotli-encodes,
+when the brotli package is installed and the browser accepts it) HTML and
+other text responses of at least COMPRESSION_MINIMUM_SIZE bytes. Streamed
+responses, such as the /api proxy's, and anything already encoded, such as
+the precompressed /assets/ bundles, are left alone.
+"""
+import gzip
+import os
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MINIMUM_SIZE = int(os.getenv('COMPRESSION_MINIMUM_SIZE', '500'))
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '4'))
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+
+
+def _accepted_encodings(header):
+    accepted = set()
+    for token in header.split(','):
+        name, _, params = token.partition(';')
+        params = params.replace(' ', '')
+        try:
+            quality = float(params[2:]) if params.startswith('q=') else 1.0
+        except ValueError:
+            quality = 0.0
+        if quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def compress_response(response):
+    """Encode the response body for the browser if it is worth it"""
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or response.status_code != 200
+        or 'Content-Encoding' in response.headers
+        or not response.mimetype.startswith(COMPRESSIBLE_TYPES)
+    ):
+        return response
+
+    accepted = _accepted_encodings(request.headers.get('Accept-Encoding', ''))
+    if brotli is not None and 'br' in accepted:
+        encoding = 'br'
+    elif 'gzip' in accepted:
+        encoding = 'gzip'
+    else:
+        return response
+
+    body = response.get_data()
+    if len(body) < MINIMUM_SIZE:
+        return response
+
+    if encoding == 'br':
+        body = brotli.compress(body, quality=BROTLI_QUALITY)
+    else:
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    # The ETag, if any, described the uncompressed body
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f'{etag}-{encoding}', weak=weak)
+    return response
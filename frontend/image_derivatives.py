@@ -0,0 +1,130 @@
+"""
+Resized WebP derivatives of the images under static/images/
+
+Each source image gets WebP variants at IMAGE_DERIVATIVE_WIDTHS, stored in
+static/derived/ under a name built from the hash of the source bytes, so
+an edited image gets new derivatives and an unchanged one is never
+re-encoded. Run the CLI after adding images; anything it has not produced
+yet is generated on first request by the /img/<width>/<path> endpoint.
+
+    cd frontend
+    python image_derivatives.py
+"""
+import hashlib
+import os
+import threading
+from flask import Blueprint, abort, redirect, request, send_from_directory, url_for
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+IMAGES_DIR = os.path.join(STATIC_DIR, 'images')
+DERIVED_DIR = os.path.join(STATIC_DIR, 'derived')
+
+WIDTHS = sorted(int(w) for w in os.getenv('IMAGE_DERIVATIVE_WIDTHS', '160,320,640,960').split(',') if w.strip())
+WEBP_QUALITY = int(os.getenv('IMAGE_WEBP_QUALITY', '80'))
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+LOCAL_IMAGE_PREFIX = '/static/images/'
+
+images = Blueprint('images', __name__)
+
+# (path, mtime, size) -> sha256 prefix, so sources are only re-hashed when they change
+_source_hashes = {}
+_generate_lock = threading.Lock()
+
+
+def _source_hash(path):
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    digest = _source_hashes.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(chunk)
+        digest = _source_hashes[key] = sha.hexdigest()[:16]
+    return digest
+
+
+def derivative_path(source_path, width):
+    return os.path.join(DERIVED_DIR, f'{_source_hash(source_path)}-{width}.webp')
+
+
+def derivative(source_path, width):
+    """Path of the width-px WebP for a source image, generating it if needed"""
+    path = derivative_path(source_path, width)
+    if os.path.exists(path):
+        return path
+
+    with _generate_lock:
+        if os.path.exists(path):
+            return path
+        os.makedirs(DERIVED_DIR, exist_ok=True)
+        with Image.open(source_path) as img:
+            # Phone photos are often stored sideways with an EXIF rotation
+            img = ImageOps.exif_transpose(img)
+            img = img.convert('RGBA' if img.mode in ('RGBA', 'LA', 'P') else 'RGB')
+            if img.width > width:
+                img = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            img.save(tmp_path, 'WEBP', quality=WEBP_QUALITY, method=6)
+        os.replace(tmp_path, path)
+    return path
+
+
+def image_srcset(image_url):
+    """srcset value for a local /static/images/ URL; empty for anything else"""
+    if Image is None or not image_url or not image_url.startswith(LOCAL_IMAGE_PREFIX):
+        return ''
+    filename = image_url[len(LOCAL_IMAGE_PREFIX):]
+    return ', '.join(
+        f"{url_for('images.resized_image', width=width, filename=filename)} {width}w"
+        for width in WIDTHS
+    )
+
+
+@images.route('/img/<int:width>/<path:filename>')
+def resized_image(width, filename):
+    """WebP derivative of static/images/<filename>, or the original for browsers without WebP"""
+    if width not in WIDTHS or not filename.lower().endswith(SOURCE_EXTENSIONS):
+        abort(404)
+
+    source_path = os.path.realpath(os.path.join(IMAGES_DIR, filename))
+    if not source_path.startswith(os.path.realpath(IMAGES_DIR) + os.sep) or not os.path.isfile(source_path):
+        abort(404)
+
+    if Image is None or 'image/webp' not in request.headers.get('Accept', ''):
+        return redirect(url_for('static', filename=f'images/{filename}'))
+
+    path = derivative(source_path, width)
+    response = send_from_directory(DERIVED_DIR, os.path.basename(path), conditional=True, etag=True)
+    response.headers['Cache-Control'] = 'public, max-age=86400'
+    response.headers['Vary'] = 'Accept'
+    return response
+
+
+def build_all():
+    """Generate every missing derivative under static/images/"""
+    created = 0
+    for root, _, files in os.walk(IMAGES_DIR):
+        for name in sorted(files):
+            if not name.lower().endswith(SOURCE_EXTENSIONS):
+                continue
+            source_path = os.path.join(root, name)
+            for width in WIDTHS:
+                if os.path.exists(derivative_path(source_path, width)):
+                    continue
+                path = derivative(source_path, width)
+                created += 1
+                rel = os.path.relpath(source_path, IMAGES_DIR)
+                print(f'{rel} @{width}w: {os.path.getsize(source_path)} -> {os.path.getsize(path)} bytes')
+    print(f'{created} derivatives created')
+
+
+if __name__ == '__main__':
+    if Image is None:
+        raise SystemExit('Pillow is required: pip install Pillow')
+    build_all()
@@ -0,0 +1,136 @@
+"""
+Page and fragment caching for the storefront
+
+Anonymous visitors all see the same HTML, so whole pages are cached per
+route, query string and catalog version. Logged-in pages are always
+rendered, but reuse cached fragments (banner carousel, category chips,
+product grid) so a hit skips both the backend call and the Jinja render.
+The catalog version comes from the backend and is re-checked every
+PAGE_CACHE_VERSION_SECONDS; any product or banner change moves every key
+to a new version. Entries also expire after PAGE_CACHE_TTL_SECONDS.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import g, request, session, render_template
+from markupsafe import Markup
+from backend_client import api_call
+
+PAGE_CACHE_TTL = float(os.getenv('PAGE_CACHE_TTL_SECONDS', '60'))
+PAGE_CACHE_SIZE = int(os.getenv('PAGE_CACHE_SIZE', '512'))
+FRAGMENT_CACHE_SIZE = int(os.getenv('FRAGMENT_CACHE_SIZE', '512'))
+VERSION_CHECK_INTERVAL = float(os.getenv('PAGE_CACHE_VERSION_SECONDS', '5'))
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after ttl seconds"""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+page_cache = TTLCache(PAGE_CACHE_SIZE, PAGE_CACHE_TTL)
+fragment_cache = TTLCache(FRAGMENT_CACHE_SIZE, PAGE_CACHE_TTL)
+
+_version = {'value': None, 'checked': float('-inf')}
+_version_lock = threading.Lock()
+
+
+def catalog_version():
+    """Current catalog version, or None if the backend could not be asked (caching is then skipped)"""
+    now = time.monotonic()
+    if now - _version['checked'] < VERSION_CHECK_INTERVAL:
+        return _version['value']
+
+    # One thread refreshes; the others keep using the previous value meanwhile
+    if not _version_lock.acquire(blocking=False):
+        return _version['value']
+    try:
+        response = api_call('GET', '/api/pages/version')
+        value = response.json().get('version') if response is not None and response.status_code == 200 else None
+        _version.update(value=value, checked=time.monotonic())
+        return value
+    finally:
+        _version_lock.release()
+
+
+def _cacheable_visitor():
+    return 'access_token' not in session and '_flashes' not in session
+
+
+def skip_page_cache():
+    """Keep the page being rendered out of the cache (e.g. it shows a backend failure)"""
+    g.skip_page_cache = True
+
+
+def cached_page(view):
+    """Serve anonymous GETs of this view from the page cache"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != 'GET' or not _cacheable_visitor():
+            return view(*args, **kwargs)
+
+        version = catalog_version()
+        if version is None:
+            return view(*args, **kwargs)
+
+        key = (request.path, tuple(sorted(request.args.items(multi=True))), version)
+        html = page_cache.get(key)
+        if html is not None:
+            return html
+
+        response = view(*args, **kwargs)
+        # Only plain rendered pages; redirects and flashed errors are per-visit
+        if isinstance(response, str) and _cacheable_visitor() and not g.get('skip_page_cache'):
+            page_cache.set(key, response)
+        return response
+    return wrapper
+
+
+def cached_fragment(template, *key):
+    """A previously rendered fragment for this key, or None"""
+    version = catalog_version()
+    if version is None:
+        return None
+    return fragment_cache.get((template, key, version))
+
+
+def render_fragment(template, *key, cache=True, **context):
+    """Render a partial template, caching the HTML under key and the catalog version"""
+    version = catalog_version()
+    html = Markup(render_template(template, **context))
+    if cache and version is not None:
+        fragment_cache.set((template, key, version), html)
+    return html
@@ -75,11 +75,7 @@ function validatePhone(phone) {
 
 // Cart functionality
 function updateCartCount() {
-  fetch("/api/cart", {
-    headers: {
-      Authorization: `Bearer ${localStorage.getItem("access_token")}`,
-    },
-  })
+  fetch("/api/cart")
     .then((response) => response.json())
     .then((data) => {
       const cartIcon = document.querySelector('.header-icon[href*="cart"]');
@@ -263,8 +259,23 @@ window.handleUnauthorized = function () {
   }, 1500);
 };
 
+// /api/* responses come straight from the backend: success is the HTTP
+// status and errors carry a "detail" field
+function readApiResponse(response) {
+  if (response.status === 401 || response.status === 403) {
+    window.handleUnauthorized();
+  }
+  return response.json().then((data) => ({
+    ...data,
+    success: response.ok,
+    message:
+      data.message || (typeof data.detail === "string" ? data.detail : undefined),
+  }));
+}
+
 // Export functions for use in templates
 window.showNotification = showNotification;
+window.readApiResponse = readApiResponse;
 window.formatPrice = formatPrice;
 window.formatDate = formatDate;
 window.validateEmail = validateEmail;